@@ -1,7 +1,6 @@
 import random
 import string
 import hashlib
-from threading import Thread
 import requests
 import logging
 from django.conf import settings
@@ -10,6 +9,8 @@ from django.core.cache import cache
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from brokers_app.mailer import queue_email
+
 
 ROLE_MAP = {
     'buyer': 'buyer',
@@ -26,11 +27,6 @@ logger = logging.getLogger(__name__)
 COMPANY_SIGNATURE = "\n\nRegards,\nAgro Broker Team"
 
 
-def _run_in_background(fn, *args, **kwargs):
-    thread = Thread(target=fn, args=args, kwargs=kwargs, daemon=True)
-    thread.start()
-
-
 def _safe_cache_key(prefix, *parts):
     """
     Build a memcached-safe cache key:
@@ -142,9 +138,16 @@ def _is_buyer_user(user):
     return bool(user and user.is_authenticated and (user.is_buyer or user.role in ('buyer', 'both_sellerandbuyer')))
 
 
-def send_welcome_credentials_email(email, username, password):
-    if not email:
-        return
+def _send_now(subject, body, email, failure_message, *log_args):
+    try:
+        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
+        return True
+    except Exception:
+        logger.exception(failure_message, *log_args)
+        return False
+
+
+def welcome_credentials_message(username, password):
     subject = 'Welcome to Agro Broker - Your Account Details'
     body = (
         'Dear User,\n\n'
@@ -154,14 +157,19 @@ def send_welcome_credentials_email(email, username, password):
         'For security, please log in and change your password immediately.'
         f'{COMPANY_SIGNATURE}'
     )
-    try:
-        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
-    except Exception:
-        logger.exception('Failed to send welcome email to %s', email)
+    return subject, body
+
+
+def send_welcome_credentials_email(email, username, password):
+    if not email:
+        return False
+    subject, body = welcome_credentials_message(username, password)
+    return _send_now(subject, body, email, 'Failed to send welcome email to %s', email)
 
 
 def send_welcome_credentials_email_async(email, username, password):
-    _run_in_background(send_welcome_credentials_email, email, username, password)
+    subject, body = welcome_credentials_message(username, password)
+    queue_email(subject, body, [email], category='welcome_credentials', sensitive=True)
 
 
 def send_forgot_password_email(email, new_password):
@@ -175,10 +183,7 @@ def send_forgot_password_email(email, new_password):
         'Please log in and change this temporary password immediately to keep your account secure.'
         f'{COMPANY_SIGNATURE}'
     )
-    try:
-        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
-    except Exception:
-        logger.exception('Failed to send forgot-password email to %s', email)
+    return _send_now(subject, body, email, 'Failed to send forgot-password email to %s', email)
 
 
 def send_password_changed_email(email):
@@ -191,17 +196,10 @@ def send_password_changed_email(email):
         'If you did not perform this action, please contact support immediately.'
         f'{COMPANY_SIGNATURE}'
     )
-    try:
-        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
-        return True
-    except Exception:
-        logger.exception('Failed to send password-changed email to %s', email)
-        return False
+    return _send_now(subject, body, email, 'Failed to send password-changed email to %s', email)
 
 
-def send_kyc_status_email(email, status_value, rejection_reason=''):
-    if not email:
-        return
+def kyc_status_message(status_value, rejection_reason=''):
     if status_value == 'approved':
         subject = 'Agro Broker - KYC Approved'
         body = (
@@ -219,19 +217,22 @@ def send_kyc_status_email(email, status_value, rejection_reason=''):
             'Please update your details and submit again.'
             f'{COMPANY_SIGNATURE}'
         )
-    try:
-        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
-    except Exception:
-        logger.exception('Failed to send KYC status email to %s status=%s', email, status_value)
+    return subject, body
+
+
+def send_kyc_status_email(email, status_value, rejection_reason=''):
+    if not email:
+        return False
+    subject, body = kyc_status_message(status_value, rejection_reason)
+    return _send_now(subject, body, email, 'Failed to send KYC status email to %s status=%s', email, status_value)
 
 
 def send_kyc_status_email_async(email, status_value, rejection_reason=''):
-    _run_in_background(send_kyc_status_email, email, status_value, rejection_reason)
+    subject, body = kyc_status_message(status_value, rejection_reason)
+    queue_email(subject, body, [email], category='kyc_status')
 
 
-def send_account_suspended_email(email, reason=''):
-    if not email:
-        return
+def account_suspended_message(reason=''):
     subject = 'Agro Broker - Account Suspended'
     body = (
         'Dear User,\n\n'
@@ -240,19 +241,22 @@ def send_account_suspended_email(email, reason=''):
         'Please contact the admin/support team for further assistance.'
         f'{COMPANY_SIGNATURE}'
     )
-    try:
-        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
-    except Exception:
-        logger.exception('Failed to send account-suspended email to %s', email)
+    return subject, body
+
+
+def send_account_suspended_email(email, reason=''):
+    if not email:
+        return False
+    subject, body = account_suspended_message(reason)
+    return _send_now(subject, body, email, 'Failed to send account-suspended email to %s', email)
 
 
 def send_account_suspended_email_async(email, reason=''):
-    _run_in_background(send_account_suspended_email, email, reason)
+    subject, body = account_suspended_message(reason)
+    queue_email(subject, body, [email], category='account_suspended')
 
 
-def send_account_activated_email(email):
-    if not email:
-        return
+def account_activated_message():
     subject = 'Agro Broker - Account Activated'
     body = (
         'Dear User,\n\n'
@@ -260,13 +264,20 @@ def send_account_activated_email(email):
         'You can now continue using the platform.'
         f'{COMPANY_SIGNATURE}'
     )
-    try:
-        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
-    except Exception:
-        logger.exception('Failed to send account-activated email to %s', email)
+    return subject, body
+
+
+def send_account_activated_email(email):
+    if not email:
+        return False
+    subject, body = account_activated_message()
+    return _send_now(subject, body, email, 'Failed to send account-activated email to %s', email)
+
 
 def send_account_activated_email_async(email):
-    _run_in_background(send_account_activated_email, email)
+    subject, body = account_activated_message()
+    queue_email(subject, body, [email], category='account_activated')
+
 
 def should_send_suspension_email(user_id, cooldown_seconds=3600):
     cache_key = f'suspension_email_sent_{user_id}'
@@ -4,6 +4,7 @@ from django.contrib import messages
 from django.apps import apps
 from django.db import transaction
 from django.shortcuts import render, redirect
+from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.db.models import Q
 import logging
@@ -23,12 +24,16 @@ from .permission import *
 from .serializers import *
 from .utils import *
 from .utils import _is_admin_user, _is_seller_user, _is_buyer_user
+from brokers_app.dashboard import BROKERAGE_RATE, get_admin_dashboard_snapshot
 from brokers_app.utils import (
     has_permission,
     can_user_perform_action,
     get_user_status,
     normalize_user_status,
     get_contract_display_ids,
+    cursor_paginate,
+    get_category_tree,
+    time_series_from_rows,
 )
 from django.db.models import Q, Count, Sum, F, DecimalField, Avg
 from django.db.models.functions import Coalesce
@@ -41,6 +46,7 @@ from brokers_app.views import (
     product_toggle_ajax as web_product_toggle_ajax,
     product_update_stock_ajax as web_product_update_stock_ajax,
     offers_list_ajax as web_offers_list_ajax,
+    _with_interest_summary,
     branch_create_ajax as web_branch_create_ajax,
     branch_update_ajax as web_branch_update_ajax,
     branch_toggle_status_ajax as web_branch_toggle_status_ajax,
@@ -145,10 +151,64 @@ def _paginate_queryset(request, queryset, page_param='page', page_size=DEFAULT_P
     }
 
 
+def _cursor_paginate_queryset(request, queryset, ordering, cursor_param='cursor', page_size=DEFAULT_PAGE_SIZE):
+    try:
+        return cursor_paginate(queryset, ordering, request.GET.get(cursor_param), page_size=page_size)
+    except ValueError:
+        raise serializers.ValidationError({cursor_param: 'Invalid cursor.'})
+
+
+def _mobile_pagination_payload(page_obj, pagination):
+    return {
+        'page': page_obj.number,
+        'num_pages': page_obj.paginator.num_pages,
+        'count': page_obj.paginator.count,
+        'has_next': page_obj.has_next(),
+        'has_previous': page_obj.has_previous(),
+        'window': pagination['window'],
+    }
+
+
+def _filter_pagination_payload(page_obj, pagination):
+    return {
+        'count': page_obj.paginator.count,
+        'num_pages': page_obj.paginator.num_pages,
+        'page': page_obj.number,
+        'page_size': page_obj.paginator.per_page,
+        'has_next': page_obj.has_next(),
+        'has_previous': page_obj.has_previous(),
+        'next_page': page_obj.next_page_number() if page_obj.has_next() else None,
+        'previous_page': page_obj.previous_page_number() if page_obj.has_previous() else None,
+    }
+
+
+def _paginate_list(request, queryset, ordering, page_size=DEFAULT_PAGE_SIZE, payload=_mobile_pagination_payload):
+    """
+    Page-number pagination by default; keyset mode when the request carries `cursor=`
+    (empty for the first page, then the returned next_cursor).
+    """
+    if 'cursor' in request.GET:
+        return _cursor_paginate_queryset(request, queryset, ordering, page_size=page_size)
+    queryset = queryset.order_by(*[f'-{field}' for field in ordering])
+    page_obj, pagination = _paginate_queryset(request, queryset, page_size=page_size)
+    return list(page_obj.object_list), payload(page_obj, pagination)
+
+
 def _parse_bool(value):
     return str(value).strip().lower() in {'1', 'true', 'yes', 'on'}
 
 
+def _category_subtree_q(category_id):
+    """Products in the given category or anywhere below it, via the indexed path prefix."""
+    category_id = str(category_id).strip()
+    category_path = None
+    if category_id.isdigit():
+        category_path = CategoryMaster.objects.filter(id=int(category_id)).values_list('path', flat=True).first()
+    if not category_path:
+        return Q(pk__in=[])
+    return Q(category__path__startswith=category_path)
+
+
 def _action_guard_response(user):
     allowed, reason = can_user_perform_action(user)
     if allowed:
@@ -225,7 +285,9 @@ class TokenViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'], url_path='all-with-details')
     def all_with_details(self, request):
         """Get all categories with full details for display - with proper indentation"""
-        categories = CategoryMaster.objects.filter(is_active=True).order_by('level', 'category_name')
+        categories = CategoryMaster.objects.filter(is_active=True).select_related('parent').annotate(
+            children_count=Count('children')
+        ).order_by('level', 'category_name')
         data = []
         for cat in categories:
                 data.append({
@@ -238,7 +300,7 @@ class TokenViewSet(viewsets.ViewSet):
                     'is_active': cat.is_active,
                     'created_at': cat.created_at,
                     'updated_at': cat.updated_at,
-                    'children_count': cat.children.count(),
+                    'children_count': cat.children_count,
                     'display_name': '— ' * cat.level + cat.category_name  # Indented name for dropdowns
                 })
         return Response(data)
@@ -569,7 +631,7 @@ def mobile_kyc_list_api(request):
     if kyc_status:
         queryset = queryset.filter(kyc_status=kyc_status)
 
-    page_obj, pagination = _paginate_queryset(request, queryset)
+    users, pagination = _paginate_list(request, queryset, ('date_joined', 'id'))
     results = [{
         'id': u.id,
         'name': f'{u.first_name or ""} {u.last_name or ""}'.strip() or u.username,
@@ -585,19 +647,12 @@ def mobile_kyc_list_api(request):
         'kyc_rejected_at': u.kyc_rejected_at,
         'kyc_rejection_reason': u.kyc_rejection_reason or '',
         'account_status': u.account_status,
-    } for u in page_obj.object_list]
+    } for u in users]
 
     return Response({
         'success': True,
         'results': results,
-        'pagination': {
-            'page': page_obj.number,
-            'num_pages': page_obj.paginator.num_pages,
-            'count': page_obj.paginator.count,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-            'window': pagination['window'],
-        }
+        'pagination': pagination,
     }, status=status.HTTP_200_OK)
 
 
@@ -626,7 +681,7 @@ def mobile_brand_list_api(request):
     if status_filter in {BrandMaster.STATUS_ACTIVE, BrandMaster.STATUS_INACTIVE}:
         queryset = queryset.filter(status=status_filter)
 
-    page_obj, pagination = _paginate_queryset(request, queryset)
+    brands, pagination = _paginate_list(request, queryset, ('created_at', 'id'))
     results = [{
         'id': brand.id,
         'brand_unique_id': brand.brand_unique_id,
@@ -635,19 +690,12 @@ def mobile_brand_list_api(request):
         'created_by': brand.created_by.username if brand.created_by else '-',
         'created_at': brand.created_at.strftime('%d/%m/%y'),
         'updated_at': brand.updated_at.strftime('%d/%m/%y'),
-    } for brand in page_obj.object_list]
+    } for brand in brands]
 
     return Response({
         'success': True,
         'results': results,
-        'pagination': {
-            'page': page_obj.number,
-            'num_pages': page_obj.paginator.num_pages,
-            'count': page_obj.paginator.count,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-            'window': pagination['window'],
-        }
+        'pagination': pagination,
     }, status=status.HTTP_200_OK)
 
 
@@ -748,7 +796,7 @@ def session_token_api(request):
 @permission_classes([IsAuthenticated])
 def product_filter_api(request):
     user = request.user
-    queryset = Product.objects.select_related('category', 'seller').prefetch_related('interests').order_by('-created_at')
+    queryset = _with_interest_summary(Product.objects.select_related('category', 'seller')).order_by('-created_at')
 
     if _is_admin_user(user):
         base_q = Q()
@@ -802,6 +850,10 @@ def product_filter_api(request):
     if subcategory_id:
         filters_q &= (Q(category_id=subcategory_id) | Q(category__parent_id=subcategory_id))
 
+    category_subtree = (request.GET.get('category_subtree') or '').strip()
+    if category_subtree:
+        filters_q &= _category_subtree_q(category_subtree)
+
     seller_id = (request.GET.get('seller_id') or '').strip()
     if seller_id:
         filters_q &= Q(seller_id=seller_id)
@@ -861,10 +913,7 @@ def product_filter_api(request):
                 'mobile': product.seller.mobile,
                 'email': product.seller.email,
             },
-            'interested_buyers_count': sum(
-                1 for i in product.interests.all()
-                if i.is_active and i.status in PENDING_INTEREST_STATUSES
-            ),
+            'interested_buyers_count': product.pending_interest_count,
             'approved_buyer_id': None,
         })
 
@@ -901,7 +950,7 @@ def universal_filter_api(request):
         return _parse_bool(value)
 
     if entity == 'product':
-        queryset = Product.objects.select_related('category', 'seller').prefetch_related('interests').order_by('-created_at')
+        queryset = _with_interest_summary(Product.objects.select_related('category', 'seller')).order_by('-created_at')
 
         base_q = Q()
         if _is_admin_user(user):
@@ -940,6 +989,9 @@ def universal_filter_api(request):
             if value:
                 q &= Q(**{lookup: value})
 
+        if params.get('category_subtree'):
+            q &= _category_subtree_q(params['category_subtree'])
+
         if params.get('min_price'):
             q &= Q(amount__gte=params['min_price'])
         if params.get('max_price'):
@@ -972,7 +1024,9 @@ def universal_filter_api(request):
             )
 
         filtered_qs = queryset.filter(base_q & q).distinct()
-        page_obj, _ = _paginate_queryset(request, filtered_qs, page_size=10)
+        page_items, pagination = _paginate_list(
+            request, filtered_qs, ('created_at', 'id'), payload=_filter_pagination_payload
+        )
         results = [{
             'id': p.id,
             'title': p.title,
@@ -989,12 +1043,9 @@ def universal_filter_api(request):
                 'mobile': p.seller.mobile,
                 'email': p.seller.email,
             },
-            'interested_buyers_count': sum(
-                1 for i in p.interests.all()
-                if i.is_active and i.status in PENDING_INTEREST_STATUSES
-            ),
+            'interested_buyers_count': p.pending_interest_count,
             'approved_buyer_id': None,
-        } for p in page_obj.object_list]
+        } for p in page_items]
 
     elif entity == 'user':
         queryset = DaalUser.objects.order_by('-date_joined')
@@ -1028,7 +1079,9 @@ def universal_filter_api(request):
             q &= Q(date_joined__date__gte=params['from_date'])
         if params.get('to_date'):
             q &= Q(date_joined__date__lte=params['to_date'])
-        page_obj, _ = _paginate_queryset(request, queryset.filter(q).distinct(), page_size=10)
+        page_items, pagination = _paginate_list(
+            request, queryset.filter(q).distinct(), ('date_joined', 'id'), payload=_filter_pagination_payload
+        )
         results = [{
             'id': u.id,
             'username': u.username,
@@ -1040,7 +1093,7 @@ def universal_filter_api(request):
             'kyc_status': u.kyc_status,
             'is_active': u.is_active,
             'date_joined': u.date_joined.isoformat(),
-        } for u in page_obj.object_list]
+        } for u in page_items]
 
     elif entity == 'category':
         queryset = CategoryMaster.objects.order_by('-created_at')
@@ -1055,13 +1108,15 @@ def universal_filter_api(request):
             q &= Q(created_at__date__gte=params['from_date'])
         if params.get('to_date'):
             q &= Q(created_at__date__lte=params['to_date'])
-        page_obj, _ = _paginate_queryset(request, queryset.filter(q).distinct(), page_size=10)
+        page_items, pagination = _paginate_list(
+            request, queryset.filter(q).distinct(), ('created_at', 'id'), payload=_filter_pagination_payload
+        )
         results = [{
             'id': c.id,
             'category_name': c.category_name,
             'created_at': c.created_at.isoformat(),
             'updated_at': c.updated_at.isoformat(),
-        } for c in page_obj.object_list]
+        } for c in page_items]
 
     elif entity == 'subcategory':
         queryset = subCategoryMaster.objects.select_related('parent').filter(parent__isnull=False).order_by('-created_at')
@@ -1081,14 +1136,16 @@ def universal_filter_api(request):
             q &= Q(created_at__date__gte=params['from_date'])
         if params.get('to_date'):
             q &= Q(created_at__date__lte=params['to_date'])
-        page_obj, _ = _paginate_queryset(request, queryset.filter(q).distinct(), page_size=10)
+        page_items, pagination = _paginate_list(
+            request, queryset.filter(q).distinct(), ('created_at', 'id'), payload=_filter_pagination_payload
+        )
         results = [{
             'id': s.id,
             'subcategory_name': s.category_name,
             'category': {'id': s.parent_id, 'name': s.parent.category_name if s.parent else None},
             'created_at': s.created_at.isoformat(),
             'updated_at': s.updated_at.isoformat(),
-        } for s in page_obj.object_list]
+        } for s in page_items]
 
     else:
         return Response({'detail': 'Invalid entity. Use: product, user, category, subcategory.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -1096,16 +1153,7 @@ def universal_filter_api(request):
     return Response({
         'entity': entity,
         'results': results,
-        'pagination': {
-            'count': page_obj.paginator.count,
-            'num_pages': page_obj.paginator.num_pages,
-            'page': page_obj.number,
-            'page_size': 10,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-            'next_page': page_obj.next_page_number() if page_obj.has_next() else None,
-            'previous_page': page_obj.previous_page_number() if page_obj.has_previous() else None,
-        },
+        'pagination': pagination,
     }, status=status.HTTP_200_OK)
 
 
@@ -1191,26 +1239,17 @@ class CategoryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='hierarchy')
     def category_hierarchy(self, request):
         """Get full category hierarchy as nested structure"""
-        root_categories = CategoryMaster.objects.filter(
-            parent__isnull=True, 
-            is_active=True
-        ).order_by('category_name')
-        
-        def build_tree(categories):
-            tree = []
-            for cat in categories:
-                children = cat.children.filter(is_active=True).order_by('category_name')
-                tree.append({
-                    'id': cat.id,
-                    'name': cat.category_name,
-                    'level': cat.level,
-                    'path': cat.path,
-                    'full_path': cat.get_full_path(),
-                    'children': build_tree(children) if children.exists() else []
-                })
-            return tree
-        
-        return Response(build_tree(root_categories))
+        def build_tree(nodes):
+            return [{
+                'id': node['id'],
+                'name': node['category_name'],
+                'level': node['level'],
+                'path': node['path'],
+                'full_path': node['full_path'],
+                'children': build_tree(node['children']),
+            } for node in nodes]
+        
+        return Response(build_tree(get_category_tree()))
 
     @action(detail=False, methods=['get'], url_path='levels')
     def categories_by_level(self, request):
@@ -1626,6 +1665,12 @@ class ProductViewSetLegacy(viewsets.ModelViewSet):
                 )
             
             with transaction.atomic():
+                if StockReservation.hold(interest) is None:
+                    return Response(
+                        {'success': False, 'message': 'Not enough unreserved stock to approve this interest.'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
                 interest.status = ProductInterest.STATUS_SELLER_CONFIRMED
                 interest.seller_remark = seller_remark
                 interest.save()
@@ -1671,11 +1716,12 @@ class ProductViewSetLegacy(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            with transaction.atomic():
-                interest.status = ProductInterest.STATUS_REJECTED
-                interest.seller_remark = seller_remark
-                interest.is_active = False
-                interest.save()
+            ProductInterest.bulk_transition(
+                ProductInterest.objects.filter(pk=interest.pk),
+                ProductInterest.STATUS_REJECTED,
+                seller_remark=seller_remark,
+                is_active=False,
+            )
             
             serializer = self.get_serializer(product)
             return Response({
@@ -1709,24 +1755,40 @@ class ProductViewSetLegacy(viewsets.ModelViewSet):
             product.status = Product.STATUS_SOLD_PENDING_CONFIRMATION
             product.save(update_fields=['deal_status', 'status', 'updated_at'])
             
-            # Update the confirmed interest
-            confirmed_interest = product.interests.filter(
-                status=ProductInterest.STATUS_SELLER_CONFIRMED
-            ).first()
+            # Update the confirmed interest; prefer one whose stock hold is still live
+            now = timezone.now()
+            seller_confirmed = product.interests.filter(status=ProductInterest.STATUS_SELLER_CONFIRMED)
+            confirmed_interest = (
+                seller_confirmed.filter(
+                    stock_reservation__status=StockReservation.STATUS_HELD,
+                    stock_reservation__expires_at__gt=now,
+                ).order_by('updated_at', 'id').first()
+                or seller_confirmed.first()
+            )
             
             if confirmed_interest:
+                secured, available_qty = StockReservation.secure_for_deal(confirmed_interest, now=now)
+                if not secured:
+                    transaction.set_rollback(True)
+                    return Response(
+                        {'success': False, 'message': f'Only {available_qty} available outside other buyers\' reservations.'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                # Update product stock
+                if not product.update_stock_after_deal(confirmed_interest.buyer_required_quantity):
+                    transaction.set_rollback(True)
+                    return Response(
+                        {'success': False, 'message': 'Not enough stock left to confirm this deal.'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
                 confirmed_interest.status = ProductInterest.STATUS_DEAL_CONFIRMED
                 confirmed_interest.deal_confirmed_at = timezone.now()
                 confirmed_interest.save()
                 
-                # Update product stock
-                product.update_stock_after_deal(confirmed_interest.buyer_required_quantity)
-                
-                # Reject all other interests
-                product.interests.exclude(id=confirmed_interest.id).update(
-                    status=ProductInterest.STATUS_REJECTED,
-                    is_active=False
-                )
+                # Reject only the other interests the remaining stock can no longer cover
+                ProductInterest.reject_unfillable(product, keep_interest_id=confirmed_interest.id, now=now)
         
         serializer = self.get_serializer(product)
         return Response({
@@ -2285,63 +2347,14 @@ def admin_dashboard_api(request):
     if not _is_admin_user(user):
         return Response({'message': 'Access denied. Admin privileges required.'}, status=status.HTTP_403_FORBIDDEN)
 
-    # Dynamic data computation
-    now = timezone.now()
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    year_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    # User counts
-    active_sellers = DaalUser.objects.filter(
-        is_active=True,
-        role__in=['seller', 'both_sellerandbuyer']
-    ).count()
-
-    active_buyers = DaalUser.objects.filter(
-        is_active=True,
-        role__in=['buyer', 'both_sellerandbuyer']
-    ).count()
-
-    active_transporters = DaalUser.objects.filter(
-        is_active=True,
-        role='transporter'
-    ).count()
-
-    active_admins = DaalUser.objects.filter(
-        is_active=True
-    ).filter(
-        Q(is_admin=True) | Q(is_staff=True) | Q(is_superuser=True) | Q(role='admin')
-    ).distinct().count()
-
-    branches_count = BranchMaster.objects.filter(is_active=True).count()
-    listed_skus = Product.objects.filter(is_active=True).values('category_id').distinct().count()
-
-    # Contract and deal counts
-    active_contracts = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_SELLER_CONFIRMED,
-        is_active=True,
-    ).count()
-
-    finalized_deals_mtd = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_DEAL_CONFIRMED,
-        updated_at__gte=month_start,
-    ).count()
-
-    deals_in_negotiation = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_INTERESTED,
-        is_active=True,
-    ).count()
-
-    pending_dispatches = Product.objects.filter(
-        status=Product.STATUS_SOLD_PENDING_CONFIRMATION
-    ).count()
+    snapshot = get_admin_dashboard_snapshot()
+    users = snapshot[DashboardSnapshot.SECTION_USERS]
+    catalog = snapshot[DashboardSnapshot.SECTION_CATALOG]
+    deals = snapshot[DashboardSnapshot.SECTION_DEALS]
 
     # Financial calculations
-    sold_mtd_total = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_DEAL_CONFIRMED,
-        updated_at__gte=month_start,
-    ).aggregate(total=Sum('buyer_offered_amount')).get('total') or Decimal('0')
-
-    brokerage_rate = 4.0
+    sold_mtd_total = Decimal(deals['sold_mtd_total'])
+    brokerage_rate = BROKERAGE_RATE
     brokerage_earned_mtd = sold_mtd_total * Decimal(brokerage_rate / 100)
 
     # Dummy values for unimplemented features
@@ -2353,47 +2366,10 @@ def admin_dashboard_api(request):
     capacity_utilized = 78
 
     # Charts data
-    gtv_deals_data = []
-    for i in range(6, -1, -1):
-        month_date = (now - timezone.timedelta(days=30*i)).replace(day=1)
-        next_month = (month_date + timezone.timedelta(days=32)).replace(day=1)
-        month_gtv = ProductInterest.objects.filter(
-            status=ProductInterest.STATUS_DEAL_CONFIRMED,
-            updated_at__gte=month_date,
-            updated_at__lt=next_month
-        ).aggregate(total=Sum('buyer_offered_amount')).get('total') or Decimal('0')
-        month_deals = ProductInterest.objects.filter(
-            status=ProductInterest.STATUS_DEAL_CONFIRMED,
-            updated_at__gte=month_date,
-            updated_at__lt=next_month
-        ).count()
-        month_name = month_date.strftime('%b')
-        gtv_deals_data.append({
-            'month': month_name,
-            'gtv': float(month_gtv),
-            'deals': month_deals
-        })
+    gtv_deals_data = deals['gtv_deals']
 
-    pipeline_data = ProductInterest.objects.values('status').annotate(count=Count('id')).order_by('status')
-    pipeline_dict = {item['status']: item['count'] for item in pipeline_data}
     pipeline_stages = ['interested', 'seller_confirmed', 'buyer_confirmed', 'deal_confirmed']
-    pipeline_values = [pipeline_dict.get(status, 0) for status in pipeline_stages]
-
-    commodity_data = Product.objects.filter(is_active=True).values('category__category_name').annotate(
-        volume=Count('id')
-    ).order_by('-volume')[:5]
-    commodity_labels = [item['category__category_name'] for item in commodity_data]
-    commodity_volumes = [item['volume'] for item in commodity_data]
-
-    top_buyers_data = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_DEAL_CONFIRMED,
-        updated_at__gte=year_start,
-        buyer__is_active=True
-    ).values('buyer__first_name', 'buyer__last_name').annotate(
-        gtv=Coalesce(Sum('buyer_offered_amount'), Decimal(0), output_field=DecimalField())
-    ).order_by('-gtv')[:5]
-    top_buyers_labels = [f"{item['buyer__first_name']} {item['buyer__last_name']}" for item in top_buyers_data]
-    top_buyers_gtv = [float(item['gtv']) for item in top_buyers_data]
+    pipeline_values = [deals['pipeline'].get(status, 0) for status in pipeline_stages]
 
     transporter_sla_labels = ['TransCo Logistics', 'FastMove Carriers', 'RoadRunner Transport', 'Speedy Deliveries']
     transporter_sla_otd = [96, 92, 88, 85]
@@ -2403,7 +2379,9 @@ def admin_dashboard_api(request):
     payments_outstanding = [2800000, 2100000, 3200000, 1800000]
 
     user_distribution_labels = ['Sellers', 'Buyers', 'Transporters', 'Admins']
-    user_distribution_counts = [active_sellers, active_buyers, active_transporters, active_admins]
+    user_distribution_counts = [
+        users['active_sellers'], users['active_buyers'], users['active_transporters'], users['active_admins'],
+    ]
 
     # Branch performance (dummy)
     branch_performance = [
@@ -2453,84 +2431,27 @@ def admin_dashboard_api(request):
         }
     ]
 
-    # Recent activities
-    recent_interests = ProductInterest.objects.select_related(
-        'product', 'buyer', 'seller'
-    ).filter(
-        buyer__is_active=True,
-        seller__is_active=True
-    ).order_by('-updated_at')[:6]
-    recent_activities = []
-    for interest in recent_interests:
-        if interest.status == ProductInterest.STATUS_DEAL_CONFIRMED:
-            activity_type = 'trade'
-            icon = 'shopping-cart'
-            title = 'Deal Finalized'
-            desc = f"#{interest.id} • {interest.product.title[:20]}... • Buyer: {interest.buyer.first_name} {interest.buyer.last_name} • Seller: {interest.seller.first_name} {interest.seller.last_name}"
-        elif interest.status == ProductInterest.STATUS_SELLER_CONFIRMED:
-            activity_type = 'contract'
-            icon = 'file-signature'
-            title = 'Contract Signed'
-            desc = f"#{interest.id} • {interest.product.title[:20]}... • Brokerage: ₹{(interest.buyer_offered_amount or 0) * Decimal(0.04):,.0f}"
-        else:
-            activity_type = 'trade'
-            icon = 'balance-scale'
-            title = 'Negotiation Updated'
-            desc = f"#{interest.id} • {interest.product.title[:20]}... • Offer: ₹{(interest.buyer_offered_amount or 0):,.0f}/qtl"
-        recent_activities.append({
-            'type': activity_type,
-            'icon': icon,
-            'title': title,
-            'description': desc,
-            'time': interest.updated_at.strftime('%H:%M %d/%m')
-        })
-
-    # Recent contracts
-    recent_contracts_qs = ProductInterest.objects.select_related(
-        'product__category', 'buyer', 'seller'
-    ).filter(
-        status=ProductInterest.STATUS_DEAL_CONFIRMED,
-        buyer__is_active=True,
-        seller__is_active=True
-    ).order_by('-updated_at')[:5]
-    recent_contracts = []
-    for interest in recent_contracts_qs:
-        recent_contracts.append({
-            'id': f'#CNT-{interest.id}',
-            'seller': f"{interest.seller.first_name} {interest.seller.last_name}",
-            'buyer': f"{interest.buyer.first_name} {interest.buyer.last_name}",
-            'commodity': interest.product.category.category_name,
-            'quantity': '80 Qtl',
-            'rate': f"₹{(interest.buyer_offered_amount or 0):,.0f}/qtl",
-            'value': f"₹{(interest.buyer_offered_amount or 0):,.0f}",
-            'brokerage': f"₹{(interest.buyer_offered_amount or 0) * Decimal(0.04):,.0f}",
-            'payment_status': 'Fully Paid',
-            'delivery_status': 'Delivered',
-            'transporter': 'TransCo Logistics',
-            'branch': 'Nagpur'
-        })
-
     data = {
         'kpis': {
-            'active_contracts': active_contracts,
+            'active_contracts': deals['active_contracts'],
             'gtv_mtd': float(sold_mtd_total),
             'brokerage_earned_mtd': float(brokerage_earned_mtd),
             'brokerage_rate': brokerage_rate,
-            'pending_dispatches': pending_dispatches,
-            'active_sellers': active_sellers,
-            'listed_skus': listed_skus,
-            'active_buyers': active_buyers,
-            'final_deals_mtd': finalized_deals_mtd,
+            'pending_dispatches': catalog['pending_dispatches'],
+            'active_sellers': users['active_sellers'],
+            'listed_skus': catalog['listed_skus'],
+            'active_buyers': users['active_buyers'],
+            'final_deals_mtd': deals['finalized_deals_mtd'],
             'open_complaints': open_complaints,
             'otd_percent': on_time_delivery_percent,
             'avg_transit_days': avg_transit_days,
             'payments_overdue': payments_overdue,
             'at_risk_amount': at_risk_amount,
-            'active_transporters': active_transporters,
+            'active_transporters': users['active_transporters'],
             'capacity_utilized': capacity_utilized,
-            'branches': branches_count,
-            'admins_active': active_admins,
-            'deals_in_negotiation': deals_in_negotiation,
+            'branches': catalog['branches'],
+            'admins_active': users['active_admins'],
+            'deals_in_negotiation': deals['deals_in_negotiation'],
             'avg_ttc_days': 3.8
         },
         'charts': {
@@ -2544,12 +2465,12 @@ def admin_dashboard_api(request):
                 'values': pipeline_values
             },
             'commodity_mix': {
-                'labels': commodity_labels,
-                'volumes': commodity_volumes
+                'labels': catalog['commodity_mix']['labels'],
+                'volumes': catalog['commodity_mix']['volumes']
             },
             'top_buyers': {
-                'labels': top_buyers_labels,
-                'gtv_values': top_buyers_gtv
+                'labels': deals['top_buyers']['labels'],
+                'gtv_values': deals['top_buyers']['gtv_values']
             },
             'transporter_sla': {
                 'labels': transporter_sla_labels,
@@ -2566,8 +2487,8 @@ def admin_dashboard_api(request):
             }
         },
         'branch_performance': branch_performance,
-        'recent_activities': recent_activities,
-        'recent_contracts': recent_contracts
+        'recent_activities': deals['recent_activities'],
+        'recent_contracts': deals['recent_contracts']
     }
 
     return Response(data, status=status.HTTP_200_OK)
@@ -2584,31 +2505,71 @@ def buyer_dashboard_api(request):
         return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
     
     now = timezone.now()
+    version = DashboardSnapshot.section_version(DashboardSnapshot.buyer_section(user.id))
+    cache_key = f"buyer_dashboard:{user.id}:{version}:{timezone.localdate(now).isoformat()}"
+    data = cache.get(cache_key)
+    if data is None:
+        data = build_buyer_dashboard(user, now)
+        cache.set(cache_key, data, BUYER_DASHBOARD_CACHE_TTL_SECONDS)
+    return Response(data)
+
+
+BUYER_DASHBOARD_CACHE_TTL_SECONDS = 15 * 60
+BUYER_CONTRACT_ROW_FIELDS = (
+    'contract_id', 'deal_amount', 'deal_quantity', 'quantity_unit', 'confirmed_at',
+    'status', 'loading_to', 'seller__username', 'product__title', 'product__category__category_name',
+)
+
+
+def build_buyer_dashboard(user, now):
+    """
+    Buyer dashboard payload. Contract KPIs, trend windows and charts are all
+    computed from one fetch of the buyer's contract rows.
+    """
     month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    # Get user's interests/contracts
+    last_month_start = (month_start - timezone.timedelta(days=1)).replace(day=1)
+
     user_interests = ProductInterest.objects.filter(buyer=user)
-    user_contracts = Contract.objects.filter(buyer=user)
-    user_products = ProductInterest.objects.filter(buyer=user).select_related('product')
-    
+    contract_rows = list(
+        Contract.objects.filter(buyer=user).order_by('-confirmed_at').values(*BUYER_CONTRACT_ROW_FIELDS)
+    )
+    interest_status_counts = dict(
+        user_interests.order_by().values_list('status').annotate(count=Count('id'))
+    )
+
     # Calculate KPIs
-    total_spent = user_contracts.filter(
-        status='active'
-    ).aggregate(total=Sum('deal_amount'))['total'] or 0
-    
-    spent_mtd = user_contracts.filter(
-        status='active',
-        confirmed_at__gte=month_start
-    ).aggregate(total=Sum('deal_amount'))['total'] or 0
-    
-    # Get last month's spent for comparison
-    last_month_start = (month_start - timezone.timedelta(days=1)).replace(day=1)
-    spent_last_month = user_contracts.filter(
-        status='active',
-        confirmed_at__gte=last_month_start,
-        confirmed_at__lt=month_start
-    ).aggregate(total=Sum('deal_amount'))['total'] or 0
-    
+    spent_mtd = Decimal('0')
+    spent_last_month = Decimal('0')
+    active_contracts = 0
+    active_amount = Decimal('0')
+    in_transit = 0
+    signed_mtd = 0
+    total_all = Decimal('0')
+    last_month_total = Decimal('0')
+    last_month_count = 0
+    for row in contract_rows:
+        amount = row['deal_amount'] or Decimal('0')
+        confirmed_at = row['confirmed_at']
+        is_active = row['status'] == Contract.STATUS_ACTIVE
+        this_month = confirmed_at is not None and confirmed_at >= month_start
+        last_month = confirmed_at is not None and last_month_start <= confirmed_at < month_start
+
+        total_all += amount
+        if this_month:
+            signed_mtd += 1
+        if last_month:
+            last_month_total += amount
+            last_month_count += 1
+        if is_active:
+            active_contracts += 1
+            active_amount += amount
+            if row['loading_to'] is not None:
+                in_transit += 1
+            if this_month:
+                spent_mtd += amount
+            if last_month:
+                spent_last_month += amount
+
     if spent_last_month > 0:
         spent_delta = ((spent_mtd - spent_last_month) / spent_last_month) * 100
         spent_delta_str = f"{'+' if spent_delta >= 0 else ''}{spent_delta:.1f}% vs last month"
@@ -2616,58 +2577,30 @@ def buyer_dashboard_api(request):
         spent_delta_str = "New this month"
     
     # Active orders (interests that are not rejected)
-    active_orders = user_interests.filter(
-        status__in=['interested', 'seller_confirmed']
-    ).count()
-    
-    open_rfq = user_interests.filter(status='interested').count()
-    
-    # Contracts
-    active_contracts = user_contracts.filter(status='active').count()
-    signed_mtd = user_contracts.filter(
-        confirmed_at__gte=month_start
-    ).count()
-    
-    # In transit (from contracts)
-    in_transit = user_contracts.filter(
-        status='active',
-        loading_to__isnull=False
-    ).count()
+    open_rfq = interest_status_counts.get('interested', 0)
+    active_orders = open_rfq + interest_status_counts.get('seller_confirmed', 0)
     
     # Payment pending (simplified - you can enhance with actual payment model)
-    payment_pending = user_contracts.filter(status='active').count() // 2
-    pending_amount = user_contracts.filter(
-        status='active'
-    ).aggregate(total=Sum('deal_amount'))['total'] or 0
-    pending_amount = pending_amount * 0.3  # Assume 30% pending
+    payment_pending = active_contracts // 2
+    pending_amount = active_amount * Decimal('0.3')  # Assume 30% pending
     
     # Issues (dummy for now - implement actual complaint model)
     issues = 0
     open_tickets = 0
     
     # Top supplier
-    top_supplier_data = user_contracts.values('seller__username').annotate(
-        total=Sum('deal_amount')
-    ).order_by('-total').first()
-    
-    if top_supplier_data:
-        top_supplier = top_supplier_data['seller__username']
-        total_all = user_contracts.aggregate(total=Sum('deal_amount'))['total'] or 1
-        top_share = (top_supplier_data['total'] / total_all) * 100
+    suppliers = get_supplier_spend_data(contract_rows)
+    if suppliers['labels']:
+        top_supplier = suppliers['labels'][0]
+        top_share = (suppliers['totals'][0] / (total_all or 1)) * 100
         top_share_str = f"{top_share:.1f}% of spend"
     else:
         top_supplier = "—"
         top_share_str = "—"
     
     # Avg purchase price
-    avg_price = user_contracts.aggregate(avg=Avg('deal_amount'))['avg'] or 0
-    
-    # Get last month's avg price
-    last_month_contracts = user_contracts.filter(
-        confirmed_at__gte=last_month_start,
-        confirmed_at__lt=month_start
-    )
-    last_month_avg = last_month_contracts.aggregate(avg=Avg('deal_amount'))['avg'] or 0
+    avg_price = total_all / len(contract_rows) if contract_rows else 0
+    last_month_avg = last_month_total / last_month_count if last_month_count else 0
     
     if last_month_avg > 0:
         price_delta = ((avg_price - last_month_avg) / last_month_avg) * 100
@@ -2676,7 +2609,8 @@ def buyer_dashboard_api(request):
         price_delta_str = "—"
     
     # Prepare response data
-    data = {
+    trend_rows = [(row['confirmed_at'], row['deal_amount']) for row in contract_rows]
+    return {
         'deal_products': [],
         'kpis': {
             'spent': f"₹{spent_mtd:,.2f}",
@@ -2698,146 +2632,90 @@ def buyer_dashboard_api(request):
         },
         'charts': {
             'trend': {
-                '7D': generate_trend_data(user_contracts, days=7),
-                '1M': generate_trend_data(user_contracts, days=30),
-                '3M': generate_trend_data(user_contracts, days=90),
-                '1Y': generate_trend_data(user_contracts, days=365),
+                '7D': generate_trend_data(trend_rows, days=7, now=now),
+                '1M': generate_trend_data(trend_rows, days=30, now=now),
+                '3M': generate_trend_data(trend_rows, days=90, now=now),
+                '1Y': generate_trend_data(trend_rows, days=365, now=now),
             },
-            'suppliers': get_supplier_spend_data(user_contracts),
-            'commodity_mix': get_commodity_mix_data(user_contracts),
-            'order_status': get_order_status_data(user_interests),
-            'transport': get_transport_status_data(user_contracts),
+            'suppliers': {'labels': suppliers['labels'], 'spend': suppliers['spend']},
+            'commodity_mix': get_commodity_mix_data(contract_rows),
+            'order_status': get_order_status_data(interest_status_counts),
+            'transport': get_transport_status_data(contract_rows),
         },
         'recent_rfqs': get_recent_rfqs(user_interests),
-        'recent_orders': get_recent_orders(user_contracts),
-        'transport_tracking': get_transport_tracking(user_contracts),
+        'recent_orders': get_recent_orders(contract_rows),
+        'transport_tracking': get_transport_tracking(contract_rows),
     }
-    
-    return Response(data)
 
 
-def generate_trend_data(contracts, days):
-    """Generate trend data for charts"""
-    end_date = timezone.now()
-    start_date = end_date - timezone.timedelta(days=days)
-    
+TREND_GRANULARITY_LABELS = {
+    'day': '%a',
+    'week': 'Wk %W',
+    'month': '%b',
+}
+
+
+def generate_trend_data(rows, days, now=None):
+    """Generate trend data for charts from (confirmed_at, deal_amount) pairs"""
     if days <= 7:
-        # Daily grouping
-        from django.db.models.functions import TruncDay
-        data = contracts.filter(
-            confirmed_at__gte=start_date
-        ).annotate(
-            period=TruncDay('confirmed_at')
-        ).values('period').annotate(
-            spend=Sum('deal_amount'),
-            orders=Count('id')
-        ).order_by('period')
-        
-        labels = []
-        spend = []
-        orders = []
-        
-        for item in data:
-            if item['period']:
-                labels.append(item['period'].strftime('%a'))
-                spend.append(float(item['spend'] or 0) / 100000)  # Convert to lakhs
-                orders.append(item['orders'])
-        
-        return {'labels': labels, 'spend': spend, 'orders': orders}
-    
+        granularity, periods = 'day', days
     elif days <= 30:
-        # Weekly grouping
-        from django.db.models.functions import TruncWeek
-        data = contracts.filter(
-            confirmed_at__gte=start_date
-        ).annotate(
-            period=TruncWeek('confirmed_at')
-        ).values('period').annotate(
-            spend=Sum('deal_amount'),
-            orders=Count('id')
-        ).order_by('period')
-
-        labels = []
-        spend = []
-        orders = []
-        for item in data:
-            if item['period']:
-                labels.append(item['period'].strftime('Wk %W'))
-                spend.append(float(item['spend'] or 0) / 100000)
-                orders.append(item['orders'])
-        return {'labels': labels, 'spend': spend, 'orders': orders}
+        granularity, periods = 'week', round(days / 7)
     else:
-        # Monthly grouping
-        from django.db.models.functions import TruncMonth
-        data = contracts.filter(
-            confirmed_at__gte=start_date
-        ).annotate(
-            period=TruncMonth('confirmed_at')
-        ).values('period').annotate(
-            spend=Sum('deal_amount'),
-            orders=Count('id')
-        ).order_by('period')
-        
-        labels = []
-        spend = []
-        orders = []
-        
-        for item in data:
-            if item['period']:
-                labels.append(item['period'].strftime('%b'))
-                spend.append(float(item['spend'] or 0) / 100000)
-                orders.append(item['orders'])
-        
-        return {'labels': labels, 'spend': spend, 'orders': orders}
+        granularity, periods = 'month', round(days / 30.44)
+
+    series = time_series_from_rows(rows, max(1, periods), granularity, now=now)
+    label_format = TREND_GRANULARITY_LABELS[granularity]
+    return {
+        'labels': [bucket['period'].strftime(label_format) for bucket in series],
+        'spend': [float(bucket['total']) / 100000 for bucket in series],  # Convert to lakhs
+        'orders': [bucket['count'] for bucket in series],
+    }
 
 
-def get_supplier_spend_data(contracts):
+def get_supplier_spend_data(contract_rows):
     """Get supplier spend distribution"""
-    data = contracts.values('seller__username').annotate(
-        total=Sum('deal_amount')
-    ).order_by('-total')[:5]
+    totals = {}
+    for row in contract_rows:
+        seller = row['seller__username']
+        totals[seller] = totals.get(seller, Decimal('0')) + (row['deal_amount'] or Decimal('0'))
+    top = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:5]
     
     return {
-        'labels': [item['seller__username'] for item in data],
-        'spend': [float(item['total'] or 0) / 100000 for item in data]
+        'labels': [seller for seller, _ in top],
+        'totals': [total for _, total in top],
+        'spend': [float(total) / 100000 for _, total in top]
     }
 
 
-def get_commodity_mix_data(contracts):
+def get_commodity_mix_data(contract_rows):
     """Get commodity mix by volume"""
-    from django.db.models import Sum
-    
-    data = contracts.values('product__category__category_name').annotate(
-        volume=Sum('deal_quantity')
-    ).order_by('-volume')[:5]
+    volumes = {}
+    for row in contract_rows:
+        name = row['product__category__category_name']
+        volumes[name] = volumes.get(name, Decimal('0')) + (row['deal_quantity'] or Decimal('0'))
+    top = sorted(volumes.items(), key=lambda item: item[1], reverse=True)[:5]
     
     return {
-        'labels': [item['product__category__category_name'] or 'Other' for item in data],
-        'volume': [float(item['volume'] or 0) for item in data]
+        'labels': [name or 'Other' for name, _ in top],
+        'volume': [float(volume) for _, volume in top]
     }
 
 
-def get_order_status_data(interests):
+def get_order_status_data(status_counts):
     """Get order status distribution"""
-    status_counts = {
-        'interested': interests.filter(status='interested').count(),
-        'seller_confirmed': interests.filter(status='seller_confirmed').count(),
-        'deal_confirmed': interests.filter(status='deal_confirmed').count(),
-        'rejected': interests.filter(status='rejected').count(),
-    }
-    
     return {
         'labels': ['Interested', 'Seller Accepted', 'Deal Confirmed', 'Rejected'],
         'counts': [
-            status_counts['interested'],
-            status_counts['seller_confirmed'],
-            status_counts['deal_confirmed'],
-            status_counts['rejected'],
+            status_counts.get('interested', 0),
+            status_counts.get('seller_confirmed', 0),
+            status_counts.get('deal_confirmed', 0),
+            status_counts.get('rejected', 0),
         ]
     }
 
 
-def get_transport_status_data(contracts):
+def get_transport_status_data(contract_rows):
     """Get transport status distribution"""
     # Dummy data - implement actual transport model
     return {
@@ -2882,32 +2760,29 @@ def get_recent_rfqs(interests):
     return data
 
 
-def get_recent_orders(contracts):
+def get_recent_orders(contract_rows):
     """Get recent orders/contracts"""
-    recent = contracts.select_related(
-        'product', 'seller'
-    ).order_by('-confirmed_at')[:5]
-    
     data = []
-    for contract in recent:
+    for contract in contract_rows[:5]:
         # Dummy payment and transport status - implement actual models
+        is_active = contract['status'] == Contract.STATUS_ACTIVE
         data.append({
-            'id': contract.contract_id,
-            'seller': contract.seller.username,
-            'commodity': contract.product.title,
-            'quantity': f"{contract.deal_quantity} {contract.quantity_unit}",
-            'value': float(contract.deal_amount),
-            'payment_status': 'Paid' if contract.status == 'active' else 'Pending',
-            'payment_class': 'ok' if contract.status == 'active' else 'bad',
-            'transport_status': 'In Transit' if contract.loading_to else 'Delivered',
-            'transport_class': 'info' if contract.loading_to else 'ok',
+            'id': contract['contract_id'],
+            'seller': contract['seller__username'],
+            'commodity': contract['product__title'],
+            'quantity': f"{contract['deal_quantity']} {contract['quantity_unit']}",
+            'value': float(contract['deal_amount']),
+            'payment_status': 'Paid' if is_active else 'Pending',
+            'payment_class': 'ok' if is_active else 'bad',
+            'transport_status': 'In Transit' if contract['loading_to'] else 'Delivered',
+            'transport_class': 'info' if contract['loading_to'] else 'ok',
             'eta': '—',
         })
     
     return data
 
 
-def get_transport_tracking(contracts):
+def get_transport_tracking(contract_rows):
     """Get transport tracking data"""
     # Dummy data - implement actual transport model
     return [
@@ -3006,19 +2881,12 @@ def _apply_mobile_contract_filters(request, queryset):
 @permission_classes([IsAuthenticated])
 def mobile_contract_list_api(request):
     contracts_qs = _apply_mobile_contract_filters(request, _contracts_qs_for_mobile(request.user))
-    page_obj, pagination = _paginate_queryset(request, contracts_qs, page_size=15)
-    serializer = ContractSerializer(page_obj.object_list, many=True, context={'request': request})
+    contracts, pagination = _paginate_list(request, contracts_qs, ('confirmed_at', 'id'), page_size=15)
+    serializer = ContractSerializer(contracts, many=True, context={'request': request})
     return Response({
         'success': True,
         'results': serializer.data,
-        'pagination': {
-            'page': page_obj.number,
-            'num_pages': page_obj.paginator.num_pages,
-            'count': page_obj.paginator.count,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-            'window': pagination['window'],
-        },
+        'pagination': pagination,
     }, status=status.HTTP_200_OK)
 
 
@@ -18,6 +18,7 @@ class CategoryMasterAdmin(admin.ModelAdmin):
     search_fields = ('category_name',)
     ordering = ('path', 'category_name')
     raw_id_fields = ('parent',)
+    readonly_fields = ('level', 'path', 'full_path', 'root', 'ancestor_ids')
     
 admin.site.register(TagMaster)
 admin.site.register(BrandMaster)
@@ -27,3 +28,68 @@ admin.site.register(RolePermission)
 admin.site.register(ProductInterest)
 admin.site.register(BranchMaster)
 
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'export_type', 'file_format', 'status', 'requested_by', 'processed_rows', 'total_rows', 'created_at', 'finished_at')
+    list_filter = ('export_type', 'status')
+    raw_id_fields = ('requested_by',)
+    readonly_fields = ('total_rows', 'processed_rows', 'started_at', 'finished_at', 'error_message')
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'category', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'category')
+    search_fields = ('subject',)
+    readonly_fields = ('attempts', 'last_error', 'sent_at')
+
+    def get_exclude(self, request, obj=None):
+        # Sensitive rows (temporary passwords) never expose or accept a body here.
+        if obj is not None and obj.sensitive:
+            return ('body',)
+        return super().get_exclude(request, obj)
+
+
+@admin.register(AdminDigestEntry)
+class AdminDigestEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'category', 'subject', 'created_at', 'digested_at')
+    list_filter = ('category',)
+    readonly_fields = ('batch', 'digested_at')
+
+
+@admin.register(DailySequence)
+class DailySequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'day', 'last_value')
+    list_filter = ('name',)
+    ordering = ('-day', 'name')
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'product', 'interest', 'quantity', 'status', 'expires_at', 'created_at')
+    list_filter = ('status',)
+    raw_id_fields = ('product', 'interest')
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'scope', 'key', 'status_code', 'created_at', 'expires_at')
+    list_filter = ('scope',)
+    search_fields = ('key',)
+    exclude = ('response_body',)
+
+
+@admin.register(LocationArea)
+class LocationAreaAdmin(admin.ModelAdmin):
+    list_display = ('state', 'city', 'area', 'pincode', 'source')
+    list_filter = ('source', 'state')
+    search_fields = ('city', 'area', 'pincode')
+
+
+@admin.register(CacheVersion)
+class CacheVersionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'version', 'updated_at')
+    search_fields = ('name',)
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,201 @@
+"""
+Admin dashboard KPI engine shared by dashboard_view and Api.views.admin_dashboard_api.
+
+Numbers are stored in a single DashboardSnapshot row split into sections.
+A section is recomputed only when its version was bumped, the month rolled
+over, or it is older than DASHBOARD_SECTION_MAX_AGE. Models bump a version only
+when a field the section reads (their DASHBOARD_FIELDS) changes; other edits,
+such as renames and remarks, show up within the max age.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import BranchMaster, DaalUser, DashboardSnapshot, Product, ProductInterest
+from .utils import time_series
+
+DASHBOARD_SECTION_MAX_AGE = timedelta(minutes=15)
+BROKERAGE_RATE = 4.0
+
+
+def _build_users_section(now):
+    active_users = DaalUser.objects.filter(is_active=True)
+    return {
+        'active_sellers': active_users.filter(role__in=['seller', 'both_sellerandbuyer']).count(),
+        'active_buyers': active_users.filter(role__in=['buyer', 'both_sellerandbuyer']).count(),
+        'active_transporters': active_users.filter(role='transporter').count(),
+        'active_admins': active_users.filter(
+            Q(is_admin=True) | Q(is_staff=True) | Q(is_superuser=True) | Q(role='admin')
+        ).distinct().count(),
+    }
+
+
+def _build_catalog_section(now):
+    commodity_data = Product.objects.filter(is_active=True).values('category__category_name').annotate(
+        volume=Count('id')
+    ).order_by('-volume')[:5]
+    return {
+        'branches': BranchMaster.objects.filter(is_active=True).count(),
+        'listed_skus': Product.objects.filter(is_active=True).values('category_id').distinct().count(),
+        'pending_dispatches': Product.objects.filter(status=Product.STATUS_SOLD_PENDING_CONFIRMATION).count(),
+        'commodity_mix': {
+            'labels': [item['category__category_name'] for item in commodity_data],
+            'volumes': [item['volume'] for item in commodity_data],
+        },
+    }
+
+
+def _recent_activities():
+    recent_interests = ProductInterest.objects.select_related(
+        'product', 'buyer', 'seller'
+    ).filter(
+        buyer__is_active=True,
+        seller__is_active=True
+    ).order_by('-updated_at')[:6]
+    recent_activities = []
+    for interest in recent_interests:
+        if interest.status == ProductInterest.STATUS_DEAL_CONFIRMED:
+            activity_type = 'trade'
+            icon = 'shopping-cart'
+            title = 'Deal Finalized'
+            desc = f"#{interest.id} • {interest.product.title[:20]}... • Buyer: {interest.buyer.first_name} {interest.buyer.last_name} • Seller: {interest.seller.first_name} {interest.seller.last_name}"
+        elif interest.status == ProductInterest.STATUS_SELLER_CONFIRMED:
+            activity_type = 'contract'
+            icon = 'file-signature'
+            title = 'Contract Signed'
+            desc = f"#{interest.id} • {interest.product.title[:20]}... • Brokerage: ₹{(interest.buyer_offered_amount or 0) * Decimal(0.04):,.0f}"
+        else:
+            activity_type = 'trade'
+            icon = 'balance-scale'
+            title = 'Negotiation Updated'
+            desc = f"#{interest.id} • {interest.product.title[:20]}... • Offer: ₹{(interest.buyer_offered_amount or 0):,.0f}/qtl"
+        recent_activities.append({
+            'type': activity_type,
+            'icon': icon,
+            'title': title,
+            'description': desc,
+            'time': interest.updated_at.strftime('%H:%M %d/%m')
+        })
+    return recent_activities
+
+
+def _recent_contracts():
+    recent_contracts_qs = ProductInterest.objects.select_related(
+        'product__category', 'buyer', 'seller'
+    ).filter(
+        status=ProductInterest.STATUS_DEAL_CONFIRMED,
+        buyer__is_active=True,
+        seller__is_active=True
+    ).order_by('-updated_at')[:5]
+    recent_contracts = []
+    for interest in recent_contracts_qs:
+        recent_contracts.append({
+            'id': f'#CNT-{interest.id}',
+            'seller': f"{interest.seller.first_name} {interest.seller.last_name}",
+            'buyer': f"{interest.buyer.first_name} {interest.buyer.last_name}",
+            'commodity': interest.product.category.category_name,
+            'quantity': '80 Qtl',
+            'rate': f"₹{(interest.buyer_offered_amount or 0):,.0f}/qtl",
+            'value': f"₹{(interest.buyer_offered_amount or 0):,.0f}",
+            'brokerage': f"₹{(interest.buyer_offered_amount or 0) * Decimal(0.04):,.0f}",
+            'payment_status': 'Fully Paid',
+            'delivery_status': 'Delivered',
+            'transporter': 'TransCo Logistics',
+            'branch': 'Nagpur'
+        })
+    return recent_contracts
+
+
+def _build_deals_section(now):
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    year_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    confirmed = ProductInterest.objects.filter(status=ProductInterest.STATUS_DEAL_CONFIRMED)
+
+    month_totals = confirmed.filter(updated_at__gte=month_start).aggregate(
+        total=Sum('buyer_offered_amount'),
+        deals=Count('id'),
+    )
+    sold_mtd_total = month_totals['total'] or Decimal('0')
+
+    gtv_deals = [{
+        'month': bucket['period'].strftime('%b'),
+        'gtv': float(bucket['total']),
+        'deals': bucket['count'],
+    } for bucket in time_series(confirmed, 'updated_at', 'buyer_offered_amount', periods=7, now=now)]
+
+    pipeline_data = ProductInterest.objects.values('status').annotate(count=Count('id')).order_by('status')
+
+    top_buyers_data = confirmed.filter(
+        updated_at__gte=year_start,
+        buyer__is_active=True
+    ).values('buyer__first_name', 'buyer__last_name').annotate(
+        gtv=Coalesce(Sum('buyer_offered_amount'), Decimal(0), output_field=DecimalField())
+    ).order_by('-gtv')[:5]
+
+    active_interests = ProductInterest.objects.filter(is_active=True)
+    return {
+        'active_contracts': active_interests.filter(status=ProductInterest.STATUS_SELLER_CONFIRMED).count(),
+        'deals_in_negotiation': active_interests.filter(status=ProductInterest.STATUS_INTERESTED).count(),
+        'finalized_deals_mtd': month_totals['deals'],
+        'sold_mtd_total': str(sold_mtd_total),
+        'gtv_deals': gtv_deals,
+        'pipeline': {item['status']: item['count'] for item in pipeline_data},
+        'top_buyers': {
+            'labels': [f"{item['buyer__first_name']} {item['buyer__last_name']}" for item in top_buyers_data],
+            'gtv_values': [float(item['gtv']) for item in top_buyers_data],
+        },
+        'recent_activities': _recent_activities(),
+        'recent_contracts': _recent_contracts(),
+    }
+
+
+SECTION_BUILDERS = {
+    DashboardSnapshot.SECTION_USERS: _build_users_section,
+    DashboardSnapshot.SECTION_CATALOG: _build_catalog_section,
+    DashboardSnapshot.SECTION_DEALS: _build_deals_section,
+}
+
+
+def _is_section_stale(state, version, period, now):
+    if not state or state.get('version') != version or state.get('period') != period:
+        return True
+    try:
+        computed_at = datetime.fromisoformat(state['computed_at'])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return now - computed_at > DASHBOARD_SECTION_MAX_AGE
+
+
+def get_admin_dashboard_snapshot(force=False):
+    """
+    Return {'users': {...}, 'catalog': {...}, 'deals': {...}} for the admin dashboard.
+    Reads one snapshot row and recomputes only the sections that went stale.
+    """
+    now = timezone.now()
+    period = now.strftime('%Y-%m')
+    snapshot, _ = DashboardSnapshot.objects.get_or_create(scope=DashboardSnapshot.SCOPE_ADMIN)
+    versions = DashboardSnapshot.section_versions()
+
+    stale_sections = [
+        section for section in SECTION_BUILDERS
+        if force or section not in snapshot.data
+        or _is_section_stale(snapshot.section_state.get(section), versions[section], period, now)
+    ]
+    if stale_sections:
+        for section in stale_sections:
+            snapshot.data[section] = SECTION_BUILDERS[section](now)
+            snapshot.section_state[section] = {
+                'version': versions[section],
+                'period': period,
+                'computed_at': now.isoformat(),
+            }
+        snapshot.computed_at = now
+        snapshot.save(update_fields=['data', 'section_state', 'computed_at', 'updated_at'])
+    return snapshot.data
+
+
+def rebuild_admin_dashboard_snapshot():
+    return get_admin_dashboard_snapshot(force=True)
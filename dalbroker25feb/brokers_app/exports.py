@@ -0,0 +1,283 @@
+"""
+CSV export helpers shared by the contracts export view and background export jobs.
+
+Rows are read through a values_list() projection in keyset batches of
+CSV_EXPORT_CHUNK_SIZE (see utils.iter_keyset) and encoded line by line, so an
+export holds one batch, not the whole result set or file, in memory.
+"""
+import csv
+import gzip
+import logging
+import os
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BrandMaster, DaalUser, ExportJob
+from .scoping import (
+    _actor_unique_id_from_pk,
+    _apply_contract_list_filters,
+    _contracts_for_user,
+    _is_admin_user,
+    _is_super_admin_user,
+    _offers_for_user,
+    _products_for_user,
+)
+from .utils import iter_keyset
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PROGRESS_EVERY = 1000
+EXPORT_JOB_STALE_RUNNING = timedelta(minutes=15)
+ADMIN_ONLY_EXPORT_TYPES = {ExportJob.TYPE_USERS, ExportJob.TYPE_BRANDS}
+
+CSV_EXPORT_CHUNK_SIZE = 2000
+
+CONTRACT_EXPORT_HEADER = [
+    'Contract ID', 'Product', 'Buyer', 'Seller', 'Deal Amount',
+    'Quantity', 'Loading From', 'Loading To', 'Confirmed Date', 'Status',
+]
+CONTRACT_EXPORT_FIELDS = (
+    'contract_id', 'product__title', 'buyer__username', 'seller__username',
+    'deal_amount', 'amount_unit', 'deal_quantity', 'quantity_unit',
+    'loading_from', 'loading_to', 'confirmed_at', 'status',
+)
+
+
+class _EchoBuffer:
+    """File-like object whose write() hands the formatted line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_contract_export_rows(contracts, chunk_size=CSV_EXPORT_CHUNK_SIZE):
+    rows = iter_keyset(contracts, ('confirmed_at', 'id'), CONTRACT_EXPORT_FIELDS, chunk_size)
+    for (contract_id, product_title, buyer_name, seller_name, deal_amount, amount_unit,
+         deal_quantity, quantity_unit, loading_from, loading_to, confirmed_at, status) in rows:
+        yield [
+            contract_id,
+            product_title,
+            buyer_name,
+            seller_name,
+            f"{deal_amount}/{amount_unit}",
+            f"{deal_quantity} {quantity_unit}",
+            loading_from,
+            loading_to,
+            confirmed_at.strftime('%Y-%m-%d %H:%M'),
+            status,
+        ]
+
+
+def iter_csv_lines(header, rows):
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_encoded(lines, encoding='utf-8', batch_size=256):
+    """Encode lines and batch them into larger byte chunks for the response."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield ''.join(batch).encode(encoding)
+            batch = []
+    if batch:
+        yield ''.join(batch).encode(encoding)
+
+
+def iter_gzip(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d %H:%M')
+    return value
+
+
+def _iter_values_rows(queryset, fields, ordering, chunk_size=CSV_EXPORT_CHUNK_SIZE):
+    for row in iter_keyset(queryset, ordering, fields, chunk_size):
+        yield [_csv_value(value) for value in row]
+
+
+def _contracts_export(user, filters):
+    contracts = _apply_contract_list_filters(filters, _contracts_for_user(user))
+    return contracts, CONTRACT_EXPORT_HEADER, iter_contract_export_rows(contracts)
+
+
+def _offers_export(user, filters):
+    interests = _offers_for_user(user)
+    if filters.get('status'):
+        interests = interests.filter(status=filters['status'])
+    show_names = _is_super_admin_user(user)
+    header = [
+        'Transaction ID', 'Product ID', 'Product', 'Buyer', 'Seller', 'Offered Amount',
+        'Required Quantity', 'Status', 'Active', 'Created', 'Updated',
+    ]
+    fields = (
+        'transaction_id', 'product_id', 'product__title', 'buyer_id', 'buyer__username',
+        'seller_id', 'seller__username', 'buyer_offered_amount', 'buyer_required_quantity',
+        'status', 'is_active', 'created_at', 'updated_at',
+    )
+
+    def rows():
+        for (transaction_id, product_id, product_title, buyer_id, buyer_name, seller_id, seller_name,
+             offered_amount, required_quantity, status, is_active, created_at, updated_at) in _iter_values_rows(
+                interests, fields, ('created_at', 'id')):
+            yield [
+                transaction_id, product_id, product_title,
+                buyer_name if show_names else _actor_unique_id_from_pk(buyer_id),
+                seller_name if show_names else _actor_unique_id_from_pk(seller_id),
+                offered_amount, required_quantity, status, is_active, created_at, updated_at,
+            ]
+
+    return interests, header, rows()
+
+
+def _products_export(user, filters):
+    products = _products_for_user(user).prefetch_related(None)
+    if filters.get('search'):
+        products = products.filter(title__icontains=filters['search'])
+    if str(filters.get('category') or '').isdigit():
+        products = products.filter(category_id=int(filters['category']))
+    if str(filters.get('seller') or '').isdigit():
+        products = products.filter(seller_id=int(filters['seller']))
+    header = [
+        'Product ID', 'Title', 'Category', 'Brand', 'Seller', 'Amount', 'Amount Unit',
+        'Original Quantity', 'Remaining Quantity', 'Quantity Unit', 'Loading Location',
+        'Status', 'Deal Status', 'Active', 'Pending Interests', 'Created',
+    ]
+    fields = (
+        'id', 'title', 'category__category_name', 'brand__brand_name', 'seller__username',
+        'amount', 'amount_unit', 'original_quantity', 'remaining_quantity', 'quantity_unit',
+        'loading_location', 'status', 'deal_status', 'is_active', 'pending_interest_count', 'created_at',
+    )
+    return products, header, _iter_values_rows(products, fields, ('created_at', 'id'))
+
+
+def _users_export(user, filters):
+    users = DaalUser.objects.all()
+    for key in ('role', 'kyc_status', 'account_status'):
+        if filters.get(key):
+            users = users.filter(**{key: filters[key]})
+    header = [
+        'User ID', 'Username', 'First Name', 'Last Name', 'Email', 'Mobile', 'Role',
+        'PAN', 'GST', 'KYC Status', 'KYC Submitted', 'KYC Approved', 'Account Status', 'Active', 'Joined',
+    ]
+    fields = (
+        'id', 'username', 'first_name', 'last_name', 'email', 'mobile', 'role',
+        'pan_number', 'gst_number', 'kyc_status', 'kyc_submitted_at', 'kyc_approved_at',
+        'account_status', 'is_active', 'date_joined',
+    )
+    return users, header, _iter_values_rows(users, fields, ('date_joined', 'id'))
+
+
+def _brands_export(user, filters):
+    brands = BrandMaster.objects.all()
+    if filters.get('status'):
+        brands = brands.filter(status=filters['status'])
+    if filters.get('search'):
+        brands = brands.filter(brand_name__icontains=filters['search'])
+    header = ['Brand ID', 'Brand Name', 'Status', 'Created By', 'Created', 'Updated']
+    fields = ('brand_unique_id', 'brand_name', 'status', 'created_by__username', 'created_at', 'updated_at')
+    return brands, header, _iter_values_rows(brands, fields, ('created_at', 'id'))
+
+
+EXPORT_BUILDERS = {
+    ExportJob.TYPE_CONTRACTS: _contracts_export,
+    ExportJob.TYPE_OFFERS: _offers_export,
+    ExportJob.TYPE_PRODUCTS: _products_export,
+    ExportJob.TYPE_USERS: _users_export,
+    ExportJob.TYPE_BRANDS: _brands_export,
+}
+
+
+def _open_export_file(path, file_format):
+    if file_format == ExportJob.FORMAT_CSV_GZ:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def run_export_job(job):
+    """Write one claimed job to MEDIA_ROOT/exports/, recording progress on the row as it goes."""
+    # Roles can change between queueing and running; re-check the admin-only types here.
+    if job.export_type in ADMIN_ONLY_EXPORT_TYPES and not _is_admin_user(job.requested_by):
+        raise PermissionDenied('Export requires an admin account.')
+    queryset, header, rows = EXPORT_BUILDERS[job.export_type](job.requested_by, job.filters or {})
+    job.total_rows = queryset.count()
+    job.save(update_fields=['total_rows', 'updated_at'])
+
+    relative_name = f"exports/{job.export_type}_{job.id}_{timezone.now().strftime('%Y%m%d%H%M%S')}.{job.file_format}"
+    path = os.path.join(settings.MEDIA_ROOT, relative_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    processed = 0
+    try:
+        with _open_export_file(path, job.file_format) as handle:
+            writer = csv.writer(handle)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(row)
+                processed += 1
+                if processed % EXPORT_PROGRESS_EVERY == 0:
+                    ExportJob.objects.filter(pk=job.pk).update(processed_rows=processed, updated_at=timezone.now())
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    job.file.name = relative_name
+    job.processed_rows = processed
+    job.status = ExportJob.STATUS_COMPLETED
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'processed_rows', 'status', 'finished_at', 'updated_at'])
+    return job
+
+
+def claim_next_export_job():
+    """Atomically move the oldest pending job to running; None when the queue is empty."""
+    with transaction.atomic():
+        job = ExportJob.objects.select_for_update(skip_locked=True).filter(
+            status=ExportJob.STATUS_PENDING
+        ).order_by('created_at', 'id').first()
+        if job is None:
+            return None
+        job.status = ExportJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+    return job
+
+
+def requeue_stale_export_jobs(older_than=EXPORT_JOB_STALE_RUNNING):
+    """Return running jobs whose worker stopped reporting progress (crashed mid-export) to pending."""
+    return ExportJob.objects.filter(
+        status=ExportJob.STATUS_RUNNING, updated_at__lt=timezone.now() - older_than
+    ).update(status=ExportJob.STATUS_PENDING, started_at=None, processed_rows=0, updated_at=timezone.now())
+
+
+def process_export_job(job):
+    try:
+        return run_export_job(job)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job.pk)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.STATUS_FAILED,
+            error_message=str(exc)[:2000],
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        return None
@@ -0,0 +1,220 @@
+"""
+State -> city -> area lookups for the branch location dropdowns.
+
+Answers come from the local LocationArea table, with results cached per
+state/city under the shared CacheVersion counter that load_locations bumps.
+The bundled data/india_locations.csv is only a starter seed (every state, main
+cities); load the full directory with `load_locations --file <India Post CSV>`,
+or fill the remaining states offline with `load_locations --from-remote
+--unloaded-only`. Lookups never call out during a request: a city or area that
+is not on file comes back empty and the form falls back to manual entry.
+LOCATION_REMOTE_FALLBACK=True restores the old per-request remote merge for
+states that only have starter rows.
+"""
+import csv
+import gzip
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import LocationArea, bump_cache_version, cache_version
+
+logger = logging.getLogger(__name__)
+
+LOCATION_CACHE_TTL_SECONDS = 60 * 60 * 24
+# A failed remote fallback is retried after this long instead of caching the starter rows for a day.
+LOCATION_REMOTE_RETRY_SECONDS = 5 * 60
+LOCATION_CACHE_VERSION = 'location_directory'
+LOCATION_REMOTE_FALLBACK = getattr(settings, 'LOCATION_REMOTE_FALLBACK', False)
+BUNDLED_LOCATIONS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'india_locations.csv')
+
+# Column aliases accepted by iter_location_file(); the second set matches the
+# India Post "All India Pincode Directory" export from data.gov.in.
+STATE_COLUMNS = ('state', 'statename')
+CITY_COLUMNS = ('city', 'district', 'districtname')
+AREA_COLUMNS = ('area', 'officename')
+BLOCK_COLUMNS = ('block', 'taluk')
+PINCODE_COLUMNS = ('pincode',)
+
+
+def _clean(value):
+    return ' '.join(str(value or '').split())
+
+
+def _cache_key(prefix, *parts):
+    digest = hashlib.md5('|'.join(_clean(part).lower() for part in parts).encode('utf-8')).hexdigest()
+    return f'{prefix}:v{cache_version(LOCATION_CACHE_VERSION)}:{digest}'
+
+
+def invalidate_location_cache():
+    """Drop every process's cached lookups once the current transaction commits."""
+    bump_cache_version(LOCATION_CACHE_VERSION)
+
+
+def _sorted_distinct(queryset, field):
+    values = queryset.exclude(**{field: ''}).values_list(field, flat=True).distinct()
+    return sorted(set(values), key=str.lower)
+
+
+def unloaded_states():
+    """States that still have only bundled starter rows."""
+    loaded = LocationArea.objects.exclude(source=LocationArea.SOURCE_BUNDLED).values('state')
+    return _sorted_distinct(LocationArea.objects.exclude(state__in=loaded), 'state')
+
+
+def _needs_remote(state):
+    """True while `state` has nothing but bundled starter rows (opt-in, see LOCATION_REMOTE_FALLBACK)."""
+    return LOCATION_REMOTE_FALLBACK and not LocationArea.objects.filter(
+        state__iexact=_clean(state)
+    ).exclude(source=LocationArea.SOURCE_BUNDLED).exists()
+
+
+def _lookup(cache_key, local_rows, state, remote_fetch, *remote_args):
+    result = cache.get(cache_key)
+    if result is not None:
+        return result
+    result = local_rows()
+    ttl = LOCATION_CACHE_TTL_SECONDS
+    if _needs_remote(state):
+        try:
+            result = sorted(set(result) | set(remote_fetch(*remote_args)), key=str.lower)
+        except Exception as exc:
+            logger.warning('Remote location fallback failed for %s: %s', remote_args, exc)
+            ttl = LOCATION_REMOTE_RETRY_SECONDS
+    cache.set(cache_key, result, ttl)
+    return result
+
+
+def get_states():
+    key = _cache_key('location_states')
+    states = cache.get(key)
+    if states is None:
+        # The starter seed already lists every state and union territory.
+        states = _sorted_distinct(LocationArea.objects.all(), 'state')
+        cache.set(key, states, LOCATION_CACHE_TTL_SECONDS)
+    return states
+
+
+def get_cities(state):
+    from Api.utils import fetch_cities
+
+    return _lookup(
+        _cache_key('location_cities', state),
+        lambda: _sorted_distinct(LocationArea.objects.filter(state__iexact=_clean(state)), 'city'),
+        state,
+        fetch_cities,
+        state,
+    )
+
+
+def get_areas(state, city):
+    from Api.utils import fetch_areas
+
+    return _lookup(
+        _cache_key('location_areas', state, city),
+        lambda: _sorted_distinct(
+            LocationArea.objects.filter(state__iexact=_clean(state), city__iexact=_clean(city)), 'area'
+        ),
+        state,
+        fetch_areas,
+        state,
+        city,
+    )
+
+
+def _pick(row, columns):
+    for column in columns:
+        value = _clean(row.get(column))
+        if value and value.upper() != 'NA':
+            return value
+    return ''
+
+
+def _display_case(value):
+    # The India Post directory is all upper case; keep mixed-case values as given.
+    return value.title() if value.isupper() else value
+
+
+def _area_label(name, block):
+    # Same "Name (Block)" label the remote postalpincode lookup produced.
+    if name and block and block.lower() != name.lower():
+        return f'{name} ({block})'
+    return name
+
+
+def iter_location_file(path):
+    """
+    Yield (state, city, area, pincode) rows from a CSV file (optionally .gz).
+    Accepts state,city,area,pincode headers or the India Post directory columns.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8-sig', newline='') as handle:
+        reader = csv.DictReader(handle)
+        reader.fieldnames = [_clean(name).lower().replace(' ', '') for name in reader.fieldnames or []]
+        for row in reader:
+            state = _display_case(_pick(row, STATE_COLUMNS))
+            city = _display_case(_pick(row, CITY_COLUMNS))
+            area = _area_label(_display_case(_pick(row, AREA_COLUMNS)), _display_case(_pick(row, BLOCK_COLUMNS)))
+            pincode = _pick(row, PINCODE_COLUMNS)[:6]
+            if state and city:
+                yield state, city, area, pincode
+
+
+def iter_remote_locations(states=None):
+    """Yield (state, city, area, '') rows from the remote location APIs. Slow; for offline refreshes only."""
+    from Api.utils import fetch_areas, fetch_cities, fetch_states
+
+    wanted = {_clean(state).lower() for state in states or []}
+    for state in fetch_states():
+        if wanted and state.lower() not in wanted:
+            continue
+        for city in fetch_cities(state):
+            try:
+                areas = fetch_areas(state, city)
+            except Exception:
+                logger.warning('Could not fetch areas for state=%s city=%s; loading city only', state, city)
+                areas = []
+            yield state, city, '', ''
+            for area in areas:
+                yield state, city, area, ''
+
+
+def load_locations(rows, replace=False, batch_size=1000, source=LocationArea.SOURCE_FILE):
+    """
+    Insert location rows, skipping ones already present. With replace=True the
+    table is cleared first in the same transaction. Loading a real directory
+    marks every state it covers as loaded, which stops the remote fallback there.
+    Returns the number of rows read.
+    """
+    count = 0
+    states = set()
+    with transaction.atomic():
+        if replace:
+            LocationArea.objects.all().delete()
+        batch = []
+        for state, city, area, pincode in rows:
+            batch.append(LocationArea(
+                state=state[:120], city=city[:120], area=area[:150], pincode=pincode[:6], source=source
+            ))
+            states.add(state[:120])
+            count += 1
+            if len(batch) >= batch_size:
+                LocationArea.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            LocationArea.objects.bulk_create(batch, ignore_conflicts=True)
+        if source != LocationArea.SOURCE_BUNDLED and states:
+            # Starter rows that clashed with the directory were skipped above; adopt them instead.
+            LocationArea.objects.filter(source=LocationArea.SOURCE_BUNDLED, state__in=states).update(source=source)
+        invalidate_location_cache()
+    return count
+
+
+def load_bundled_locations(replace=False):
+    return load_locations(
+        iter_location_file(BUNDLED_LOCATIONS_FILE), replace=replace, source=LocationArea.SOURCE_BUNDLED
+    )
@@ -0,0 +1,367 @@
+"""
+Outgoing email dispatch backed by the EmailOutbox table.
+
+queue_email() stores the message and hands its id to a small, fixed pool of
+worker threads through a bounded queue. Workers drain ids in batches and send
+each batch over one SMTP connection. When the queue is full the row simply
+stays pending, and the workers (or the send_queued_emails command) pick it up
+on their next sweep, so a burst of emails never spawns more threads or opens
+more SMTP connections than the pool allows. Failed sends are retried with
+exponential backoff until EMAIL_DISPATCH_MAX_ATTEMPTS.
+
+Sensitive messages (temporary passwords) never store their body: the outbox
+row only tracks delivery, and the body lives in the queuing process's
+dispatcher until the message is sent or gives up. Rows whose process exited
+first are failed by fail_abandoned_sensitive().
+"""
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import AdminDigestEntry, EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+EMAIL_DISPATCH_WORKERS = getattr(settings, 'EMAIL_DISPATCH_WORKERS', 2)
+EMAIL_DISPATCH_QUEUE_SIZE = getattr(settings, 'EMAIL_DISPATCH_QUEUE_SIZE', 500)
+EMAIL_DISPATCH_BATCH_SIZE = getattr(settings, 'EMAIL_DISPATCH_BATCH_SIZE', 20)
+EMAIL_DISPATCH_MAX_ATTEMPTS = getattr(settings, 'EMAIL_DISPATCH_MAX_ATTEMPTS', 5)
+EMAIL_DISPATCH_RETRY_BASE_SECONDS = getattr(settings, 'EMAIL_DISPATCH_RETRY_BASE_SECONDS', 30)
+EMAIL_DISPATCH_IDLE_SWEEP_SECONDS = getattr(settings, 'EMAIL_DISPATCH_IDLE_SWEEP_SECONDS', 60)
+EMAIL_DISPATCH_STALE_SENDING = timedelta(minutes=10)
+# 0 sends every admin notification as it happens; N > 0 groups them into one digest per admin every N minutes.
+ADMIN_NOTIFICATION_DIGEST_MINUTES = getattr(settings, 'ADMIN_NOTIFICATION_DIGEST_MINUTES', 0)
+
+ADMIN_DIGEST_SECTION_TITLES = {
+    'interest_admin': 'New interests',
+    'deal_confirmed_admin': 'Deals confirmed',
+}
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=EMAIL_DISPATCH_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)))
+
+
+def _claim(outbox_ids):
+    """Move due pending rows to sending; returns the rows this caller now owns."""
+    now = timezone.now()
+    held = dispatcher.held_ids()
+    claimed = []
+    for outbox_id in outbox_ids:
+        rows = EmailOutbox.objects.filter(pk=outbox_id, status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=now)
+        if outbox_id not in held:
+            # Only the process holding a sensitive body can send it.
+            rows = rows.filter(sensitive=False)
+        updated = rows.update(status=EmailOutbox.STATUS_SENDING, attempts=F('attempts') + 1, updated_at=now)
+        if updated:
+            claimed.append(outbox_id)
+    return list(EmailOutbox.objects.filter(pk__in=claimed).order_by('id'))
+
+
+def _mark_sent(message):
+    fields = {'status': EmailOutbox.STATUS_SENT, 'sent_at': timezone.now(), 'last_error': ''}
+    if message.sensitive:
+        fields['body'] = ''
+        dispatcher.release(message.pk)
+    EmailOutbox.objects.filter(pk=message.pk).update(**fields)
+
+
+def _mark_failed(message, exc):
+    fields = {'last_error': str(exc)[:2000]}
+    if message.attempts >= EMAIL_DISPATCH_MAX_ATTEMPTS:
+        fields['status'] = EmailOutbox.STATUS_FAILED
+        if message.sensitive:
+            fields['body'] = ''
+            dispatcher.release(message.pk)
+    else:
+        fields['status'] = EmailOutbox.STATUS_PENDING
+        fields['next_attempt_at'] = timezone.now() + _retry_delay(message.attempts)
+    EmailOutbox.objects.filter(pk=message.pk).update(**fields)
+
+
+def deliver_outbox_batch(outbox_ids):
+    """Send the given outbox rows over a single SMTP connection. Returns the number sent."""
+    messages = _claim(outbox_ids)
+    if not messages:
+        return 0
+
+    sent = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.exception('Could not open email connection for %s queued messages', len(messages))
+        for message in messages:
+            _mark_failed(message, exc)
+        return 0
+
+    try:
+        for message in messages:
+            try:
+                EmailMessage(
+                    message.subject,
+                    dispatcher.held_body(message.pk) if message.sensitive else message.body,
+                    message.from_email or settings.DEFAULT_FROM_EMAIL,
+                    message.recipients,
+                    connection=connection,
+                ).send(fail_silently=False)
+            except Exception as exc:
+                logger.exception('Failed to send queued email %s (%s)', message.pk, message.category)
+                _mark_failed(message, exc)
+            else:
+                _mark_sent(message)
+                sent += 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            logger.exception('Error closing email connection')
+    return sent
+
+
+def due_outbox_ids(limit=None):
+    ids = EmailOutbox.objects.filter(
+        Q(sensitive=False) | Q(pk__in=dispatcher.held_ids()),
+        status=EmailOutbox.STATUS_PENDING,
+        next_attempt_at__lte=timezone.now(),
+    ).order_by('next_attempt_at', 'id').values_list('id', flat=True)
+    return list(ids[:limit] if limit else ids)
+
+
+def requeue_stale_sending(older_than=EMAIL_DISPATCH_STALE_SENDING):
+    """Return rows stuck in sending (worker died mid-batch) to pending."""
+    return EmailOutbox.objects.filter(
+        status=EmailOutbox.STATUS_SENDING, updated_at__lt=timezone.now() - older_than
+    ).update(status=EmailOutbox.STATUS_PENDING, next_attempt_at=timezone.now())
+
+
+def fail_abandoned_sensitive(older_than=EMAIL_DISPATCH_STALE_SENDING):
+    """Fail sensitive rows left overdue by a process that exited with their body; it cannot be rebuilt."""
+    return EmailOutbox.objects.filter(
+        sensitive=True,
+        status__in=[EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING],
+        next_attempt_at__lt=timezone.now() - older_than,
+        updated_at__lt=timezone.now() - older_than,
+    ).exclude(pk__in=dispatcher.held_ids()).update(
+        status=EmailOutbox.STATUS_FAILED, body='', last_error='Message body was lost when its sending process exited.'
+    )
+
+
+def flush_outbox(batch_size=EMAIL_DISPATCH_BATCH_SIZE):
+    """Synchronously deliver every due pending row. Returns the number sent."""
+    sent = 0
+    while True:
+        ids = due_outbox_ids(limit=batch_size)
+        if not ids:
+            return sent
+        sent += deliver_outbox_batch(ids)
+
+
+class EmailDispatcher:
+    """Fixed pool of daemon worker threads fed from a bounded in-process queue."""
+
+    def __init__(self, workers=EMAIL_DISPATCH_WORKERS, queue_size=EMAIL_DISPATCH_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._threads = []
+        self._next_digest_sweep = 0.0
+        self._held_bodies = {}
+
+    def start(self):
+        """Start the workers (and with them the digest timer) if this process has none yet."""
+        self._ensure_started()
+
+    def _ensure_started(self):
+        # Restart after a fork: threads and the queue do not survive into the child.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._threads = [
+                threading.Thread(target=self._work, name=f'email-dispatch-{index}', daemon=True)
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._held_bodies = {}
+            self._pid = os.getpid()
+
+    def hold(self, outbox_id, body):
+        """Keep a sensitive body in memory for delivery; it is never written to the outbox."""
+        self._ensure_started()
+        with self._lock:
+            self._held_bodies[outbox_id] = body
+
+    def held_body(self, outbox_id):
+        with self._lock:
+            return self._held_bodies[outbox_id]
+
+    def held_ids(self):
+        with self._lock:
+            return list(self._held_bodies)
+
+    def release(self, outbox_id):
+        with self._lock:
+            self._held_bodies.pop(outbox_id, None)
+
+    def submit(self, outbox_id):
+        """Hand an id to the pool; False when the queue is full and the row waits for a sweep."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(outbox_id)
+        except queue.Full:
+            logger.warning('Email dispatch queue full; outbox %s left pending', outbox_id)
+            return False
+        return True
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=EMAIL_DISPATCH_IDLE_SWEEP_SECONDS)]
+        except queue.Empty:
+            return []
+        while len(batch) < EMAIL_DISPATCH_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _digest_sweep_due(self):
+        # One worker per interval, whether or not the queue ever goes idle.
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_digest_sweep:
+                return False
+            self._next_digest_sweep = now + EMAIL_DISPATCH_IDLE_SWEEP_SECONDS
+            return True
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            close_old_connections()
+            try:
+                if self._digest_sweep_due():
+                    flush_admin_digests()
+                deliver_outbox_batch(batch or due_outbox_ids(limit=EMAIL_DISPATCH_BATCH_SIZE))
+            except Exception:
+                logger.exception('Email dispatch worker failed on batch %s', batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                close_old_connections()
+
+
+dispatcher = EmailDispatcher()
+
+
+def queue_email(subject, body, recipients, category='', sensitive=False, from_email=None):
+    """
+    Store an email in the outbox and schedule it for delivery. Returns the outbox row.
+
+    Inside transaction.atomic() the row is written with the caller's changes and
+    only handed to the workers on commit, so a rolled-back request sends nothing
+    and no SMTP work happens while the caller holds row locks. With sensitive=True
+    the body is kept only in this process's memory (see the module docstring).
+    """
+    recipients = [address for address in recipients if address]
+    if not recipients:
+        return None
+    message = EmailOutbox.objects.create(
+        category=category,
+        subject=subject,
+        body='' if sensitive else body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+        sensitive=sensitive,
+    )
+
+    def _dispatch():
+        if sensitive:
+            dispatcher.hold(message.pk, body)
+        dispatcher.submit(message.pk)
+
+    transaction.on_commit(_dispatch)
+    return message
+
+
+def queue_admin_notification(subject, body, recipients, category):
+    """Email admins now, or hold the message for the next digest when digest mode is on."""
+    recipients = [address for address in recipients if address]
+    if not recipients:
+        return None
+    if ADMIN_NOTIFICATION_DIGEST_MINUTES <= 0:
+        return queue_email(subject, body, recipients, category=category)
+    entry = AdminDigestEntry.objects.create(category=category, subject=subject, body=body, recipients=recipients)
+    # The digest sweep runs in the worker loop, so make sure this process has one
+    # even if it never queues a plain email.
+    transaction.on_commit(dispatcher.start)
+    return entry
+
+
+def _admin_digest_body(entries):
+    sections = OrderedDict()
+    for entry in entries:
+        sections.setdefault(entry.category, []).append(entry)
+    parts = []
+    for category, items in sections.items():
+        title = ADMIN_DIGEST_SECTION_TITLES.get(category, items[0].subject)
+        parts.append(f"{title} ({len(items)})\n{'=' * 40}")
+        for item in items:
+            parts.append(f"[{timezone.localtime(item.created_at).strftime('%d/%m/%Y %H:%M')}] {item.subject}\n{item.body.strip()}")
+            parts.append('-' * 40)
+    return '\n\n'.join(parts) + '\n'
+
+
+def flush_admin_digests(force=False):
+    """
+    Turn waiting AdminDigestEntry rows into one outbox email per admin once the
+    oldest entry has waited a full digest window. Returns the number of emails queued.
+    """
+    window = timedelta(minutes=ADMIN_NOTIFICATION_DIGEST_MINUTES)
+    oldest = AdminDigestEntry.objects.filter(batch='').order_by('created_at').values_list(
+        'created_at', flat=True
+    ).first()
+    if oldest is None or (not force and timezone.now() - oldest < window):
+        return 0
+
+    # Claim and queue in one transaction: a failure leaves the entries waiting, and
+    # skip_locked keeps concurrent sweeps from digesting the same entry twice.
+    with transaction.atomic():
+        entries = list(
+            AdminDigestEntry.objects.select_for_update(skip_locked=True).filter(batch='').order_by('created_at', 'id')
+        )
+        if not entries:
+            return 0
+        AdminDigestEntry.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+            batch=uuid.uuid4().hex, digested_at=timezone.now()
+        )
+
+        per_recipient = OrderedDict()
+        for entry in entries:
+            for address in entry.recipients:
+                per_recipient.setdefault(address.strip().lower(), []).append(entry)
+
+        for address, items in per_recipient.items():
+            queue_email(
+                f"Agro Broker - Admin digest ({len(items)} update{'s' if len(items) != 1 else ''})",
+                _admin_digest_body(items),
+                [address],
+                category='admin_digest',
+            )
+    return len(per_recipient)
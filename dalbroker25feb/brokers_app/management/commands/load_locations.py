@@ -0,0 +1,60 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from brokers_app.locations import (
+    BUNDLED_LOCATIONS_FILE,
+    iter_location_file,
+    iter_remote_locations,
+    load_locations,
+    unloaded_states,
+)
+from brokers_app.models import LocationArea
+
+
+class Command(BaseCommand):
+    help = "Load the state/city/area directory used by the branch location dropdowns."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=BUNDLED_LOCATIONS_FILE,
+            help="CSV (or .csv.gz) with state,city,area,pincode columns or the India Post directory columns. "
+                 "Defaults to the bundled starter seed; load the full directory so every city and area is listed.",
+        )
+        parser.add_argument(
+            '--from-remote',
+            action='store_true',
+            help="Refresh from the remote countriesnow/postalpincode APIs instead of a file.",
+        )
+        parser.add_argument(
+            '--state',
+            action='append',
+            default=[],
+            help="With --from-remote, only refresh this state (repeatable).",
+        )
+        parser.add_argument(
+            '--unloaded-only',
+            action='store_true',
+            help="With --from-remote, only fetch states that still have just the bundled starter rows.",
+        )
+        parser.add_argument('--replace', action='store_true', help="Delete existing rows before loading.")
+
+    def handle(self, *args, **options):
+        if options['from_remote']:
+            states = options['state']
+            if options['unloaded_only']:
+                states = [state for state in unloaded_states() if not states or state in states]
+                if not states:
+                    self.stdout.write("Every state is already loaded.")
+                    return
+            rows, source, kind = iter_remote_locations(states=states), 'remote APIs', LocationArea.SOURCE_REMOTE
+        else:
+            rows, source = iter_location_file(options['file']), options['file']
+            bundled = os.path.abspath(source) == os.path.abspath(BUNDLED_LOCATIONS_FILE)
+            kind = LocationArea.SOURCE_BUNDLED if bundled else LocationArea.SOURCE_FILE
+        try:
+            count = load_locations(rows, replace=options['replace'], source=kind)
+        except OSError as exc:
+            raise CommandError(f"Could not read {source}: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Loaded {count} location row(s) from {source}."))
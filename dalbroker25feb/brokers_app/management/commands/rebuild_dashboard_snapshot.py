@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from brokers_app.dashboard import rebuild_admin_dashboard_snapshot
+
+
+class Command(BaseCommand):
+    help = "Recompute every section of the admin dashboard KPI snapshot."
+
+    def handle(self, *args, **options):
+        data = rebuild_admin_dashboard_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Dashboard snapshot rebuilt ({', '.join(sorted(data))})."
+        ))
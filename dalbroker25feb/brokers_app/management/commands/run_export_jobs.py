@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from brokers_app.exports import claim_next_export_job, process_export_job, requeue_stale_export_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued export jobs, writing files under MEDIA_ROOT/exports/."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Seconds to wait when the queue is empty.')
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_export_jobs()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stalled export job(s).")
+            job = claim_next_export_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f"Running export #{job.id} ({job.export_type})...")
+            result = process_export_job(job)
+            if result is None:
+                self.stdout.write(self.style.ERROR(f"Export #{job.id} failed."))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Export #{job.id} finished: {result.processed_rows} rows -> {result.file.name}"
+                ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from brokers_app.mailer import fail_abandoned_sensitive, flush_admin_digests, flush_outbox, requeue_stale_sending
+
+
+class Command(BaseCommand):
+    help = "Build due admin digests and deliver pending EmailOutbox messages, retrying failed sends with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Flush the outbox once and exit.')
+        parser.add_argument('--sleep', type=float, default=30.0, help='Seconds to wait between sweeps.')
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_sending()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale message(s).")
+            abandoned = fail_abandoned_sensitive()
+            if abandoned:
+                self.stdout.write(self.style.WARNING(f"Failed {abandoned} sensitive message(s) whose body was lost."))
+            digests = flush_admin_digests()
+            if digests:
+                self.stdout.write(f"Queued {digests} admin digest(s).")
+            sent = flush_outbox()
+            if sent:
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} queued email(s)."))
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
@@ -0,0 +1,57 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_category_tree_fields(apps, schema_editor):
+    CategoryMaster = apps.get_model('brokers_app', 'CategoryMaster')
+    categories = list(CategoryMaster.objects.all())
+    children_by_parent = {}
+    for category in categories:
+        children_by_parent.setdefault(category.parent_id, []).append(category)
+
+    pending = [(category, None) for category in children_by_parent.get(None, [])]
+    while pending:
+        category, parent = pending.pop()
+        if parent is None:
+            category.level = 0
+            category.path = f"{category.id}/"
+            category.full_path = category.category_name
+            category.root_id = category.id
+            category.ancestor_ids = []
+        else:
+            category.level = parent.level + 1
+            category.path = f"{parent.path}{category.id}/"
+            category.full_path = f"{parent.full_path} > {category.category_name}"
+            category.root_id = parent.root_id
+            category.ancestor_ids = parent.ancestor_ids + [parent.id]
+        pending.extend((child, category) for child in children_by_parent.get(category.id, []))
+
+    CategoryMaster.objects.bulk_update(
+        categories, ['level', 'path', 'full_path', 'root', 'ancestor_ids'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brokers_app', '0024_alter_product_loading_from_alter_product_loading_to'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categorymaster',
+            name='full_path',
+            field=models.CharField(blank=True, max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='categorymaster',
+            name='root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='brokers_app.categorymaster'),
+        ),
+        migrations.AddField(
+            model_name='categorymaster',
+            name='ancestor_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(backfill_category_tree_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brokers_app', '0029_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminDigestEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=50)),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('recipients', models.JSONField(default=list)),
+                ('batch', models.CharField(blank=True, db_index=True, max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('digested_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Admin Digest Entry',
+                'verbose_name_plural': 'Admin Digest Entries',
+                'ordering': ['id'],
+            },
+        ),
+    ]
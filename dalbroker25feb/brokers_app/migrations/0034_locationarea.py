@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brokers_app', '0033_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationArea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=120)),
+                ('city', models.CharField(max_length=120)),
+                ('area', models.CharField(blank=True, max_length=150)),
+                ('pincode', models.CharField(blank=True, max_length=6)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Location Area',
+                'verbose_name_plural': 'Location Areas',
+                'indexes': [models.Index(fields=['state', 'city'], name='brokers_app_state_a58c6b_idx')],
+                'unique_together': {('state', 'city', 'area')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:01
+
+import csv
+import os
+
+from django.db import migrations
+
+
+SEED_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'india_locations.csv')
+
+
+def seed_location_areas(apps, schema_editor):
+    LocationArea = apps.get_model('brokers_app', 'LocationArea')
+    with open(SEED_FILE, encoding='utf-8', newline='') as handle:
+        rows = [
+            LocationArea(state=row['state'], city=row['city'], area=row['area'], pincode=row['pincode'])
+            for row in csv.DictReader(handle)
+        ]
+    LocationArea.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brokers_app', '0034_locationarea'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_location_areas, migrations.RunPython.noop),
+    ]
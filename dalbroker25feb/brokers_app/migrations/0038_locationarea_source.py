@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:17
+
+import csv
+import os
+
+from django.db import migrations, models
+
+
+SEED_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'india_locations.csv')
+
+
+def mark_bundled_rows(apps, schema_editor):
+    # Rows seeded by 0035 came from the starter file; flag them so those states keep
+    # the remote fallback until a full directory is loaded.
+    LocationArea = apps.get_model('brokers_app', 'LocationArea')
+    with open(SEED_FILE, encoding='utf-8', newline='') as handle:
+        for row in csv.DictReader(handle):
+            LocationArea.objects.filter(state=row['state'], city=row['city'], area=row['area']).update(source='bundled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brokers_app', '0037_exportjob_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='locationarea',
+            name='source',
+            field=models.CharField(choices=[('bundled', 'Bundled starter file'), ('file', 'Directory file'), ('remote', 'Remote refresh')], default='file', max_length=10),
+        ),
+        migrations.RunPython(mark_bundled_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:25
+
+from django.db import migrations, models
+
+
+def clear_sensitive_bodies(apps, schema_editor):
+    # Bodies queued before this release still hold temporary passwords.
+    EmailOutbox = apps.get_model('brokers_app', 'EmailOutbox')
+    EmailOutbox.objects.filter(sensitive=True).exclude(body='').update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brokers_app', '0038_locationarea_source'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='sensitive',
+            field=models.BooleanField(default=False, help_text='Body is never stored; the queuing process holds it in memory until delivery.'),
+        ),
+        migrations.RunPython(clear_sensitive_bodies, migrations.RunPython.noop),
+    ]
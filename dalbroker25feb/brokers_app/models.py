@@ -12,15 +12,20 @@ from django.contrib.auth.models import (
 from django.utils import timezone
 # from django.contrib.auth.models import Permission as DjangoPermission
 from django.core import validators
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.db import NotSupportedError, connection, transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.core import validators
 import os
-import random
-import string
 import re
-from datetime import datetime
+import time
+from datetime import timedelta
 from decimal import Decimal
+from django.conf import settings
 from django.apps import apps
 
 def validate_file_size(value):
@@ -43,36 +48,195 @@ def validate_document_file_size(value):
         raise ValidationError('File size must be no more than 2MB.')
 
 
-def generate_transaction_id():
-    """Generate unique transaction ID in format: INT-YYYYMMDD-XXXX"""
-    today = datetime.now().strftime('%Y%m%d')
-    random_part = f"{random.randint(1000, 9999)}"
-    return f"INT-{today}-{random_part}"
 
 
-def generate_contract_id():
-    now = timezone.localtime()
-    prefix = f"JBC{now.strftime('%y%d%m')}"
+class DailySequence(models.Model):
+    """Per-day counter behind generated IDs; one row per (name, day), incremented under a row lock."""
+    name = models.CharField(max_length=30)
+    day = models.DateField()
+    last_value = models.PositiveIntegerField(default=0)
 
-    ContractModel = apps.get_model('brokers_app', 'Contract')
-    pattern = re.compile(rf"^{re.escape(prefix)}(\d{{4}})$")
+    class Meta:
+        unique_together = ('name', 'day')
+        verbose_name = "Daily Sequence"
+        verbose_name_plural = "Daily Sequences"
+
+    def __str__(self):
+        return f"{self.name} {self.day}: {self.last_value}"
+
+
+def _increment_daily_sequence(name, day, initial):
+    """Insert the (name, day) row at `initial`, or add one to an existing row, in one statement."""
+    quote = connection.ops.quote_name
+    table = quote(DailySequence._meta.db_table)
+    columns = ', '.join(quote(column) for column in ('name', 'day', 'last_value'))
+    if connection.vendor == 'mysql':
+        upsert = f"ON DUPLICATE KEY UPDATE {quote('last_value')} = {quote('last_value')} + 1"
+    elif connection.vendor in ('sqlite', 'postgresql'):
+        upsert = (
+            f"ON CONFLICT ({quote('name')}, {quote('day')}) "
+            f"DO UPDATE SET {quote('last_value')} = {table}.{quote('last_value')} + 1"
+        )
+    else:
+        raise NotSupportedError(f'next_daily_sequence is not implemented for {connection.vendor}.')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) VALUES (%s, %s, %s) {upsert}",
+            [name, connection.ops.adapt_datefield_value(day), initial],
+        )
+
+
+def next_daily_sequence(name, day=None, seed=None):
+    """
+    Return the next value of the named counter for `day` (default: today, local time).
+    `seed` is called when the day's row does not exist yet, to start after IDs
+    that were issued before the counter existed.
+
+    The upsert takes an exclusive row lock straight away, so concurrent first-of-day
+    callers queue behind each other instead of deadlocking on the MySQL gap/shared
+    locks a locking get_or_create would take. The lock is held to the outer commit.
+    """
+    day = day or timezone.localdate()
+    with transaction.atomic():
+        start = 0
+        if seed is not None and not DailySequence.objects.filter(name=name, day=day).exists():
+            start = seed()
+        _increment_daily_sequence(name, day, start + 1)
+        return DailySequence.objects.values_list('last_value', flat=True).get(name=name, day=day)
+
+
+def _max_issued_sequence(model_name, field, prefix):
+    """Highest numeric suffix already stored under `prefix`; seeds a new day's counter."""
+    Model = apps.get_model('brokers_app', model_name)
+    pattern = re.compile(rf"^{re.escape(prefix)}(\d+)$")
 
     max_seq = 0
-    for existing_id in ContractModel.objects.filter(contract_id__startswith=prefix).values_list('contract_id', flat=True):
+    for existing_id in Model.objects.filter(**{f'{field}__startswith': prefix}).values_list(field, flat=True):
         match = pattern.match(str(existing_id or ''))
-        if not match:
-            continue
-        seq = int(match.group(1))
-        if seq > max_seq:
-            max_seq = seq
+        if match:
+            max_seq = max(max_seq, int(match.group(1)))
+    return max_seq
+
+
+def _next_daily_id(sequence_name, model_name, field, prefix, day):
+    seq = next_daily_sequence(sequence_name, day, seed=lambda: _max_issued_sequence(model_name, field, prefix))
+    return f"{prefix}{seq:04d}"
 
-    next_seq = max_seq + 1
+
+def generate_transaction_id():
+    """Generate unique transaction ID in format: INT-YYYYMMDD-NNNN (widens past 9999)"""
+    today = timezone.localdate()
+    return _next_daily_id('interest', 'ProductInterest', 'transaction_id', f"INT-{today.strftime('%Y%m%d')}-", today)
+
+
+def generate_buyer_unique_id():
+    """Generate unique buyer ID in format: BUY-YYYYMMDD-NNNN (widens past 9999)"""
+    today = timezone.localdate()
+    return _next_daily_id('buyer', 'DaalUser', 'buyer_unique_id', f"BUY-{today.strftime('%Y%m%d')}-", today)
+
+
+def generate_contract_id():
+    now = timezone.localtime()
+    prefix = f"JBC{now.strftime('%y%d%m')}"
+
+    next_seq = next_daily_sequence(
+        'contract', now.date(), seed=lambda: _max_issued_sequence('Contract', 'contract_id', prefix)
+    )
     if next_seq > 9999:
         raise ValidationError('Daily contract sequence limit exceeded for this prefix.')
 
     return f"{prefix}{next_seq:04d}"
 
 
+class CacheVersion(models.Model):
+    """
+    Shared invalidation counter for data cached inside each worker process.
+    Bumped on commit by writers; readers poll it (see cache_version) and rebuild
+    their local copy when it moves, so every process sees a change, not just the writer's.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Cache Version"
+        verbose_name_plural = "Cache Versions"
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+
+# How long a process trusts a version it already read before asking the database again.
+CACHE_VERSION_POLL_SECONDS = getattr(settings, 'CACHE_VERSION_POLL_SECONDS', 5)
+_cache_versions = {}
+
+
+def cache_version(name):
+    """Current value of the named CacheVersion counter (0 until first bumped)."""
+    now = time.monotonic()
+    known = _cache_versions.get(name)
+    if known is not None and now - known[1] < CACHE_VERSION_POLL_SECONDS:
+        return known[0]
+    version = CacheVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+    _cache_versions[name] = (version, now)
+    return version
+
+
+def bump_cache_version(*names):
+    """
+    Advance the named counters once the current transaction commits (immediately
+    outside one). Bumps made at the same savepoint level share one pending update.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return
+    if connection.in_atomic_block:
+        savepoint_ids = set(connection.savepoint_ids)
+        for callback_savepoint_ids, callback, _ in connection.run_on_commit:
+            if callback_savepoint_ids == savepoint_ids and hasattr(callback, 'cache_version_names'):
+                callback.cache_version_names.update(names)
+                return
+
+    def bump():
+        pending = sorted(bump.cache_version_names)
+        CacheVersion.objects.bulk_create([CacheVersion(name=name) for name in pending], ignore_conflicts=True)
+        CacheVersion.objects.filter(name__in=pending).update(version=F('version') + 1, updated_at=timezone.now())
+        for name in pending:
+            _cache_versions.pop(name, None)
+
+    bump.cache_version_names = names
+    transaction.on_commit(bump)
+
+
+class DashboardInputsMixin:
+    """
+    Remembers the loaded values of DASHBOARD_FIELDS (attnames) so save() only
+    bumps dashboard versions when a field the dashboards read actually changed.
+    """
+    DASHBOARD_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_dashboard_inputs()
+        return instance
+
+    def _remember_dashboard_inputs(self):
+        self._loaded_dashboard_inputs = {
+            field: self.__dict__[field] for field in self.DASHBOARD_FIELDS if field in self.__dict__
+        }
+
+    def _changed_dashboard_inputs(self, adding, update_fields=None):
+        """DASHBOARD_FIELDS written with a new value; all written ones for a new or hand-built row."""
+        fields = set(self.DASHBOARD_FIELDS)
+        if update_fields is not None:
+            fields &= {self._meta.get_field(name).attname for name in update_fields}
+        loaded = getattr(self, '_loaded_dashboard_inputs', None)
+        if adding or loaded is None:
+            return fields
+        return {field for field in fields if field not in loaded or self.__dict__.get(field) != loaded[field]}
+
+
 def user_document_upload_to(instance, filename):
     user_id = instance.pk or 'temp'
     base, ext = os.path.splitext(filename or '')
@@ -115,6 +279,10 @@ class DaalUserManager(BaseUserManager):
 # Custom User Model
 # =========================
 
+ADMIN_RECIPIENTS_CACHE_KEY = 'admin_recipient_emails'
+ADMIN_RECIPIENTS_CACHE_TTL = 60 * 60
+ADMIN_RECIPIENT_FIELDS = {'email', 'is_active', 'role', 'is_admin', 'is_staff', 'is_superuser'}
+
 class TagMaster(models.Model):
     tag_name = models.CharField(max_length=50, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -128,7 +296,7 @@ class TagMaster(models.Model):
     def __str__(self):
         return self.tag_name
 
-class DaalUser(AbstractBaseUser, PermissionsMixin):
+class DaalUser(DashboardInputsMixin, AbstractBaseUser, PermissionsMixin):
 
     # 🔐 Login field
     username = models.CharField(max_length=100, unique=True)
@@ -271,6 +439,8 @@ class DaalUser(AbstractBaseUser, PermissionsMixin):
 
     objects = DaalUserManager()
 
+    DASHBOARD_FIELDS = ('is_active', 'role', 'is_admin', 'is_staff', 'is_superuser')
+
     USERNAME_FIELD = "mobile"
     REQUIRED_FIELDS = ["username", "email", "first_name"]
 
@@ -286,10 +456,57 @@ class DaalUser(AbstractBaseUser, PermissionsMixin):
 
     def save(self, *args, **kwargs):
         if not self.buyer_unique_id and (self.is_buyer or self.role in ('buyer', 'both_sellerandbuyer')):
-            today = datetime.now().strftime('%Y%m%d')
-            random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-            self.buyer_unique_id = f"BUY-{today}-{random_part}"
+            self.buyer_unique_id = generate_buyer_unique_id()
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        changed = self._changed_dashboard_inputs(adding, update_fields)
+        self._remember_dashboard_inputs()
+        if changed:
+            # is_active also filters the deals section's buyer/seller lists.
+            sections = [DashboardSnapshot.SECTION_USERS]
+            if 'is_active' in changed and not adding:
+                sections.append(DashboardSnapshot.SECTION_DEALS)
+            DashboardSnapshot.touch(*sections)
+        if update_fields is None or ADMIN_RECIPIENT_FIELDS & set(update_fields):
+            self.invalidate_admin_recipients()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.invalidate_admin_recipients()
+        return result
+
+    @classmethod
+    def admin_recipient_emails(cls, include_staff=False):
+        """
+        Active admin email addresses for notifications. include_staff widens the
+        set from admin/super_admin roles and superusers to is_admin/is_staff accounts.
+        Cached until a committed user write touches one of ADMIN_RECIPIENT_FIELDS.
+        """
+        cache_key = f'{ADMIN_RECIPIENTS_CACHE_KEY}:{cache_version(ADMIN_RECIPIENTS_CACHE_KEY)}'
+        directory = cache.get(cache_key)
+        if directory is None:
+            rows = cls.objects.filter(
+                Q(role__in=['admin', 'super_admin'])
+                | Q(is_superuser=True)
+                | Q(is_admin=True)
+                | Q(is_staff=True),
+                is_active=True,
+                email__isnull=False,
+            ).exclude(email='').order_by('id').values_list('email', 'role', 'is_superuser')
+            directory = {'admins': [], 'staff': []}
+            for email, role, is_superuser in rows:
+                if email not in directory['staff']:
+                    directory['staff'].append(email)
+                if (role in ('admin', 'super_admin') or is_superuser) and email not in directory['admins']:
+                    directory['admins'].append(email)
+            cache.set(cache_key, directory, ADMIN_RECIPIENTS_CACHE_TTL)
+        return list(directory['staff' if include_staff else 'admins'])
+
+    @staticmethod
+    def invalidate_admin_recipients():
+        # Shared version bumped on commit, so every worker drops its copy, not just this one.
+        bump_cache_version(ADMIN_RECIPIENTS_CACHE_KEY)
 
 
 # Permission System Models
@@ -333,12 +550,30 @@ class RolePermission(models.Model):
         return f"{self.role} - {self.module} - {self.action} ({'Allowed' if self.is_allowed else 'Denied'})"
 
 
+ROLE_PERMISSIONS_CACHE_VERSION = 'role_permissions'
+
+
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+def _role_permissions_changed(sender, **kwargs):
+    # Signals rather than save()/delete() so admin bulk deletes are covered too. This is the
+    # only invalidation; a RolePermission queryset.update() must bump the version itself.
+    bump_cache_version(ROLE_PERMISSIONS_CACHE_VERSION)
+
+
 # Category Master Model
+CATEGORY_TREE_VERSION_KEY = 'category_tree_version'
+
+
 class CategoryMaster(models.Model):
     category_name = models.CharField(max_length=100)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
     level = models.PositiveIntegerField(default=0)
     path = models.CharField(max_length=500, blank=True)
+    # Denormalized from the parent chain so reads never walk it; kept in sync by save().
+    full_path = models.CharField(max_length=1000, blank=True)
+    root = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    ancestor_ids = models.JSONField(default=list, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -356,42 +591,100 @@ class CategoryMaster(models.Model):
 
     def __str__(self):
         return self.category_name
-    
-    def save(self, *args, **kwargs):
-        if self.parent:
-            self.level = self.parent.level + 1
-            self.path = f"{self.parent.path}{self.id}/" if self.id else f"{self.parent.path}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_tree_state = (instance.__dict__.get('path'), instance.__dict__.get('full_path'))
+        return instance
+
+    def _apply_tree_fields(self):
+        parent = self.parent
+        if parent:
+            self.level = parent.level + 1
+            self.path = f"{parent.path}{self.id}/" if self.id else f"{parent.path}"
+            self.full_path = f"{parent.get_full_path()} > {self.category_name}"
+            self.root_id = parent.root_id or parent.id
+            self.ancestor_ids = list(parent.ancestor_ids or []) + [parent.id]
         else:
             self.level = 0
-            self.path = f"{self.id}/" if self.id else "/"
+            self.path = f"{self.id}/" if self.id else ""
+            self.full_path = self.category_name
+            self.root_id = self.id
+            self.ancestor_ids = []
+    
+    def save(self, *args, **kwargs):
+        previous_path, previous_full_path = getattr(self, '_loaded_tree_state', (None, None))
+        self._apply_tree_fields()
         
         super().save(*args, **kwargs)
         
-        if self.parent and not self.path.endswith(f"{self.id}/"):
-            self.path = f"{self.parent.path}{self.id}/"
-            super().save(update_fields=['path'])
+        if not self.path.endswith(f"{self.id}/"):
+            # New rows only know their id after the first insert.
+            self._apply_tree_fields()
+            super().save(update_fields=['path', 'root'])
+
+        if (
+            previous_path
+            and previous_path.endswith(f"{self.id}/")
+            and (previous_path, previous_full_path) != (self.path, self.full_path)
+        ):
+            self._rebase_descendants(previous_path, previous_full_path or '')
+        self._loaded_tree_state = (self.path, self.full_path)
+        self.touch_tree_version()
+
+    def _rebase_descendants(self, previous_path, previous_full_path):
+        """Rewrite path/level/root/ancestors/full_path of the whole subtree in one bulk update."""
+        descendants = list(
+            CategoryMaster.objects.filter(path__startswith=previous_path).exclude(pk=self.pk)
+        )
+        for descendant in descendants:
+            descendant.path = f"{self.path}{descendant.path[len(previous_path):]}"
+            descendant.ancestor_ids = [int(pk) for pk in descendant.path.strip('/').split('/')[:-1]]
+            descendant.level = len(descendant.ancestor_ids)
+            descendant.root_id = descendant.ancestor_ids[0]
+            if descendant.full_path.startswith(previous_full_path):
+                descendant.full_path = f"{self.full_path}{descendant.full_path[len(previous_full_path):]}"
+        if descendants:
+            CategoryMaster.objects.bulk_update(
+                descendants, ['path', 'level', 'root', 'ancestor_ids', 'full_path']
+            )
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.touch_tree_version()
+        return result
+
+    @staticmethod
+    def tree_version():
+        """Shared stamp that changes whenever any category row is written."""
+        return cache_version(CATEGORY_TREE_VERSION_KEY)
+
+    @staticmethod
+    def touch_tree_version():
+        bump_cache_version(CATEGORY_TREE_VERSION_KEY)
     
     def get_root_category(self):
-        if self.parent:
+        if self.root_id and self.root_id != self.id:
+            return self.root
+        if self.parent and not self.root_id:
             return self.parent.get_root_category()
         return self
     
     def get_ancestors(self):
-        ancestors = []
-        current = self.parent
-        while current:
-            ancestors.append(current)
-            current = current.parent
-        return list(reversed(ancestors))
+        if not self.ancestor_ids:
+            return []
+        ancestors_by_id = CategoryMaster.objects.in_bulk(self.ancestor_ids)
+        return [ancestors_by_id[pk] for pk in self.ancestor_ids if pk in ancestors_by_id]
     
     def get_descendants(self):
-        descendants = []
-        for child in self.children.all():
-            descendants.append(child)
-            descendants.extend(child.get_descendants())
-        return descendants
+        return list(
+            CategoryMaster.objects.filter(path__startswith=self.path).exclude(pk=self.pk).order_by('path')
+        )
     
     def get_full_path(self):
+        if self.full_path:
+            return self.full_path
         if self.parent:
             return f"{self.parent.get_full_path()} > {self.category_name}"
         return self.category_name
@@ -439,7 +732,7 @@ class BrandMaster(models.Model):
 
 
 # Product Model
-class Product(models.Model):
+class Product(DashboardInputsMixin, models.Model):
     DEAL_STATUS_AVAILABLE = 'available'
     DEAL_STATUS_PARTIALLY_SOLD = 'partially_sold'
     DEAL_STATUS_SELLER_CONFIRMED = 'seller_confirmed'
@@ -465,6 +758,8 @@ class Product(models.Model):
         (STATUS_SOLD, 'Sold'),
         (STATUS_OUT_OF_STOCK, 'Out of Stock'),
     ]
+    STOCK_FIELDS = ['original_quantity', 'remaining_quantity', 'deal_status', 'status', 'is_active', 'updated_at']
+    DASHBOARD_FIELDS = ('is_active', 'status', 'category_id')
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
     category = models.ForeignKey(CategoryMaster, on_delete=models.CASCADE, related_name='products')
@@ -503,6 +798,9 @@ class Product(models.Model):
         verbose_name = "Product"
         verbose_name_plural = "Products"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['category', 'is_active', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.seller.username}"
@@ -523,7 +821,11 @@ class Product(models.Model):
             elif self.remaining_quantity is None and self.original_quantity is not None:
                 self.remaining_quantity = self.original_quantity
         
-        if self.category:
+        update_fields = kwargs.get('update_fields')
+        category_changed = update_fields is None or bool(
+            {'category', 'root_category', 'category_path'} & set(update_fields)
+        )
+        if self.category and category_changed:
             root = self.category.get_root_category()
             self.root_category = root
             import json
@@ -532,27 +834,57 @@ class Product(models.Model):
                 "selected": self.category.category_name,
                 "full_path": self.category.get_full_path()
             })
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if self._changed_dashboard_inputs(adding, update_fields):
+            DashboardSnapshot.touch(DashboardSnapshot.SECTION_CATALOG)
+        self._remember_dashboard_inputs()
+
+    def reserved_quantity(self, now=None, exclude_interest_id=None):
+        """Quantity held by live seller-confirm reservations (see StockReservation)."""
+        holds = StockReservation.objects.filter(
+            product_id=self.pk,
+            status=StockReservation.STATUS_HELD,
+            expires_at__gt=now or timezone.now(),
+        )
+        if exclude_interest_id:
+            holds = holds.exclude(interest_id=exclude_interest_id)
+        return holds.aggregate(total=Coalesce(Sum('quantity'), Value(Decimal('0'))))['total']
+
+    def available_quantity(self, now=None, exclude_interest_id=None):
+        remaining = self.remaining_quantity if self.remaining_quantity is not None else (self.original_quantity or Decimal('0'))
+        return remaining - self.reserved_quantity(now=now, exclude_interest_id=exclude_interest_id)
 
     def update_stock_after_deal(self, sold_quantity):
-        """Update remaining quantity after a deal is confirmed"""
-        current_remaining = self.remaining_quantity
-        if current_remaining is None:
-            current_remaining = self.original_quantity or Decimal('0')
-
-        current_remaining -= Decimal(str(sold_quantity))
-
-        if current_remaining <= 0:
-            self.remaining_quantity = Decimal('0')
-            self.deal_status = self.DEAL_STATUS_OUT_OF_STOCK
-            self.status = self.STATUS_OUT_OF_STOCK
-            self.is_active = False
-        else:
-            self.remaining_quantity = current_remaining
-            self.deal_status = self.DEAL_STATUS_PARTIALLY_SOLD
-            self.status = self.STATUS_AVAILABLE
-
-        self.save(update_fields=['remaining_quantity', 'deal_status', 'status', 'is_active', 'updated_at'])
+        """
+        Take sold_quantity off the remaining stock in one conditional UPDATE, so
+        callers need no row lock. Returns False (row untouched) when less than
+        sold_quantity is left.
+        """
+        qty = Decimal(str(sold_quantity))
+        was_active = self.is_active
+        remaining = Coalesce(F('remaining_quantity'), F('original_quantity'), Value(Decimal('0')))
+        enough_stock = Q(remaining_quantity__gte=qty) | Q(remaining_quantity__isnull=True, original_quantity__gte=qty)
+        stock_left = Q(remaining_quantity__gt=qty) | Q(remaining_quantity__isnull=True, original_quantity__gt=qty)
+
+        # Status columns come before remaining_quantity: MySQL evaluates SET left to
+        # right, and every condition here must see the stock from before the deal.
+        updated = Product.objects.filter(enough_stock, pk=self.pk).update(
+            deal_status=Case(
+                When(stock_left, then=Value(self.DEAL_STATUS_PARTIALLY_SOLD)),
+                default=Value(self.DEAL_STATUS_OUT_OF_STOCK),
+            ),
+            status=Case(When(stock_left, then=Value(self.STATUS_AVAILABLE)), default=Value(self.STATUS_OUT_OF_STOCK)),
+            is_active=Case(When(stock_left, then=F('is_active')), default=Value(False)),
+            remaining_quantity=remaining - qty,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=self.STOCK_FIELDS)
+        # Only a sell-out (listing deactivated) moves the catalog numbers.
+        if updated and was_active and not self.is_active:
+            DashboardSnapshot.touch(DashboardSnapshot.SECTION_CATALOG)
+        self._remember_dashboard_inputs()
+        return bool(updated)
 
     def add_stock(self, added_quantity):
         """Increase available stock (does not replace existing remaining quantity)."""
@@ -560,27 +892,31 @@ class Product(models.Model):
         if qty <= 0:
             raise ValidationError({'quantity': 'Added quantity must be greater than 0.'})
 
-        current_remaining = self.remaining_quantity if self.remaining_quantity is not None else (self.original_quantity or Decimal('0'))
-        current_original = self.original_quantity if self.original_quantity is not None else current_remaining
-
-        self.remaining_quantity = current_remaining + qty
-        self.original_quantity = current_original + qty
-
-        if self.remaining_quantity <= 0:
-            self.remaining_quantity = Decimal('0')
-            self.deal_status = self.DEAL_STATUS_OUT_OF_STOCK
-            self.status = self.STATUS_OUT_OF_STOCK
-            self.is_active = False
-        else:
-            self.deal_status = (
-                self.DEAL_STATUS_AVAILABLE
-                if self.remaining_quantity == self.original_quantity
-                else self.DEAL_STATUS_PARTIALLY_SOLD
+        was_listed = self.is_active and self.status == self.STATUS_AVAILABLE
+        products = Product.objects.filter(pk=self.pk)
+        if self.remaining_quantity is None or self.original_quantity is None:
+            # Legacy rows may carry only one of the two quantities; fill the gap so the
+            # increment below is plain column arithmetic.
+            products.filter(remaining_quantity__isnull=True).update(
+                remaining_quantity=Coalesce(F('original_quantity'), Value(Decimal('0')))
             )
-            self.status = self.STATUS_AVAILABLE
-            self.is_active = True
+            products.filter(original_quantity__isnull=True).update(original_quantity=F('remaining_quantity'))
 
-        self.save(update_fields=['original_quantity', 'remaining_quantity', 'deal_status', 'status', 'is_active', 'updated_at'])
+        products.update(
+            deal_status=Case(
+                When(remaining_quantity=F('original_quantity'), then=Value(self.DEAL_STATUS_AVAILABLE)),
+                default=Value(self.DEAL_STATUS_PARTIALLY_SOLD),
+            ),
+            status=self.STATUS_AVAILABLE,
+            is_active=True,
+            remaining_quantity=F('remaining_quantity') + qty,
+            original_quantity=F('original_quantity') + qty,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=self.STOCK_FIELDS)
+        if not was_listed:
+            DashboardSnapshot.touch(DashboardSnapshot.SECTION_CATALOG)
+        self._remember_dashboard_inputs()
 
 
 # Product Image Model
@@ -636,7 +972,64 @@ class ProductVideo(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
 
-class ProductInterest(models.Model):
+class AppendStatusHistory(models.Func):
+    """
+    SQL expression that appends one negotiation_history entry per row, matching
+    the entry ProductInterest.save() writes. from_status reads each row's current
+    status, so it must be assigned before status in the same UPDATE.
+    """
+    output_field = models.JSONField()
+
+    def __init__(self, to_status, timestamp):
+        super().__init__(
+            F('negotiation_history'),
+            Value(f'status_changed_to_{to_status}'),
+            F('status'),
+            Value(to_status),
+            Value(timestamp),
+        )
+
+    def _compiled_args(self, compiler, connection):
+        sql_parts, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sql_parts.append(sql)
+            params.extend(expression_params)
+        return sql_parts, params
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f'AppendStatusHistory is not implemented for {connection.vendor}.')
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        sql_parts, params = self._compiled_args(compiler, connection)
+        history, action, from_status, to_status, timestamp = sql_parts
+        sql = (
+            f"JSON_ARRAY_APPEND(COALESCE({history}, JSON_ARRAY()), '$', JSON_OBJECT("
+            f"'action', {action}, 'from_status', {from_status}, 'to_status', {to_status}, 'timestamp', {timestamp}))"
+        )
+        return sql, params
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        sql_parts, params = self._compiled_args(compiler, connection)
+        history, action, from_status, to_status, timestamp = sql_parts
+        sql = (
+            f"json_insert(COALESCE({history}, '[]'), '$[#]', json_object("
+            f"'action', {action}, 'from_status', {from_status}, 'to_status', {to_status}, 'timestamp', {timestamp}))"
+        )
+        return sql, params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql_parts, params = self._compiled_args(compiler, connection)
+        history, action, from_status, to_status, timestamp = sql_parts
+        sql = (
+            f"(COALESCE({history}, '[]'::jsonb) || jsonb_build_array(jsonb_build_object("
+            f"'action', {action}::text, 'from_status', {from_status}, "
+            f"'to_status', {to_status}::text, 'timestamp', {timestamp}::text)))"
+        )
+        return sql, params
+
+
+class ProductInterest(DashboardInputsMixin, models.Model):
     STATUS_INTERESTED = 'interested'
     STATUS_SELLER_CONFIRMED = 'seller_confirmed'
     STATUS_DEAL_CONFIRMED = 'deal_confirmed'
@@ -649,6 +1042,7 @@ class ProductInterest(models.Model):
         (STATUS_REJECTED, 'Rejected'),
         (STATUS_CANCELLED, 'Cancelled')
     ]
+    DASHBOARD_FIELDS = ('status', 'is_active', 'buyer_offered_amount', 'buyer_id')
     transaction_id = models.CharField(max_length=20, unique=True, blank=True)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='interests')
     buyer = models.ForeignKey(DaalUser, on_delete=models.CASCADE, related_name='product_interests')
@@ -701,7 +1095,20 @@ class ProductInterest(models.Model):
         if self.buyer_required_quantity is not None and self.buyer_required_quantity <= 0:
             raise ValidationError({'buyer_required_quantity': 'Required quantity must be greater than 0.'})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def _original_status(self):
+        if hasattr(self, '_loaded_status'):
+            return self._loaded_status
+        # Instance built by hand with a pk rather than loaded from the database.
+        return ProductInterest.objects.filter(pk=self.pk).values_list('status', flat=True).first()
+
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
         if not self.transaction_id:
             self.transaction_id = generate_transaction_id()
 
@@ -709,33 +1116,193 @@ class ProductInterest(models.Model):
             self.snapshot_amount = self.product.amount
             self.snapshot_quantity = self.product.remaining_quantity or self.product.original_quantity
 
+        status_changed = False
         if self.pk:
-            try:
-                old = ProductInterest.objects.get(pk=self.pk)
-                if old.status != self.status:
-                    history_entry = {
-                        'action': f'status_changed_to_{self.status}',
-                        'from_status': old.status,
-                        'to_status': self.status,
-                        'timestamp': timezone.now().isoformat()
-                    }
-                    if not self.negotiation_history:
-                        self.negotiation_history = []
-                    history_list = list(self.negotiation_history)
-                    history_list.append(history_entry)
-                    self.negotiation_history = history_list
-            except ProductInterest.DoesNotExist:
-                pass
-
-        self.full_clean()
+            original_status = self._original_status()
+            if original_status is not None and original_status != self.status:
+                status_changed = True
+                history_entry = {
+                    'action': f'status_changed_to_{self.status}',
+                    'from_status': original_status,
+                    'to_status': self.status,
+                    'timestamp': timezone.now().isoformat()
+                }
+                history_list = list(self.negotiation_history or [])
+                history_list.append(history_entry)
+                self.negotiation_history = history_list
+                if update_fields is not None and 'negotiation_history' not in update_fields:
+                    kwargs['update_fields'] = list(update_fields) + ['negotiation_history']
+
+        # update_fields saves are internal lifecycle transitions on already-validated rows.
+        if update_fields is None:
+            self.full_clean()
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        if status_changed:
+            StockReservation.sync_for_status([self.pk], self.status)
+        changed = self._changed_dashboard_inputs(adding, kwargs.get('update_fields'))
+        if changed:
+            sections = [DashboardSnapshot.SECTION_DEALS]
+            # Buyer dashboards only count interests by status.
+            if {'status', 'buyer_id'} & changed:
+                sections.append(DashboardSnapshot.buyer_section(self.buyer_id))
+            DashboardSnapshot.touch(*sections)
+        self._remember_dashboard_inputs()
+
+    @classmethod
+    def bulk_transition(cls, queryset, to_status, **fields):
+        """
+        Move every interest in `queryset` to `to_status` with one UPDATE, appending
+        the same negotiation_history entry save() would. Extra `fields` are set on
+        the same statement. Rows already in `to_status` are left alone.
+        Returns the number of rows changed.
+        """
+        queryset = queryset.exclude(status=to_status)
+        rows = list(queryset.values_list('id', 'buyer_id'))
+        if not rows:
+            return 0
+        now = timezone.now()
+        # negotiation_history goes first: MySQL evaluates SET assignments left to right.
+        updated = queryset.update(
+            negotiation_history=AppendStatusHistory(to_status, now.isoformat()),
+            status=to_status,
+            updated_at=now,
+            **fields,
+        )
+        StockReservation.sync_for_status([interest_id for interest_id, _ in rows], to_status)
+        DashboardSnapshot.touch(
+            DashboardSnapshot.SECTION_DEALS,
+            *[DashboardSnapshot.buyer_section(buyer_id) for buyer_id in {buyer_id for _, buyer_id in rows if buyer_id}],
+        )
+        return updated
+
+    @classmethod
+    def reject_unfillable(cls, product, keep_interest_id=None, now=None):
+        """
+        After a deal, reject the product's other open (interested / seller-confirmed)
+        interests that the remaining unreserved stock can no longer cover. Interests
+        with a live stock hold keep their place. Returns the number of rows rejected.
+        """
+        now = now or timezone.now()
+        live_holds = StockReservation.objects.filter(
+            product_id=product.pk, status=StockReservation.STATUS_HELD, expires_at__gt=now
+        ).values('interest_id')
+        unfillable = cls.objects.filter(
+            product_id=product.pk,
+            is_active=True,
+            status__in=[cls.STATUS_INTERESTED, cls.STATUS_SELLER_CONFIRMED],
+            buyer_required_quantity__gt=product.available_quantity(now=now),
+        ).exclude(pk__in=live_holds)
+        if keep_interest_id:
+            unfillable = unfillable.exclude(pk=keep_interest_id)
+        return cls.bulk_transition(unfillable, cls.STATUS_REJECTED, is_active=False)
 
     @property
     def buyer_display_id(self):
         return self.buyer.buyer_unique_id or f"BUY-{self.buyer.id:06d}"
 
 
-class Contract(models.Model):
+class StockReservation(models.Model):
+    """
+    Seller-confirm hold on part of a product's remaining stock. A hold counts
+    against availability until it expires, is released (interest rejected or
+    cancelled) or is converted into a deal by the stock decrement.
+    """
+    STATUS_HELD = 'held'
+    STATUS_RELEASED = 'released'
+    STATUS_CONVERTED = 'converted'
+    STATUS_CHOICES = [
+        (STATUS_HELD, 'Held'),
+        (STATUS_RELEASED, 'Released'),
+        (STATUS_CONVERTED, 'Converted'),
+    ]
+    RELEASE_ON_INTEREST_STATUSES = (ProductInterest.STATUS_REJECTED, ProductInterest.STATUS_CANCELLED)
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_reservations')
+    interest = models.OneToOneField(ProductInterest, on_delete=models.CASCADE, related_name='stock_reservation')
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Stock Reservation"
+        verbose_name_plural = "Stock Reservations"
+        indexes = [models.Index(fields=['product', 'status', 'expires_at'])]
+
+    def __str__(self):
+        return f"{self.interest.transaction_id}: {self.quantity} ({self.status})"
+
+    @property
+    def is_live(self):
+        return self.status == self.STATUS_HELD and self.expires_at > timezone.now()
+
+    @classmethod
+    def hold(cls, interest, ttl=None):
+        """
+        Reserve interest.buyer_required_quantity on its product. Returns the
+        reservation, or None when the unreserved stock cannot cover it.
+        """
+        ttl = ttl or timedelta(minutes=getattr(settings, 'STOCK_RESERVATION_TTL_MINUTES', 24 * 60))
+        now = timezone.now()
+        with transaction.atomic():
+            # Product row lock serializes hold checks. Inside a caller's transaction.atomic()
+            # it is held until that outer transaction commits, not just for this block.
+            product = Product.objects.select_for_update().only(
+                'id', 'remaining_quantity', 'original_quantity'
+            ).get(pk=interest.product_id)
+            if interest.buyer_required_quantity > product.available_quantity(now=now, exclude_interest_id=interest.pk):
+                return None
+            reservation, _ = cls.objects.update_or_create(
+                interest=interest,
+                defaults={
+                    'product_id': interest.product_id,
+                    'quantity': interest.buyer_required_quantity,
+                    'status': cls.STATUS_HELD,
+                    'expires_at': now + ttl,
+                },
+            )
+        return reservation
+
+    @classmethod
+    def secure_for_deal(cls, interest, now=None):
+        """
+        Check that interest.buyer_required_quantity can become a deal without taking
+        stock another live hold covers. Passes straight away when the interest's own
+        hold is live and large enough; otherwise locks the product row like hold()
+        (until the caller's commit) and compares against the unreserved stock.
+        Returns (ok, available_quantity).
+        """
+        now = now or timezone.now()
+        quantity = interest.buyer_required_quantity or Decimal('0')
+        own_hold = cls.objects.filter(
+            interest_id=interest.pk, status=cls.STATUS_HELD, expires_at__gt=now, quantity__gte=quantity
+        ).values_list('quantity', flat=True).first()
+        if own_hold is not None:
+            return True, own_hold
+        product = Product.objects.select_for_update().only(
+            'id', 'remaining_quantity', 'original_quantity'
+        ).get(pk=interest.product_id)
+        available = product.available_quantity(now=now, exclude_interest_id=interest.pk)
+        return quantity <= available, max(available, Decimal('0'))
+
+    @classmethod
+    def sync_for_status(cls, interest_ids, interest_status):
+        """Release or convert the holds of interests that just moved to interest_status."""
+        if interest_status in cls.RELEASE_ON_INTEREST_STATUSES:
+            next_status = cls.STATUS_RELEASED
+        elif interest_status == ProductInterest.STATUS_DEAL_CONFIRMED:
+            next_status = cls.STATUS_CONVERTED
+        else:
+            return 0
+        return cls.objects.filter(interest_id__in=interest_ids, status=cls.STATUS_HELD).update(
+            status=next_status, updated_at=timezone.now()
+        )
+
+
+class Contract(DashboardInputsMixin, models.Model):
     """Model for confirmed deals/contracts"""
     contract_id = models.CharField(max_length=20, unique=True, blank=True)
     interest = models.OneToOneField(ProductInterest, on_delete=models.CASCADE, related_name='contract')
@@ -773,6 +1340,11 @@ class Contract(models.Model):
         (STATUS_CANCELLED, 'Cancelled'),
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+    # Columns read by the buyer dashboard (Api.views.BUYER_CONTRACT_ROW_FIELDS).
+    DASHBOARD_FIELDS = (
+        'buyer_id', 'seller_id', 'product_id', 'deal_amount', 'deal_quantity', 'quantity_unit',
+        'confirmed_at', 'status', 'loading_to',
+    )
     
     class Meta:
         ordering = ['-confirmed_at']
@@ -783,28 +1355,23 @@ class Contract(models.Model):
         return f"Contract: {self.contract_id} - {self.product.title}"
     
     def save(self, *args, **kwargs):
-        if self.contract_id:
-            super().save(*args, **kwargs)
-            return
-
-        last_error = None
-        for _ in range(5):
+        if not self.contract_id:
+            # The daily counter hands out each sequence number once, so no collision retry is needed.
             self.contract_id = generate_contract_id()
-            try:
-                super().save(*args, **kwargs)
-                return
-            except IntegrityError as exc:
-                # Retry only if contract_id collided due to concurrent insert.
-                if 'contract_id' not in str(exc).lower():
-                    raise
-                last_error = exc
-
-        if last_error:
-            raise last_error
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        # After the write; the version bump itself waits for the outer commit. The
+        # admin deals section reads interests, not contracts, so only buyers are touched.
+        if self._changed_dashboard_inputs(adding, kwargs.get('update_fields')):
+            previous_buyer_id = (getattr(self, '_loaded_dashboard_inputs', None) or {}).get('buyer_id')
+            DashboardSnapshot.touch(*[
+                DashboardSnapshot.buyer_section(buyer_id) for buyer_id in {self.buyer_id, previous_buyer_id} if buyer_id
+            ])
+        self._remember_dashboard_inputs()
         
 
 #16 feb
-class BranchMaster(models.Model):
+class BranchMaster(DashboardInputsMixin, models.Model):
     location_name = models.CharField(max_length=150)
     state = models.CharField(max_length=120)
     city = models.CharField(max_length=120)
@@ -813,6 +1380,8 @@ class BranchMaster(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    DASHBOARD_FIELDS = ('is_active',)
+
     class Meta:
         verbose_name = "Branch Master"
         verbose_name_plural = "Branch Masters"
@@ -841,6 +1410,231 @@ class BranchMaster(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if self._changed_dashboard_inputs(adding, kwargs.get('update_fields')):
+            DashboardSnapshot.touch(DashboardSnapshot.SECTION_CATALOG)
+        self._remember_dashboard_inputs()
+
+
+class DashboardSnapshot(models.Model):
+    """Precomputed admin dashboard numbers, refreshed section by section by brokers_app.dashboard."""
+    SCOPE_ADMIN = 'admin'
+    SECTION_USERS = 'users'
+    SECTION_CATALOG = 'catalog'
+    SECTION_DEALS = 'deals'
+    SECTIONS = (SECTION_USERS, SECTION_CATALOG, SECTION_DEALS)
+
+    scope = models.CharField(max_length=30, unique=True)
+    data = models.JSONField(default=dict, blank=True)
+    section_state = models.JSONField(default=dict, blank=True)
+    computed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Dashboard Snapshot"
+        verbose_name_plural = "Dashboard Snapshots"
+
+    def __str__(self):
+        return f"Dashboard snapshot ({self.scope})"
+
+    @staticmethod
+    def _version_key(section):
+        return f'dashboard_section_version:{section}'
+
+    @classmethod
+    def touch(cls, *sections):
+        """
+        Mark sections as changed once the current transaction commits; the next
+        dashboard read in any process recomputes only those.
+        """
+        bump_cache_version(*[cls._version_key(section) for section in sections])
+
+    @staticmethod
+    def buyer_section(buyer_id):
+        return f'buyer:{buyer_id}'
+
+    @classmethod
+    def section_version(cls, section):
+        return cache_version(cls._version_key(section))
+
+    @classmethod
+    def section_versions(cls):
+        return {section: cls.section_version(section) for section in cls.SECTIONS}
+
+
+
+class ExportJob(models.Model):
+    """A queued data export, written to MEDIA_ROOT/exports/ by the run_export_jobs worker."""
+    TYPE_CONTRACTS = 'contracts'
+    TYPE_OFFERS = 'offers'
+    TYPE_PRODUCTS = 'products'
+    TYPE_USERS = 'users'
+    TYPE_BRANDS = 'brands'
+    TYPE_CHOICES = [
+        (TYPE_CONTRACTS, 'Contracts'),
+        (TYPE_OFFERS, 'Offers / Interests'),
+        (TYPE_PRODUCTS, 'Products'),
+        (TYPE_USERS, 'Users / KYC'),
+        (TYPE_BRANDS, 'Brands'),
+    ]
+
+    FORMAT_CSV = 'csv'
+    FORMAT_CSV_GZ = 'csv.gz'
+    FORMAT_CHOICES = [
+        (FORMAT_CSV, 'CSV'),
+        (FORMAT_CSV_GZ, 'CSV (gzip)'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    requested_by = models.ForeignKey(DaalUser, on_delete=models.CASCADE, related_name='export_jobs')
+    export_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default=FORMAT_CSV)
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='exports/', blank=True, max_length=255)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Bumped by every progress write; a running job that stops moving is requeued.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
 
+    def __str__(self):
+        return f"Export #{self.id} {self.export_type} ({self.status})"
+
+    @property
+    def progress_percent(self):
+        if self.status == self.STATUS_COMPLETED:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
+
+
+class EmailOutbox(models.Model):
+    """Persistent queue of outgoing emails, delivered by brokers_app.mailer workers."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    category = models.CharField(max_length=50, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    sensitive = models.BooleanField(
+        default=False, help_text="Body is never stored; the queuing process holds it in memory until delivery."
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+        verbose_name = "Email Outbox"
+        verbose_name_plural = "Email Outbox"
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class AdminDigestEntry(models.Model):
+    """Admin notification held back for the next digest email (see ADMIN_NOTIFICATION_DIGEST_MINUTES)."""
+    category = models.CharField(max_length=50)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    recipients = models.JSONField(default=list)
+    batch = models.CharField(max_length=32, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    digested_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Admin Digest Entry"
+        verbose_name_plural = "Admin Digest Entries"
+
+    def __str__(self):
+        return f"{self.category}: {self.subject} ({'sent' if self.digested_at else 'waiting'})"
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a POST sent with an Idempotency-Key header (see brokers_app.utils.idempotent)."""
+    user = models.ForeignKey(DaalUser, on_delete=models.CASCADE, related_name='idempotency_keys')
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    # Null while the first request is still running.
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=500, blank=True)
+    response_body = models.BinaryField(blank=True, default=b'')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'scope', 'key')
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.status_code or 'in progress'})"
+
+
+class LocationArea(models.Model):
+    """Local India state -> city -> area (post office) directory behind the location dropdowns."""
+    SOURCE_BUNDLED = 'bundled'
+    SOURCE_FILE = 'file'
+    SOURCE_REMOTE = 'remote'
+    SOURCE_CHOICES = [
+        (SOURCE_BUNDLED, 'Bundled starter file'),
+        (SOURCE_FILE, 'Directory file'),
+        (SOURCE_REMOTE, 'Remote refresh'),
+    ]
+
+    state = models.CharField(max_length=120)
+    city = models.CharField(max_length=120)
+    # Blank for city-only rows (city known, no post office list loaded yet).
+    area = models.CharField(max_length=150, blank=True)
+    pincode = models.CharField(max_length=6, blank=True)
+    # States that only have bundled starter rows still fall back to the remote lookups.
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default=SOURCE_FILE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('state', 'city', 'area')
+        indexes = [models.Index(fields=['state', 'city'])]
+        verbose_name = "Location Area"
+        verbose_name_plural = "Location Areas"
+
+    def __str__(self):
+        return " / ".join(part for part in (self.state, self.city, self.area) if part)
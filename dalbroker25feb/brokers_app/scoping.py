@@ -0,0 +1,197 @@
+"""
+Role-based queryset scoping shared by the views and the background export jobs.
+
+Kept out of views.py so non-request code (brokers_app.exports, management
+commands) can reuse the same visibility rules without importing the views.
+"""
+from django.db.models import Count, Max, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Contract, Product, ProductInterest
+from .utils import has_permission
+
+PENDING_INTEREST_STATUSES = (
+    ProductInterest.STATUS_INTERESTED,
+    ProductInterest.STATUS_SELLER_CONFIRMED,
+)
+
+
+def _is_admin_user(user):
+    """Check if user is Admin or SuperAdmin"""
+    return bool(
+        user and user.is_authenticated and (
+            user.is_superuser or
+            user.is_staff or
+            user.is_admin or
+            user.role in ('super_admin', 'admin')
+        )
+    )
+
+
+def _is_super_admin_user(user):
+    return bool(
+        user and user.is_authenticated and (
+            user.is_superuser or user.role == 'super_admin'
+        )
+    )
+
+
+def _is_seller_user(user):
+    """Check if user is Seller"""
+    return bool(
+        user and user.is_authenticated and (
+            user.is_seller or
+            user.role in ('seller', 'both_sellerandbuyer')
+        )
+    )
+
+
+def _is_buyer_user(user):
+    """Check if user is Buyer"""
+    return bool(
+        user and user.is_authenticated and (
+            user.is_buyer or
+            user.role in ('buyer', 'both_sellerandbuyer')
+        )
+    )
+
+
+def _actor_unique_id(user):
+    return _actor_unique_id_from_pk(user.id) if user else "-"
+
+
+def _actor_unique_id_from_pk(user_id):
+    return f"USR{user_id:05d}" if user_id else "-"
+
+
+def _with_interest_summary(queryset):
+    """Annotate pending_interest_count and highest_bid per product with correlated subqueries."""
+    active_interests = ProductInterest.objects.filter(product=OuterRef('pk'), is_active=True).order_by()
+    return queryset.annotate(
+        pending_interest_count=Coalesce(
+            Subquery(
+                active_interests.filter(status__in=PENDING_INTEREST_STATUSES).values('product').annotate(
+                    count=Count('pk')
+                ).values('count')[:1]
+            ),
+            0,
+        ),
+        highest_bid=Subquery(
+            active_interests.values('product').annotate(
+                highest=Max('buyer_offered_amount')
+            ).values('highest')[:1]
+        ),
+    )
+
+
+def _base_product_queryset(viewer=None):
+    """
+    Base queryset for products with related data and interest summary annotations.
+    Only the viewer's own interests are prefetched (as viewer_interests), newest first.
+    """
+    queryset = _with_interest_summary(
+        Product.objects.select_related(
+            'category',
+            'brand',
+            'seller',
+        ).prefetch_related('images')
+    )
+    if viewer is not None and viewer.is_authenticated:
+        queryset = queryset.prefetch_related(
+            Prefetch(
+                'interests',
+                queryset=ProductInterest.objects.filter(buyer=viewer).select_related('buyer', 'seller').order_by('-created_at'),
+                to_attr='viewer_interests',
+            )
+        )
+    return queryset
+
+
+def _products_for_user(user):
+    """
+    Filter products based on user role:
+    - SuperAdmin: Can see all products
+    - Admin: Can see all products
+    - Staff: Can view all products (read-only)
+    - Seller: Can see only their own products
+    - Buyer: Can see active products (excluding their own)
+    """
+    if not user or not user.is_authenticated:
+        return Product.objects.none()
+
+    # SuperAdmin and Admin can see all products
+    if user.is_superuser or user.role in ('super_admin', 'admin'):
+        return _base_product_queryset(viewer=user)
+
+    # Staff can view all products (read-only access)
+    if user.is_staff:
+        return _base_product_queryset(viewer=user)
+
+    # Role-permission fallback: allow full product visibility when explicitly granted.
+    if any(
+        has_permission(user, 'product_management', action_name)
+        for action_name in ('read', 'create', 'update', 'delete')
+    ):
+        return _base_product_queryset(viewer=user)
+
+    # Sellers can only see their own products
+    if user.is_seller or user.role in ('seller', 'both_sellerandbuyer'):
+        return _base_product_queryset(viewer=user).filter(seller=user)
+
+    # Buyers can see active products (excluding their own)
+    if user.is_buyer or user.role in ('buyer', 'both_sellerandbuyer'):
+        return _base_product_queryset(viewer=user).filter(is_active=True).exclude(seller=user)
+
+    return Product.objects.none()
+
+
+def _contracts_for_user(user):
+    """Contracts visible to the user: all for admins, otherwise their own side only."""
+    if _is_admin_user(user):
+        return Contract.objects.all()
+    if _is_seller_user(user):
+        return Contract.objects.filter(seller=user)
+    if _is_buyer_user(user):
+        return Contract.objects.filter(buyer=user)
+    return Contract.objects.none()
+
+
+def _apply_contract_list_filters(params, contracts):
+    """status / seller / buyer / search filters shared by the contracts list, export and export jobs."""
+    status = params.get('status')
+    if status:
+        contracts = contracts.filter(status=status)
+
+    seller_id = params.get('seller')
+    if seller_id and seller_id.isdigit():
+        contracts = contracts.filter(seller_id=int(seller_id))
+
+    buyer_id = params.get('buyer')
+    if buyer_id and buyer_id.isdigit():
+        contracts = contracts.filter(buyer_id=int(buyer_id))
+
+    search = params.get('search', '').strip()
+    if search:
+        contracts = contracts.filter(
+            Q(contract_id__icontains=search) |
+            Q(product__title__icontains=search)
+        )
+    return contracts
+
+
+def _offers_for_user(user):
+    """
+    Interests visible in offer listings: buyers and sellers see their own side,
+    admins everything, and any other role nothing.
+    """
+    role = (getattr(user, 'role', '') or '').strip().lower()
+    queryset = ProductInterest.objects.all()
+    if role == 'buyer':
+        return queryset.filter(buyer=user)
+    if _is_seller_user(user) and not _is_admin_user(user):
+        return queryset.filter(seller=user)
+    if _is_admin_user(user):
+        return queryset
+    if _is_buyer_user(user):
+        return queryset.filter(buyer=user)
+    return queryset.none()
@@ -1,3 +1,292 @@
-from django.test import TestCase
+import json
+import threading
+import time
+import unittest
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+
+from .models import (
+    CategoryMaster,
+    DaalUser,
+    DailySequence,
+    IdempotencyKey,
+    Product,
+    ProductInterest,
+    StockReservation,
+    next_daily_sequence,
+)
+from .utils import IDEMPOTENCY_KEY_HEADER, idempotent
+
+# SQLite serializes every writer on a database-wide lock, so contention tests
+# only say something on the row-locking databases production runs on.
+ROW_LOCKING_DB = unittest.skipIf(
+    connection.vendor == 'sqlite', 'Row-level contention needs MySQL or PostgreSQL.'
+)
+
+
+def run_concurrently(func, count):
+    """Call func(index) from `count` threads released together; returns the results in index order."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+    errors = []
+
+    def target(index):
+        try:
+            barrier.wait()
+            results[index] = func(index)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+class MarketFixtureMixin:
+    def make_market(self, stock='100'):
+        self.seller = DaalUser.objects.create_user(
+            mobile='9000000001', username='seller', email='seller@example.com', first_name='Seller',
+            password='x', role='seller',
+        )
+        self.buyer = DaalUser.objects.create_user(
+            mobile='9000000002', username='buyer', email='buyer@example.com', first_name='Buyer',
+            password='x', role='buyer',
+        )
+        self.product = Product.objects.create(
+            title='Tur dal', category=CategoryMaster.objects.create(category_name='Tur'), seller=self.seller,
+            amount=Decimal('5000'), quantity_unit='qtl', loading_location='Nagpur',
+            original_quantity=Decimal(stock), remaining_quantity=Decimal(stock),
+        )
+
+    def make_interest(self, quantity, **fields):
+        return ProductInterest.objects.create(
+            product=self.product, buyer=self.buyer, seller=self.seller,
+            buyer_offered_amount=Decimal('5000'), buyer_required_quantity=Decimal(quantity), **fields
+        )
+
+
+class DailySequenceTests(TestCase):
+    def test_values_are_gap_free_per_name_and_day(self):
+        day, next_day = date(2026, 3, 1), date(2026, 3, 2)
+        self.assertEqual([next_daily_sequence('contract', day) for _ in range(3)], [1, 2, 3])
+        self.assertEqual([next_daily_sequence('interest', day) for _ in range(2)], [1, 2])
+        self.assertEqual([next_daily_sequence('contract', next_day) for _ in range(2)], [1, 2])
+        self.assertEqual(next_daily_sequence('contract', day), 4)
+        self.assertEqual(DailySequence.objects.get(name='contract', day=day).last_value, 4)
+
+    def test_seed_is_only_read_for_a_new_day(self):
+        seed_calls = []
+
+        def seed():
+            seed_calls.append(1)
+            return 41
+
+        day = date(2026, 3, 1)
+        self.assertEqual(next_daily_sequence('contract', day, seed=seed), 42)
+        self.assertEqual(next_daily_sequence('contract', day, seed=seed), 43)
+        self.assertEqual(len(seed_calls), 1)
+
+
+@ROW_LOCKING_DB
+class DailySequenceContentionTests(TransactionTestCase):
+    def test_concurrent_first_of_day_callers_get_distinct_values(self):
+        day = date(2026, 3, 1)
+        batches = run_concurrently(lambda index: [next_daily_sequence('contract', day) for _ in range(5)], 8)
+        self.assertEqual(sorted(value for batch in batches for value in batch), list(range(1, 41)))
+
+
+class BulkTransitionTests(MarketFixtureMixin, TestCase):
+    def test_appends_status_history_to_existing_entries(self):
+        self.make_market()
+        interest = self.make_interest('5')
+        interest.status = ProductInterest.STATUS_SELLER_CONFIRMED
+        interest.save()
+
+        changed = ProductInterest.bulk_transition(
+            ProductInterest.objects.filter(pk=interest.pk), ProductInterest.STATUS_REJECTED, is_active=False
+        )
+        interest.refresh_from_db()
+        self.assertEqual(changed, 1)
+        self.assertEqual(interest.status, ProductInterest.STATUS_REJECTED)
+        self.assertFalse(interest.is_active)
+        self.assertEqual(
+            [(entry['action'], entry['from_status'], entry['to_status']) for entry in interest.negotiation_history],
+            [
+                ('status_changed_to_seller_confirmed', 'interested', 'seller_confirmed'),
+                ('status_changed_to_rejected', 'seller_confirmed', 'rejected'),
+            ],
+        )
+
+    def test_rows_already_in_target_status_are_left_alone(self):
+        self.make_market()
+        interest = self.make_interest('5', status=ProductInterest.STATUS_REJECTED)
+
+        changed = ProductInterest.bulk_transition(
+            ProductInterest.objects.filter(pk=interest.pk), ProductInterest.STATUS_REJECTED
+        )
+        interest.refresh_from_db()
+        self.assertEqual(changed, 0)
+        self.assertEqual(interest.negotiation_history, [])
+
+
+class StockUpdateTests(MarketFixtureMixin, TestCase):
+    def test_oversell_returns_false_and_leaves_quantity_unchanged(self):
+        self.make_market(stock='10')
+        self.assertFalse(self.product.update_stock_after_deal(Decimal('11')))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.remaining_quantity, Decimal('10'))
+        self.assertEqual(self.product.status, Product.STATUS_AVAILABLE)
+        self.assertTrue(self.product.is_active)
+
+    def test_selling_the_last_unit_marks_the_product_out_of_stock(self):
+        self.make_market(stock='10')
+        self.assertTrue(self.product.update_stock_after_deal(Decimal('4')))
+        self.assertEqual(self.product.remaining_quantity, Decimal('6'))
+        self.assertEqual(self.product.deal_status, Product.DEAL_STATUS_PARTIALLY_SOLD)
+
+        self.assertTrue(self.product.update_stock_after_deal(Decimal('6')))
+        self.assertEqual(self.product.remaining_quantity, Decimal('0'))
+        self.assertEqual(self.product.status, Product.STATUS_OUT_OF_STOCK)
+        self.assertEqual(self.product.deal_status, Product.DEAL_STATUS_OUT_OF_STOCK)
+        self.assertFalse(self.product.is_active)
+        self.assertFalse(self.product.update_stock_after_deal(Decimal('1')))
+
+
+@ROW_LOCKING_DB
+class StockUpdateContentionTests(MarketFixtureMixin, TransactionTestCase):
+    def test_concurrent_deals_never_oversell(self):
+        self.make_market(stock='10')
+        results = run_concurrently(
+            lambda index: Product.objects.get(pk=self.product.pk).update_stock_after_deal(Decimal('3')), 6
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(results.count(True), 3)
+        self.assertEqual(self.product.remaining_quantity, Decimal('1'))
+
+
+class StockReservationTests(MarketFixtureMixin, TestCase):
+    def test_second_hold_beyond_unreserved_stock_returns_none(self):
+        self.make_market(stock='10')
+        self.assertIsNotNone(StockReservation.hold(self.make_interest('6')))
+        self.assertIsNone(StockReservation.hold(self.make_interest('5')))
+        self.assertEqual(self.product.reserved_quantity(), Decimal('6'))
+
+    def test_rejecting_an_interest_releases_its_hold(self):
+        self.make_market(stock='10')
+        interest = self.make_interest('6')
+        StockReservation.hold(interest)
+        interest.status = ProductInterest.STATUS_REJECTED
+        interest.save()
+        self.assertIsNotNone(StockReservation.hold(self.make_interest('5')))
+
+    def test_secure_for_deal_does_not_take_stock_held_for_another_interest(self):
+        self.make_market(stock='10')
+        held = self.make_interest('6')
+        StockReservation.hold(held)
+        self.assertEqual(StockReservation.secure_for_deal(self.make_interest('5')), (False, Decimal('4')))
+        self.assertTrue(StockReservation.secure_for_deal(held)[0])
+
+    def test_reject_unfillable_only_touches_open_interests(self):
+        self.make_market(stock='10')
+        interested = self.make_interest('20')
+        cancelled = self.make_interest('20', status=ProductInterest.STATUS_CANCELLED)
+        fillable = self.make_interest('5')
+
+        self.assertEqual(ProductInterest.reject_unfillable(self.product), 1)
+        statuses = dict(ProductInterest.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[interested.pk], ProductInterest.STATUS_REJECTED)
+        self.assertEqual(statuses[cancelled.pk], ProductInterest.STATUS_CANCELLED)
+        self.assertEqual(statuses[fillable.pk], ProductInterest.STATUS_INTERESTED)
+
+
+@ROW_LOCKING_DB
+class StockReservationContentionTests(MarketFixtureMixin, TransactionTestCase):
+    def test_concurrent_holds_never_exceed_stock(self):
+        self.make_market(stock='10')
+        interests = [self.make_interest('4') for _ in range(5)]
+        results = run_concurrently(lambda index: StockReservation.hold(interests[index]), len(interests))
+        self.assertEqual(sum(result is not None for result in results), 2)
+        self.assertEqual(self.product.reserved_quantity(), Decimal('8'))
+
+
+class IdempotentTests(MarketFixtureMixin, TestCase):
+    def setUp(self):
+        self.make_market()
+        self.factory = RequestFactory()
+        self.calls = 0
+
+    def make_view(self, status):
+        @idempotent('test_scope')
+        def view(request):
+            self.calls += 1
+            return JsonResponse({'success': status < 400, 'call': self.calls}, status=status)
+        return view
+
+    def post(self, view, key='retry-1', quantity='5'):
+        request = self.factory.post(
+            '/test/', data=f'{{"quantity": "{quantity}"}}', content_type='application/json',
+            headers={IDEMPOTENCY_KEY_HEADER: key},
+        )
+        request.user = self.buyer
+        return view(request)
+
+    def test_replay_returns_the_stored_success_response(self):
+        view = self.make_view(201)
+        first = self.post(view)
+        replay = self.post(view)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(json.loads(replay.content), json.loads(first.content))
+
+    def test_server_errors_are_never_replayed(self):
+        view = self.make_view(500)
+        self.post(view)
+        retry = self.post(view)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(retry.status_code, 500)
+        self.assertFalse(retry.has_header('Idempotent-Replayed'))
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_reusing_a_key_for_a_different_request_is_rejected(self):
+        view = self.make_view(201)
+        self.post(view)
+        self.assertEqual(self.post(view, quantity='6').status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+
+@ROW_LOCKING_DB
+class IdempotentContentionTests(MarketFixtureMixin, TransactionTestCase):
+    def test_concurrent_retries_run_the_view_once(self):
+        self.make_market()
+        calls = []
+
+        @idempotent('test_scope')
+        def view(request):
+            calls.append(1)
+            time.sleep(0.5)
+            return JsonResponse({'success': True}, status=201)
+
+        def post(index):
+            request = RequestFactory().post(
+                '/test/', data='{}', content_type='application/json',
+                headers={IDEMPOTENCY_KEY_HEADER: 'retry-1'},
+            )
+            request.user = self.buyer
+            return view(request).status_code
+
+        statuses = run_concurrently(post, 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(statuses.count(201), 1)
+        self.assertEqual(statuses.count(409), 3)
@@ -73,6 +73,12 @@ urlpatterns = [
     path('api/contracts/<int:contract_id>/update/', contract_update_ajax, name='contract_update_ajax'),
     path('api/contracts/export/', contracts_export_csv, name='contracts_export_csv'),
 
+    # Background exports
+    path('api/exports/', export_job_list_ajax, name='export_job_list_ajax'),
+    path('api/exports/create/', export_job_create_ajax, name='export_job_create_ajax'),
+    path('api/exports/<int:job_id>/', export_job_status_ajax, name='export_job_status_ajax'),
+    path('api/exports/<int:job_id>/download/', export_job_download, name='export_job_download'),
+
     # Product Image Management
     path('product-images/', product_image_list_view, name='product_image_list'),
     path('api/product-images/create/', product_image_create_ajax, name='product_image_create_ajax'),
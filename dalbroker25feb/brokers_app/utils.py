@@ -1,10 +1,36 @@
-from .models import RolePermission
+from .models import (
+    ROLE_PERMISSIONS_CACHE_VERSION,
+    CategoryMaster,
+    IdempotencyKey,
+    RolePermission,
+    cache_version,
+)
 from functools import wraps
-from django.http import JsonResponse
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+import base64
 import hashlib
+import json
+import threading
+import time
+import zlib
 
 VALID_USER_STATUSES = {'active', 'deactivated', 'suspended'}
 
+# Upper bound on how long a process keeps its matrix even if no version bump is seen.
+PERMISSION_MATRIX_MAX_AGE_SECONDS = 60
+CATEGORY_TREE_CACHE_TTL_SECONDS = 24 * 60 * 60
+_permission_matrix_lock = threading.Lock()
+_permission_matrix = {'version': None, 'loaded_at': 0.0, 'entries': {}}
+
 
 def normalize_user_status(value):
     normalized = str(value or '').strip().lower()
@@ -92,6 +118,37 @@ def get_contract_display_ids(contract, viewer, is_admin=False):
     }
 
 
+def _permission_matrix_is_current(version):
+    return (
+        _permission_matrix['version'] == version
+        and time.monotonic() - _permission_matrix['loaded_at'] < PERMISSION_MATRIX_MAX_AGE_SECONDS
+    )
+
+
+def get_permission_matrix():
+    """
+    Return {(role, module, action): is_allowed} for every RolePermission row.
+    Kept per process and reloaded when the shared RolePermission version moves
+    or the copy is older than PERMISSION_MATRIX_MAX_AGE_SECONDS.
+    """
+    version = cache_version(ROLE_PERMISSIONS_CACHE_VERSION)
+    if _permission_matrix_is_current(version):
+        return _permission_matrix['entries']
+
+    with _permission_matrix_lock:
+        if not _permission_matrix_is_current(version):
+            entries = {
+                (role, module, action): is_allowed
+                for role, module, action, is_allowed in RolePermission.objects.values_list(
+                    'role', 'module', 'action', 'is_allowed'
+                )
+            }
+            _permission_matrix['entries'] = entries
+            _permission_matrix['version'] = version
+            _permission_matrix['loaded_at'] = time.monotonic()
+        return _permission_matrix['entries']
+
+
 def has_permission(user, module, action):
     """
     Check if a user has permission to perform an action on a module.
@@ -111,17 +168,205 @@ def has_permission(user, module, action):
     if user.is_superuser or user.is_staff or user.is_admin or user.role== 'super_admin':
         return True
     
-    # Check if the user's role has permission for this module and action
-    try:
-        permission = RolePermission.objects.get(
-            role=user.role,
-            module=module,
-            action=action
+    # Check if the user's role has permission for this module and action.
+    # If no explicit permission is set, deny access by default.
+    return get_permission_matrix().get((user.role, module, action), False)
+
+
+def get_category_tree():
+    """
+    Nested tree of active categories built from a single query.
+    Each node: id, category_name, level, path, is_active, full_path, children.
+    Cached per CategoryMaster.tree_version(), so any category write rebuilds it.
+    """
+    cache_key = f'category_tree:{CategoryMaster.tree_version()}'
+    tree = cache.get(cache_key)
+    if tree is not None:
+        return tree
+
+    rows = CategoryMaster.objects.filter(is_active=True).order_by('category_name').values(
+        'id', 'category_name', 'level', 'path', 'is_active', 'parent_id'
+    )
+    children_by_parent = {}
+    for row in rows:
+        children_by_parent.setdefault(row.pop('parent_id'), []).append(row)
+
+    # Walk from the roots so children of inactive parents stay hidden, as before.
+    tree = children_by_parent.get(None, [])
+    pending = [(node, node['category_name']) for node in tree]
+    while pending:
+        node, full_path = pending.pop()
+        node['full_path'] = full_path
+        node['children'] = children_by_parent.get(node['id'], [])
+        pending.extend(
+            (child, f"{full_path} > {child['category_name']}") for child in node['children']
         )
-        return permission.is_allowed
-    except RolePermission.DoesNotExist:
-        # If no explicit permission is set, deny access by default
-        return False
+
+    cache.set(cache_key, tree, CATEGORY_TREE_CACHE_TTL_SECONDS)
+    return tree
+
+
+TIME_SERIES_TRUNCATORS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def _time_series_period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _time_series_bucket_starts(now, periods, granularity):
+    current = _time_series_period_start(now.date(), granularity)
+    starts = [current]
+    for _ in range(periods - 1):
+        if granularity == 'month':
+            current = (current - timedelta(days=1)).replace(day=1)
+        else:
+            current -= timedelta(days=7 if granularity == 'week' else 1)
+        starts.append(current)
+    starts.reverse()
+    return [
+        timezone.make_aware(datetime(start.year, start.month, start.day), now.tzinfo)
+        for start in starts
+    ]
+
+
+def _fill_time_series(bucket_starts, totals_by_period):
+    series = []
+    for start in bucket_starts:
+        row = totals_by_period.get(start, {})
+        series.append({
+            'period': start,
+            'total': row.get('total') or Decimal('0'),
+            'count': row.get('count') or 0,
+        })
+    return series
+
+
+def time_series(queryset, date_field, sum_field, periods, granularity='month', now=None):
+    """
+    Sum(sum_field) and Count per calendar day/week/month for the last `periods`
+    buckets (current one included), in a single grouped query.
+    Returns [{'period': datetime, 'total': Decimal, 'count': int}, ...] oldest first,
+    with zero rows for buckets that had no data.
+    """
+    truncate = TIME_SERIES_TRUNCATORS[granularity]
+    now = timezone.localtime(now or timezone.now())
+    bucket_starts = _time_series_bucket_starts(now, max(1, periods), granularity)
+
+    rows = queryset.filter(**{f'{date_field}__gte': bucket_starts[0]}).annotate(
+        period=truncate(date_field)
+    ).values('period').annotate(
+        total=Sum(sum_field),
+        count=Count('pk'),
+    ).order_by('period')
+    totals_by_period = {row['period']: row for row in rows if row['period']}
+    return _fill_time_series(bucket_starts, totals_by_period)
+
+
+def time_series_from_rows(rows, periods, granularity='month', now=None):
+    """
+    Same output as time_series(), bucketed in Python from already fetched
+    (moment, amount) pairs so several windows can share one query.
+    """
+    now = timezone.localtime(now or timezone.now())
+    bucket_starts = _time_series_bucket_starts(now, max(1, periods), granularity)
+    totals_by_period = {start: {'total': Decimal('0'), 'count': 0} for start in bucket_starts}
+
+    for moment, amount in rows:
+        if not moment:
+            continue
+        local_day = timezone.localtime(moment).date()
+        day = _time_series_period_start(local_day, granularity)
+        start = timezone.make_aware(datetime(day.year, day.month, day.day), now.tzinfo)
+        bucket = totals_by_period.get(start)
+        if bucket is not None:
+            bucket['total'] += amount or 0
+            bucket['count'] += 1
+    return _fill_time_series(bucket_starts, totals_by_period)
+
+
+def _cursor_value(item, field):
+    return item[field] if isinstance(item, dict) else getattr(item, field)
+
+
+def encode_cursor(values):
+    payload = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    """Decode an encode_cursor() token back to typed field values; ValueError if malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError('Cursor does not match ordering.')
+        decoded = [model._meta.get_field(field).to_python(value) for field, value in zip(ordering, values)]
+    except (TypeError, ValidationError) as exc:
+        raise ValueError('Invalid cursor.') from exc
+    if any(value is None for value in decoded):
+        raise ValueError('Invalid cursor.')
+    return decoded
+
+
+def keyset_after_q(ordering, values):
+    """Rows strictly after `values` for a descending sort on `ordering`."""
+    condition = Q()
+    for index, field in enumerate(ordering):
+        step = Q(**{f'{field}__lt': values[index]})
+        for previous_field, previous_value in zip(ordering[:index], values[:index]):
+            step &= Q(**{previous_field: previous_value})
+        condition |= step
+    return condition
+
+
+def cursor_paginate(queryset, ordering, cursor, page_size):
+    """
+    Keyset pagination for infinite scroll. `ordering` lists descending sort fields
+    ending with a unique one, e.g. ('created_at', 'id'); works on model and .values() querysets.
+    No COUNT query is run and the cost of a page does not depend on how deep it is.
+    Raises ValueError for a malformed cursor.
+    """
+    queryset = queryset.order_by(*[f'-{field}' for field in ordering])
+    cursor = (cursor or '').strip()
+    if cursor:
+        queryset = queryset.filter(keyset_after_q(ordering, decode_cursor(cursor, queryset.model, ordering)))
+
+    items = list(queryset[:page_size + 1])
+    has_next = len(items) > page_size
+    items = items[:page_size]
+    next_cursor = encode_cursor([_cursor_value(items[-1], field) for field in ordering]) if has_next else None
+    return items, {
+        'mode': 'cursor',
+        'page_size': page_size,
+        'has_next': has_next,
+        'next_cursor': next_cursor,
+    }
+
+
+def iter_keyset(queryset, ordering, fields, batch_size):
+    """
+    Yield values_list() rows of `fields` for a descending sort on `ordering`
+    (ending with a unique field), reading batch_size rows per keyset query.
+    Unlike .iterator(), this bounds memory on MySQL, where mysqlclient
+    buffers a whole result set on the client.
+    """
+    queryset = queryset.order_by(*[f'-{field}' for field in ordering]).values_list(*ordering, *fields)
+    width = len(ordering)
+    batch = list(queryset[:batch_size])
+    while batch:
+        for row in batch:
+            yield row[width:]
+        if len(batch) < batch_size:
+            return
+        batch = list(queryset.filter(keyset_after_q(ordering, batch[-1][:width]))[:batch_size])
 
 
 def check_permission(module, action):
@@ -144,6 +389,134 @@ def check_permission(module, action):
     return decorator
 
 
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_MAX_LENGTH = 100
+# Besides 2xx, only the views' own conflict answers are final enough to replay. Auth and
+# validation rejections (401/403/400...) may succeed on a later retry, e.g. after KYC approval.
+IDEMPOTENCY_REPLAYABLE_ERROR_STATUSES = {409, 422}
+# An in-progress record older than this belongs to a worker that died mid-request.
+IDEMPOTENCY_IN_FLIGHT_TIMEOUT = timedelta(seconds=getattr(settings, 'IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS', 120))
+
+
+def _request_fingerprint(request):
+    digest = hashlib.sha256(f"{request.method} {request.path}".encode('utf-8'))
+    if request.content_type == 'multipart/form-data':
+        # Hash the parsed form instead of request.body, which would pull uploads into memory.
+        for name, values in sorted(request.POST.lists()):
+            digest.update(json.dumps([name, values]).encode('utf-8'))
+        for name, files in sorted(request.FILES.lists()):
+            digest.update(json.dumps([name, [(f.name, f.size) for f in files]]).encode('utf-8'))
+    else:
+        digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _replay_idempotent_response(record):
+    response = HttpResponse(
+        zlib.decompress(bytes(record.response_body)) if record.response_body else b'',
+        status=record.status_code,
+        content_type=record.content_type or None,
+    )
+    if record.location:
+        response['Location'] = record.location
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _begin_idempotent_request(user, scope, key, fingerprint):
+    """Return (record, None) when the caller should run the view, or (None, response) to short-circuit."""
+    now = timezone.now()
+    ttl = timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user, scope=scope, key=key, request_hash=fingerprint, expires_at=now + ttl
+                )
+            return record, None
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+            if existing is None or existing.expires_at <= now:
+                IdempotencyKey.objects.filter(user=user, scope=scope, key=key, expires_at__lte=now).delete()
+                continue
+            if existing.status_code is None and existing.created_at <= now - IDEMPOTENCY_IN_FLIGHT_TIMEOUT:
+                IdempotencyKey.objects.filter(pk=existing.pk, status_code__isnull=True).delete()
+                continue
+            if existing.request_hash != fingerprint:
+                return None, JsonResponse(
+                    {'success': False, 'message': 'Idempotency-Key was already used for a different request.'},
+                    status=422,
+                )
+            if existing.status_code is None:
+                return None, JsonResponse(
+                    {'success': False, 'message': 'A request with this Idempotency-Key is still being processed.'},
+                    status=409,
+                )
+            return None, _replay_idempotent_response(existing)
+    return None, JsonResponse(
+        {'success': False, 'message': 'A request with this Idempotency-Key is still being processed.'},
+        status=409,
+    )
+
+
+def _is_replayable(response):
+    if getattr(response, 'streaming', False):
+        return False
+    return 200 <= response.status_code < 300 or response.status_code in IDEMPOTENCY_REPLAYABLE_ERROR_STATUSES
+
+
+def _finish_idempotent_request(record, response):
+    if not _is_replayable(response):
+        # Nothing final to store; let the client retry for real.
+        record.delete()
+        return
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status_code=response.status_code,
+        content_type=response.get('Content-Type', ''),
+        location=response.get('Location', '')[:500],
+        response_body=zlib.compress(response.content),
+    )
+
+
+def idempotent(scope):
+    """
+    Decorator for POST views. A retry carrying the same Idempotency-Key header
+    gets the stored response back instead of running the view (and its writes)
+    again. Requests without the header are unaffected.
+
+    Usage:
+        @login_required
+        @require_POST
+        @idempotent('product_confirm_deal')
+        def some_view(request, ...):
+            ...
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            key = (request.headers.get(IDEMPOTENCY_KEY_HEADER) or '').strip()
+            if not key or not request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+            if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                return JsonResponse(
+                    {'success': False, 'message': f'{IDEMPOTENCY_KEY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters.'},
+                    status=400,
+                )
+
+            record, response = _begin_idempotent_request(request.user, scope, key, _request_fingerprint(request))
+            if response is not None:
+                return response
+            try:
+                response = view_func(request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+            _finish_idempotent_request(record, response)
+            return response
+        return _wrapped
+    return decorator
+
+
 def is_admin_user(user):
     return bool(user and user.is_authenticated and (user.is_superuser or user.is_staff or user.is_admin or user.role in ('super_admin', 'admin')))
 
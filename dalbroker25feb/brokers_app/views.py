@@ -3,15 +3,14 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
-from django.http import JsonResponse
-from .models import DaalUser, CategoryMaster, subCategoryMaster, BrandMaster, Product, ProductImage, ProductInterest, Contract, BranchMaster, TagMaster, MAX_DOCUMENT_FILE_SIZE
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from .models import DaalUser, DashboardSnapshot, ExportJob, CategoryMaster, subCategoryMaster, BrandMaster, Product, ProductImage, ProductInterest, Contract, BranchMaster, StockReservation, TagMaster, MAX_DOCUMENT_FILE_SIZE
 from django import forms
 import json
 import logging
 import re
 import os
 from datetime import datetime
-from threading import Thread
 from decimal import Decimal, InvalidOperation
 from django.contrib.auth.forms import AuthenticationForm
 from .utils import has_permission, check_permission, admin_or_seller_required, is_buyer_user
@@ -19,17 +18,13 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.db import transaction, IntegrityError
 from django.views.decorators.http import require_GET, require_POST, require_http_methods
-from django.db.models import Max, Prefetch, Q, Count, Sum, F, DecimalField
+from django.db.models import Exists, Max, OuterRef, Prefetch, Q, Count, Subquery, Sum, F, DecimalField
 from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.core.paginator import Paginator
-from django.core.mail import send_mail
 from django.utils import timezone
 from django.urls import reverse
 from Api.utils import (
-    fetch_states,
-    fetch_cities,
-    fetch_areas,
     send_account_activated_email_async,
     send_account_suspended_email_async,
     send_welcome_credentials_email_async,
@@ -41,6 +36,35 @@ from .utils import (
     get_user_status,
     normalize_user_status,
     get_contract_display_ids,
+    cursor_paginate,
+    get_category_tree,
+    idempotent,
+)
+from .dashboard import BROKERAGE_RATE, get_admin_dashboard_snapshot
+from .locations import get_areas, get_cities, get_states
+from .scoping import (
+    PENDING_INTEREST_STATUSES,
+    _actor_unique_id,
+    _actor_unique_id_from_pk,
+    _apply_contract_list_filters,
+    _base_product_queryset,
+    _contracts_for_user,
+    _is_admin_user,
+    _is_buyer_user,
+    _is_seller_user,
+    _is_super_admin_user,
+    _offers_for_user,
+    _products_for_user,
+    _with_interest_summary,
+)
+from .mailer import queue_admin_notification, queue_email
+from .exports import (
+    ADMIN_ONLY_EXPORT_TYPES,
+    CONTRACT_EXPORT_HEADER,
+    iter_contract_export_rows,
+    iter_csv_lines,
+    iter_encoded,
+    iter_gzip,
 )
 from decimal import Decimal
 
@@ -60,17 +84,19 @@ USER_STATUS_ACTIVE = 'active'
 USER_STATUS_DEACTIVATED = 'deactivated'
 USER_STATUS_SUSPENDED = 'suspended'
 VALID_USER_STATUSES = {USER_STATUS_ACTIVE, USER_STATUS_DEACTIVATED, USER_STATUS_SUSPENDED}
-PENDING_INTEREST_STATUSES = (
-    ProductInterest.STATUS_INTERESTED,
-    ProductInterest.STATUS_SELLER_CONFIRMED,
+OFFERS_PAGE_SIZE = 50
+OFFERS_MAX_PAGE_SIZE = 200
+OFFERS_STREAM_CHUNK_SIZE = 500
+OFFER_ROW_FIELDS = (
+    'id', 'created_at', 'transaction_id', 'status', 'delivery_date',
+    'snapshot_amount', 'snapshot_quantity', 'buyer_offered_amount', 'buyer_required_quantity',
+    'buyer_remark', 'seller_remark', 'superadmin_remark',
+    'product_id', 'product__title', 'product__status', 'product__deal_status',
+    'product__amount', 'product__amount_unit',
+    'buyer_id', 'buyer__username', 'seller_id', 'seller__username',
 )
 
 
-def _run_in_background(fn, *args, **kwargs):
-    thread = Thread(target=fn, args=args, kwargs=kwargs, daemon=True)
-    thread.start()
-
-
 def _effective_user_status(user):
     return normalize_user_status(get_user_status(user))
 
@@ -190,42 +216,6 @@ def _paginate_queryset(request, queryset, page_param='page', page_size=DEFAULT_P
 
 # ===================== PERMISSION HELPER FUNCTIONS =====================
 
-def _is_admin_user(user):
-    """Check if user is Admin or SuperAdmin"""
-    return bool(
-        user and user.is_authenticated and (
-            user.is_superuser or 
-            user.is_staff or 
-            user.is_admin or 
-            user.role in ('super_admin', 'admin')
-        )
-    )
-
-def _is_super_admin_user(user):
-    return bool(
-        user and user.is_authenticated and (
-            user.is_superuser or user.role == 'super_admin'
-        )
-    )
-
-def _is_seller_user(user):
-    """Check if user is Seller"""
-    return bool(
-        user and user.is_authenticated and (
-            user.is_seller or 
-            user.role in ('seller', 'both_sellerandbuyer')
-        )
-    )
-
-def _is_buyer_user(user):
-    """Check if user is Buyer"""
-    return bool(
-        user and user.is_authenticated and (
-            user.is_buyer or 
-            user.role in ('buyer', 'both_sellerandbuyer')
-        )
-    )
-
 def _check_admin_seller_buyer(user, module=None, action='read'):
     """Check if user is admin/seller/buyer or has explicit module permission."""
     if not user or not user.is_authenticated:
@@ -432,60 +422,14 @@ def _extract_tag_ids_from_payload(payload):
     #===========end=================
 
 
-# ===================== BASE QUERYSET FUNCTIONS =====================
-def _base_product_queryset():
-    """Base queryset for products with all related data"""
-    return Product.objects.select_related(
-        'category', 
-        'brand', 
-        'seller',
-    ).prefetch_related(
-        'images',
-        Prefetch(
-            'interests',
-            queryset=ProductInterest.objects.select_related('buyer', 'seller').order_by('-created_at')
-        ),
-    ).annotate(
-        highest_bid=Max('interests__buyer_offered_amount', filter=Q(interests__is_active=True))
-    )
-
-def _products_for_user(user):
-    """
-    Filter products based on user role:
-    - SuperAdmin: Can see all products
-    - Admin: Can see all products
-    - Staff: Can view all products (read-only)
-    - Seller: Can see only their own products
-    - Buyer: Can see active products (excluding their own)
-    """
+def _viewer_interest(product, user):
+    """Most recent interest of `user` on `product`, using the viewer prefetch when present."""
     if not user or not user.is_authenticated:
-        return Product.objects.none()
-    
-    # SuperAdmin and Admin can see all products
-    if user.is_superuser or user.role in ('super_admin', 'admin'):
-        return _base_product_queryset()
-    
-    # Staff can view all products (read-only access)
-    if user.is_staff:
-        return _base_product_queryset()
-    
-    # Role-permission fallback: allow full product visibility when explicitly granted.
-    if any(
-        has_permission(user, 'product_management', action_name)
-        for action_name in ('read', 'create', 'update', 'delete')
-    ):
-        return _base_product_queryset()
-    
-    # Sellers can only see their own products
-    if user.is_seller or user.role in ('seller', 'both_sellerandbuyer'):
-        return _base_product_queryset().filter(seller=user)
-    
-    # Buyers can see active products (excluding their own)
-    if user.is_buyer or user.role in ('buyer', 'both_sellerandbuyer'):
-        return _base_product_queryset().filter(is_active=True).exclude(seller=user)
-    
-    return Product.objects.none()
-
+        return None
+    viewer_interests = getattr(product, 'viewer_interests', None)
+    if viewer_interests is not None:
+        return next((item for item in viewer_interests if item.buyer_id == user.id), None)
+    return product.interests.select_related('buyer', 'seller').filter(buyer=user).order_by('-created_at').first()
 
 def _product_images_for_user(user):
     queryset = ProductImage.objects.select_related('product', 'product__seller').order_by('-created_at')
@@ -565,20 +509,18 @@ def _interest_response_data(interest, viewer=None):
 def _product_response_data(product):
     """Format product data for JSON response"""
     primary_image = product.images.filter(is_primary=True).first() or product.images.first()
-    interests = list(product.interests.all()) if hasattr(product, 'interests') else []
     user = getattr(product, '_context_user', None)
-    
-    interested_buyers = [
-        _interest_response_data(i, user) for i in interests
-        if i.status in PENDING_INTEREST_STATUSES and i.is_active
-    ]
+    pending_interests = product.interests.select_related('buyer', 'seller').filter(
+        status__in=PENDING_INTEREST_STATUSES,
+        is_active=True,
+    ).order_by('-created_at')
+    interested_buyers = [_interest_response_data(i, user) for i in pending_interests]
     
     my_interest = None
     if user and user.is_authenticated and _is_buyer_user(user):
-        for item in interests:
-            if item.buyer_id == user.id:
-                my_interest = _interest_response_data(item, user)
-                break
+        viewer_interest = _viewer_interest(product, user)
+        if viewer_interest:
+            my_interest = _interest_response_data(viewer_interest, user)
 
     return {
         'id': product.id,
@@ -624,10 +566,6 @@ def _product_response_data(product):
     }
 
 
-def _actor_unique_id(user):
-    return f"USR{user.id:05d}" if user else "-"
-
-
 def _can_manage_brand(user, action):
     if not user or not user.is_authenticated:
         return False
@@ -741,7 +679,7 @@ def _parse_product_payload(payload):
 
 
 def _send_deal_confirmation_emails(product, buyer, seller):
-    """Send deal confirmation emails to buyer and seller"""
+    """Queue deal confirmation emails to buyer and seller"""
     product_details = [
         f"Product Title: {product.title}",
         f"Category: {product.category.category_name}",
@@ -773,16 +711,7 @@ def _send_deal_confirmation_emails(product, buyer, seller):
             "Thank you for using Agro Broker."
             f"{EMAIL_SIGNATURE}"
         )
-        try:
-            send_mail(
-                subject=buyer_subject,
-                message=buyer_message,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
-                recipient_list=[buyer.email],
-                fail_silently=False,
-            )
-        except Exception:
-            logger.exception('Deal-complete email to buyer failed user_id=%s product_id=%s', buyer.id, product.id)
+        queue_email(buyer_subject, buyer_message, [buyer.email], category='deal_confirmed_buyer')
 
     if seller.email:
         seller_subject = "Agro Broker - Deal Confirmed Successfully"
@@ -796,20 +725,11 @@ def _send_deal_confirmation_emails(product, buyer, seller):
             "Thank you for using Agro Broker."
             f"{EMAIL_SIGNATURE}"
         )
-        try:
-            send_mail(
-                subject=seller_subject,
-                message=seller_message,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
-                recipient_list=[seller.email],
-                fail_silently=False,
-            )
-        except Exception:
-            logger.exception('Deal-complete email to seller failed user_id=%s product_id=%s', seller.id, product.id)
+        queue_email(seller_subject, seller_message, [seller.email], category='deal_confirmed_seller')
 
 
 def _send_contract_confirmation_email_to_admins(contract, product, interest):
-    """Send deal-confirmation email to all active admin/superadmin accounts."""
+    """Queue deal-confirmation email to all active admin/superadmin accounts (or the admin digest)."""
     dated = timezone.now().strftime('%d/%m/%Y')
     ref_no = f"{contract.contract_id} : {dated}"
     seller_name = product.seller.company_name or product.seller.username
@@ -838,45 +758,27 @@ Rate : {rate}
 Loading From {loading_dates}
 Condition : {condition}
 """
-    recipient_list = list(
-        DaalUser.objects.filter(
-            Q(role__in=['admin', 'super_admin'])
-            | Q(is_superuser=True)
-            | Q(is_admin=True)
-            | Q(is_staff=True),
-            is_active=True,
-            email__isnull=False,
-        )
-        .exclude(email='')
-        .values_list('email', flat=True)
-        .distinct()
-    )
+    recipient_list = DaalUser.admin_recipient_emails(include_staff=True)
     if not recipient_list:
         logger.warning('No active admin emails found for deal-confirm notification contract_id=%s', contract.contract_id)
         return 0
 
-    try:
-        sent_count = send_mail(
-            subject='Jhawar Business Consulting Solutions - Deal Confirmed',
-            message=email_body,
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
-            recipient_list=recipient_list,
-            fail_silently=False,
-        )
-        logger.info(
-            'Deal-confirm email dispatched contract_id=%s sent_count=%s recipients=%s',
-            contract.contract_id,
-            sent_count,
-            recipient_list,
-        )
-        return sent_count
-    except Exception:
-        logger.exception('Failed to send deal-confirm email to admins contract_id=%s', contract.contract_id)
-        return 0
+    queue_admin_notification(
+        'Jhawar Business Consulting Solutions - Deal Confirmed',
+        email_body,
+        recipient_list,
+        category='deal_confirmed_admin',
+    )
+    logger.info(
+        'Deal-confirm email queued contract_id=%s recipients=%s',
+        contract.contract_id,
+        len(recipient_list),
+    )
+    return len(recipient_list)
 
 
 def _send_seller_confirmed_email_to_buyer(product, buyer, seller):
-    """Send email to buyer when seller confirms interest"""
+    """Queue email to buyer when seller confirms interest"""
     if not buyer.email:
         return
     subject = 'Agro Broker - Seller Confirmed Your Interest'
@@ -889,16 +791,7 @@ def _send_seller_confirmed_email_to_buyer(product, buyer, seller):
         f'Loading Location: {product.loading_location}\n'
         f'{EMAIL_SIGNATURE}'
     )
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
-            recipient_list=[buyer.email],
-            fail_silently=False,
-        )
-    except Exception:
-        logger.exception('Seller-confirmed email to buyer failed user_id=%s product_id=%s', buyer.id, product.id)
+    queue_email(subject, message, [buyer.email], category='seller_confirmed_buyer')
 
 
 # ===================== AUTHENTICATION VIEWS =====================
@@ -965,61 +858,15 @@ def dashboard_view(request):
         messages.error(request, msg or 'You do not have permission to access this page.')
         return redirect('login')
 
-    now = timezone.now()
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    year_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    # Existing calculations
-    active_sellers = DaalUser.objects.filter(
-        is_active=True,
-        role__in=['seller', 'both_sellerandbuyer']
-    ).count()
-
-    active_buyers = DaalUser.objects.filter(
-        is_active=True,
-        role__in=['buyer', 'both_sellerandbuyer']
-    ).count()
+    snapshot = get_admin_dashboard_snapshot()
+    users = snapshot[DashboardSnapshot.SECTION_USERS]
+    catalog = snapshot[DashboardSnapshot.SECTION_CATALOG]
+    deals = snapshot[DashboardSnapshot.SECTION_DEALS]
 
-    active_transporters = DaalUser.objects.filter(
-        is_active=True,
-        role='transporter'
-    ).count()
-
-    active_admins = DaalUser.objects.filter(
-        is_active=True
-    ).filter(
-        Q(is_admin=True) | Q(is_staff=True) | Q(is_superuser=True) | Q(role='admin')
-    ).distinct().count()
-
-    branches_count = BranchMaster.objects.filter(is_active=True).count()
-    listed_skus = Product.objects.filter(is_active=True).values('category_id').distinct().count()
-
-    pending_dispatches = Product.objects.filter(
-        status=Product.STATUS_SOLD_PENDING_CONFIRMATION
-    ).count()
-
-    deals_in_negotiation = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_INTERESTED,
-        is_active=True,
-    ).count()
-
-    active_contracts = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_SELLER_CONFIRMED,
-        is_active=True,
-    ).count()
-
-    finalized_deals_mtd = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_DEAL_CONFIRMED,
-        updated_at__gte=month_start,
-    ).count()
-
-    sold_mtd_total = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_DEAL_CONFIRMED,
-        updated_at__gte=month_start,
-    ).aggregate(total=Sum('buyer_offered_amount')).get('total') or Decimal('0')
+    sold_mtd_total = Decimal(deals['sold_mtd_total'])
 
     # Calculate brokerage (assuming 4% rate)
-    brokerage_rate = 4.0
+    brokerage_rate = BROKERAGE_RATE
     brokerage_earned_mtd = sold_mtd_total * Decimal(brokerage_rate / 100)
 
     # Dummy values for features not implemented yet
@@ -1030,51 +877,11 @@ def dashboard_view(request):
     at_risk_amount = 1250000
     capacity_utilized = 78
 
-    # Chart data calculations
-    gtv_deals_data = []
-    for i in range(6, -1, -1):
-        month_date = (now - timezone.timedelta(days=30*i)).replace(day=1)
-        next_month = (month_date + timezone.timedelta(days=32)).replace(day=1)
-        month_gtv = ProductInterest.objects.filter(
-            status=ProductInterest.STATUS_DEAL_CONFIRMED,
-            updated_at__gte=month_date,
-            updated_at__lt=next_month
-        ).aggregate(total=Sum('buyer_offered_amount')).get('total') or Decimal('0')
-        month_deals = ProductInterest.objects.filter(
-            status=ProductInterest.STATUS_DEAL_CONFIRMED,
-            updated_at__gte=month_date,
-            updated_at__lt=next_month
-        ).count()
-        month_name = month_date.strftime('%b')
-        gtv_deals_data.append({
-            'month': month_name,
-            'gtv': float(month_gtv),
-            'deals': month_deals
-        })
+    gtv_deals_data = deals['gtv_deals']
 
     # Pipeline by stage
-    pipeline_data = ProductInterest.objects.values('status').annotate(count=Count('id')).order_by('status')
-    pipeline_dict = {item['status']: item['count'] for item in pipeline_data}
     pipeline_stages = ['interested', 'seller_confirmed', 'deal_confirmed']
-    pipeline_values = [pipeline_dict.get(status, 0) for status in pipeline_stages]
-
-    # Commodity mix (by category)
-    commodity_data = Product.objects.filter(is_active=True).values('category__category_name').annotate(
-        volume=Count('id')
-    ).order_by('-volume')[:5]
-    commodity_labels = [item['category__category_name'] for item in commodity_data]
-    commodity_volumes = [item['volume'] for item in commodity_data]
-
-    # Top buyers (by GTV)
-    top_buyers_data = ProductInterest.objects.filter(
-        status=ProductInterest.STATUS_DEAL_CONFIRMED,
-        updated_at__gte=year_start,
-        buyer__is_active=True
-    ).values('buyer__first_name', 'buyer__last_name').annotate(
-        gtv=Coalesce(Sum('buyer_offered_amount'), Decimal(0), output_field=DecimalField())
-    ).order_by('-gtv')[:5]
-    top_buyers_labels = [f"{item['buyer__first_name']} {item['buyer__last_name']}" for item in top_buyers_data]
-    top_buyers_gtv = [float(item['gtv']) for item in top_buyers_data]
+    pipeline_values = [deals['pipeline'].get(status, 0) for status in pipeline_stages]
 
     # Transporter SLA (dummy for now)
     transporter_sla_labels = ['TransCo Logistics', 'FastMove Carriers', 'RoadRunner Transport', 'Speedy Deliveries']
@@ -1087,7 +894,9 @@ def dashboard_view(request):
 
     # User distribution
     user_distribution_labels = ['Sellers', 'Buyers', 'Transporters', 'Admins']
-    user_distribution_counts = [active_sellers, active_buyers, active_transporters, active_admins]
+    user_distribution_counts = [
+        users['active_sellers'], users['active_buyers'], users['active_transporters'], users['active_admins'],
+    ]
 
     # Branch performance (dummy for now)
     branch_performance = [
@@ -1137,85 +946,28 @@ def dashboard_view(request):
         }
     ]
 
-    # Recent activities
-    recent_interests = ProductInterest.objects.select_related(
-        'product', 'buyer', 'seller'
-    ).filter(
-        buyer__is_active=True,
-        seller__is_active=True
-    ).order_by('-updated_at')[:6]
-    recent_activities = []
-    for interest in recent_interests:
-        if interest.status == ProductInterest.STATUS_DEAL_CONFIRMED:
-            activity_type = 'trade'
-            icon = 'shopping-cart'
-            title = 'Deal Finalized'
-            desc = f"#{interest.id} • {interest.product.title[:20]}... • Buyer: {interest.buyer.first_name} {interest.buyer.last_name} • Seller: {interest.seller.first_name} {interest.seller.last_name}"
-        elif interest.status == ProductInterest.STATUS_SELLER_CONFIRMED:
-            activity_type = 'contract'
-            icon = 'file-signature'
-            title = 'Contract Signed'
-            desc = f"#{interest.id} • {interest.product.title[:20]}... • Brokerage: ₹{(interest.buyer_offered_amount or 0) * Decimal(0.04):,.0f}"
-        else:
-            activity_type = 'trade'
-            icon = 'balance-scale'
-            title = 'Negotiation Updated'
-            desc = f"#{interest.id} • {interest.product.title[:20]}... • Offer: ₹{(interest.buyer_offered_amount or 0):,.0f}/qtl"
-        recent_activities.append({
-            'type': activity_type,
-            'icon': icon,
-            'title': title,
-            'description': desc,
-            'time': interest.updated_at.strftime('%H:%M %d/%m')
-        })
-
-    # Recent contracts
-    recent_contracts_qs = ProductInterest.objects.select_related(
-        'product__category', 'buyer', 'seller'
-    ).filter(
-        status=ProductInterest.STATUS_DEAL_CONFIRMED,
-        buyer__is_active=True,
-        seller__is_active=True
-    ).order_by('-updated_at')[:5]
-    recent_contracts = []
-    for interest in recent_contracts_qs:
-        recent_contracts.append({
-            'id': f'#CNT-{interest.id}',
-            'seller': f"{interest.seller.first_name} {interest.seller.last_name}",
-            'buyer': f"{interest.buyer.first_name} {interest.buyer.last_name}",
-            'commodity': interest.product.category.category_name,
-            'quantity': '80 Qtl',
-            'rate': f"₹{(interest.buyer_offered_amount or 0):,.0f}/qtl",
-            'value': f"₹{(interest.buyer_offered_amount or 0):,.0f}",
-            'brokerage': f"₹{(interest.buyer_offered_amount or 0) * Decimal(0.04):,.0f}",
-            'payment_status': 'Fully Paid',
-            'delivery_status': 'Delivered',
-            'transporter': 'TransCo Logistics',
-            'branch': 'Nagpur'
-        })
-
     # Prepare dashboard data
     dashboard_data = {
         'kpis': {
-            'activeContracts': active_contracts,
+            'activeContracts': deals['active_contracts'],
             'gtv': f'₹{sold_mtd_total:,.2f}',
             'brokerageEarned': f'₹{brokerage_earned_mtd:,.2f}',
             'brokerageRate': brokerage_rate,
-            'pendingDispatches': pending_dispatches,
-            'activeSellers': active_sellers,
-            'listedSkus': listed_skus,
-            'activeBuyers': active_buyers,
-            'finalDeals': finalized_deals_mtd,
+            'pendingDispatches': catalog['pending_dispatches'],
+            'activeSellers': users['active_sellers'],
+            'listedSkus': catalog['listed_skus'],
+            'activeBuyers': users['active_buyers'],
+            'finalDeals': deals['finalized_deals_mtd'],
             'openComplaints': open_complaints,
             'onTimeDelivery': on_time_delivery_percent,
             'avgTransit': avg_transit_days,
             'paymentsOverdue': payments_overdue,
             'atRisk': at_risk_amount,
-            'activeTransporters': active_transporters,
+            'activeTransporters': users['active_transporters'],
             'capacityUtilized': capacity_utilized,
-            'branches': branches_count,
-            'admins': active_admins,
-            'negotiation': deals_in_negotiation,
+            'branches': catalog['branches'],
+            'admins': users['active_admins'],
+            'negotiation': deals['deals_in_negotiation'],
             'avgTTC': 3.8
         },
         'charts': {
@@ -1229,12 +981,12 @@ def dashboard_view(request):
                 'values': pipeline_values
             },
             'commodityMix': {
-                'labels': commodity_labels,
-                'volumes': commodity_volumes
+                'labels': catalog['commodity_mix']['labels'],
+                'volumes': catalog['commodity_mix']['volumes']
             },
             'topBuyers': {
-                'labels': top_buyers_labels,
-                'gtvValues': top_buyers_gtv
+                'labels': deals['top_buyers']['labels'],
+                'gtvValues': deals['top_buyers']['gtv_values']
             },
             'transporterSLA': {
                 'labels': transporter_sla_labels,
@@ -1251,8 +1003,8 @@ def dashboard_view(request):
             }
         },
         'branchPerformance': branch_performance,
-        'recentActivities': recent_activities,
-        'recentContracts': recent_contracts
+        'recentActivities': deals['recent_activities'],
+        'recentContracts': deals['recent_contracts']
     }
 
     context = {
@@ -1645,6 +1397,14 @@ def _category_delete_block_message(category):
     )
 
 
+def _with_active_children_flag(queryset):
+    return queryset.annotate(
+        has_active_children=Exists(
+            CategoryMaster.objects.filter(parent_id=OuterRef('pk'), is_active=True)
+        )
+    )
+
+
 def _safe_category_full_path(category):
     """
     Keep category detail API stable even if malformed parent links exist.
@@ -1959,14 +1719,9 @@ def category_tree_ajax(request):
     
     if request.method == 'GET':
         try:
-            root_categories = CategoryMaster.objects.filter(parent=None, is_active=True).order_by('category_name')
-            
-            from Api.serializers import CategoryTreeSerializer
-            tree_data = CategoryTreeSerializer(root_categories, many=True).data
-            
             return JsonResponse({
                 'success': True,
-                'tree': tree_data
+                'tree': get_category_tree()
             })
         except Exception as e:
             return JsonResponse({'success': False, 'message': f'Error fetching category tree: {str(e)}'})
@@ -1982,7 +1737,9 @@ def category_children_ajax(request, parent_id):
     if request.method == 'GET':
         try:
             parent_category = CategoryMaster.objects.get(id=parent_id, is_active=True)
-            children = parent_category.children.filter(is_active=True).order_by('category_name')
+            children = _with_active_children_flag(
+                parent_category.children.filter(is_active=True)
+            ).order_by('category_name')
             
             children_data = []
             for child in children:
@@ -1990,7 +1747,7 @@ def category_children_ajax(request, parent_id):
                     'id': child.id,
                     'name': child.category_name,
                     'level': child.level,
-                    'has_children': child.children.filter(is_active=True).exists(),
+                    'has_children': child.has_active_children,
                     'full_path': child.get_full_path()
                 })
             
@@ -2015,6 +1772,7 @@ def category_path_ajax(request, category_id):
         try:
             category = CategoryMaster.objects.get(id=category_id, is_active=True)
             ancestors = category.get_ancestors()
+            root = ancestors[0] if ancestors else category
             
             path_data = {
                 'current': {
@@ -2023,7 +1781,7 @@ def category_path_ajax(request, category_id):
                     'level': category.level
                 },
                 'ancestors': [{'id': anc.id, 'name': anc.category_name, 'level': anc.level} for anc in ancestors],
-                'root': {'id': category.get_root_category().id, 'name': category.get_root_category().category_name},
+                'root': {'id': root.id, 'name': root.category_name},
                 'full_path': category.get_full_path(),
                 'path_ids': [anc.id for anc in ancestors] + [category.id]
             }
@@ -2068,7 +1826,7 @@ def category_search_ajax(request):
                 except ValueError:
                     pass
             
-            categories = queryset.order_by('path', 'category_name')[:50]
+            categories = _with_active_children_flag(queryset).order_by('path', 'category_name')[:50]
             
             categories_data = []
             for cat in categories:
@@ -2078,7 +1836,7 @@ def category_search_ajax(request):
                     'level': cat.level,
                     'parent_id': cat.parent_id,
                     'full_path': cat.get_full_path(),
-                    'has_children': cat.children.filter(is_active=True).exists()
+                    'has_children': cat.has_active_children
                 })
             
             return JsonResponse({
@@ -2487,10 +2245,10 @@ def location_states_ajax(request):
         return blocked
         
     try:
-        states = fetch_states()
+        states = get_states()
         return JsonResponse({'success': True, 'states': states})
     except Exception:
-        logger.exception('Failed to fetch states from external API')
+        logger.exception('Failed to load states')
         return JsonResponse({'success': False, 'message': 'Unable to load states right now.'}, status=503)
 
 
@@ -2509,10 +2267,10 @@ def location_cities_ajax(request):
     if not state:
         return JsonResponse({'success': False, 'message': 'State is required.'}, status=400)
     try:
-        cities = fetch_cities(state)
+        cities = get_cities(state)
         return JsonResponse({'success': True, 'cities': cities})
     except Exception:
-        logger.exception('Failed to fetch cities for state=%s', state)
+        logger.exception('Failed to load cities for state=%s', state)
         return JsonResponse({'success': False, 'message': 'Unable to load cities right now.'}, status=503)
 
 
@@ -2532,10 +2290,16 @@ def location_areas_ajax(request):
     if not state or not city:
         return JsonResponse({'success': False, 'message': 'State and city are required.'}, status=400)
     try:
-        areas = fetch_areas(state, city)
+        areas = get_areas(state, city)
+        if not areas:
+            return JsonResponse({
+                'success': True,
+                'areas': [],
+                'message': 'No areas on file for this city. Please enter area manually.',
+            })
         return JsonResponse({'success': True, 'areas': areas})
     except Exception as exc:
-        logger.warning('Failed to fetch areas for state=%s city=%s error=%s', state, city, str(exc))
+        logger.warning('Failed to load areas for state=%s city=%s error=%s', state, city, str(exc))
         return JsonResponse({
             'success': True,
             'areas': [],
@@ -2823,19 +2587,11 @@ def product_list_view(request):
 
     page_obj, pagination = _paginate_queryset(request, products_qs)
     products = page_obj.object_list
-    all_visible_products = list(products_qs)
 
     for product in products:
         product._context_user = request.user
-        pending_count = 0
-        my_interest = None
-        for interest in product.interests.all():
-            if interest.status in PENDING_INTEREST_STATUSES and interest.is_active:
-                pending_count += 1
-            if interest.buyer_id == request.user.id:
-                my_interest = interest
-        product.interested_count = pending_count
-        product.my_interest = my_interest
+        product.interested_count = product.pending_interest_count
+        product.my_interest = _viewer_interest(product, request.user)
 
     if _is_admin_user(request.user):
         sellers = DaalUser.objects.filter(
@@ -2858,7 +2614,7 @@ def product_list_view(request):
 
     edit_product_id = (request.GET.get('edit_product') or '').strip()
     if edit_product_id.isdigit():
-        edit_product = next((p for p in all_visible_products if p.id == int(edit_product_id)), None)
+        edit_product = products_qs.filter(pk=int(edit_product_id)).first()
         if edit_product:
             edit_product._context_user = request.user
         else:
@@ -2905,6 +2661,7 @@ def product_list_view(request):
 
 @login_required
 @require_POST
+@idempotent('product_create')
 def product_create_ajax(request):
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
@@ -3092,7 +2849,7 @@ def product_update_ajax(request, product_id):
             setattr(product, key, value)
         product.seller = seller
         product.save()
-        product = _base_product_queryset().get(id=product.id)
+        product = _base_product_queryset(viewer=request.user).get(id=product.id)
         product._context_user = request.user
         return _success_response('Product updated successfully.', product)
     except ValidationError as exc:
@@ -3201,6 +2958,7 @@ def product_toggle_ajax(request, product_id):
 
 @login_required
 @require_POST
+@idempotent('product_show_interest')
 def product_show_interest_ajax(request, product_id):
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
@@ -3280,7 +3038,7 @@ def product_show_interest_ajax(request, product_id):
             is_active=True
         )
 
-        # Send email to seller
+        # Notify admins of the new interest
         dated = timezone.now().strftime('%d/%m/%Y')
         seller_name = product.seller.company_name or product.seller.username
         seller_location = product.loading_location.split(' -> ')[0] if product.loading_location else ''
@@ -3305,21 +3063,10 @@ Qty : {qty}
 Rate : {rate}
 Condition : {condition}
 """
-        try:
-            admin_emails = DaalUser.objects.filter(
-                Q(role__in=['admin', 'super_admin']) | Q(is_superuser=True),
-                is_active=True,
-                email__isnull=False
-            ).exclude(email='').values_list('email', flat=True)
-            send_mail(
-                subject='INTERESTED MESSAGE',
-                message=email_body,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
-                recipient_list=list(admin_emails),
-                fail_silently=True,
-            )
-        except Exception as e:
-            logger.exception('Failed to send interest email to admins product_id=%s', product.id)
+        # Queued in the outbox with the interest row; SMTP delivery happens after commit.
+        queue_admin_notification(
+            'INTERESTED MESSAGE', email_body, DaalUser.admin_recipient_emails(), category='interest_admin'
+        )
 
     return _success_response('Interest submitted successfully.', interest)
 
@@ -3382,36 +3129,10 @@ def contracts_list_ajax(request):
     """Get contracts list based on user role"""
     user = request.user
     
-    if _is_admin_user(user):
-        contracts = Contract.objects.all()
-    elif _is_seller_user(user):
-        contracts = Contract.objects.filter(seller=user)
-    elif _is_buyer_user(user):
-        contracts = Contract.objects.filter(buyer=user)
-    else:
-        contracts = Contract.objects.none()
-    
-    contracts = contracts.select_related('product', 'buyer', 'seller').order_by('-confirmed_at')
+    contracts = _contracts_for_user(user).select_related('product', 'buyer', 'seller').order_by('-confirmed_at')
     
     # Apply filters
-    status = request.GET.get('status')
-    if status:
-        contracts = contracts.filter(status=status)
-    
-    seller_id = request.GET.get('seller')
-    if seller_id and seller_id.isdigit():
-        contracts = contracts.filter(seller_id=int(seller_id))
-    
-    buyer_id = request.GET.get('buyer')
-    if buyer_id and buyer_id.isdigit():
-        contracts = contracts.filter(buyer_id=int(buyer_id))
-    
-    search = request.GET.get('search', '').strip()
-    if search:
-        contracts = contracts.filter(
-            Q(contract_id__icontains=search) |
-            Q(product__title__icontains=search)
-        )
+    contracts = _apply_contract_list_filters(request.GET, contracts)
     
     # Pagination
     page_obj, pagination = _paginate_queryset(request, contracts, page_size=15)
@@ -3490,35 +3211,111 @@ def contracts_export_csv(request):
     if not _is_admin_user(request.user):
         return JsonResponse({'success': False, 'message': 'Permission denied.'}, status=403)
     
-    import csv
-    from django.http import HttpResponse
-    
-    contracts = Contract.objects.select_related('product', 'buyer', 'seller').order_by('-confirmed_at')
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="contracts_{timezone.now().strftime("%Y%m%d")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Contract ID', 'Product', 'Buyer', 'Seller', 'Deal Amount', 
-                     'Quantity', 'Loading From', 'Loading To', 'Confirmed Date', 'Status'])
-    
-    for contract in contracts:
-        writer.writerow([
-            contract.contract_id,
-            contract.product.title,
-            contract.buyer.username,
-            contract.seller.username,
-            f"{contract.deal_amount}/{contract.amount_unit}",
-            f"{contract.deal_quantity} {contract.quantity_unit}",
-            contract.loading_from,
-            contract.loading_to,
-            contract.confirmed_at.strftime('%Y-%m-%d %H:%M'),
-            contract.status
-        ])
-    
+    contracts = _apply_contract_list_filters(request.GET, _contracts_for_user(request.user))
+    filename = f'contracts_{timezone.now().strftime("%Y%m%d")}.csv'
+    chunks = iter_encoded(iter_csv_lines(CONTRACT_EXPORT_HEADER, iter_contract_export_rows(contracts)))
+
+    if (request.GET.get('compress') or '').strip().lower() == 'gzip':
+        response = StreamingHttpResponse(iter_gzip(chunks), content_type='application/gzip')
+        filename = f'{filename}.gz'
+    else:
+        response = StreamingHttpResponse(chunks, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 
+EXPORT_JOB_FILTER_KEYS = ('status', 'seller', 'buyer', 'search', 'category', 'role', 'kyc_status', 'account_status')
+
+
+def _export_job_data(job):
+    return {
+        'id': job.id,
+        'export_type': job.export_type,
+        'file_format': job.file_format,
+        'status': job.status,
+        'filters': job.filters,
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows,
+        'progress': job.progress_percent,
+        'error_message': job.error_message,
+        'created_at': job.created_at.strftime('%d-%m-%Y %H:%M'),
+        'finished_at': job.finished_at.strftime('%d-%m-%Y %H:%M') if job.finished_at else None,
+        'download_url': reverse('export_job_download', args=[job.id]) if job.status == ExportJob.STATUS_COMPLETED and job.file else None,
+    }
+
+
+@login_required
+@require_POST
+def export_job_create_ajax(request):
+    """Queue a background export; the run_export_jobs worker writes the file."""
+    try:
+        payload = json.loads(request.body or '{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON payload.'}, status=400)
+
+    export_type = (payload.get('export_type') or '').strip().lower()
+    if export_type not in dict(ExportJob.TYPE_CHOICES):
+        return JsonResponse({'success': False, 'message': 'Invalid export type.'}, status=400)
+    if export_type in ADMIN_ONLY_EXPORT_TYPES:
+        if not _is_admin_user(request.user):
+            return JsonResponse({'success': False, 'message': 'Permission denied.'}, status=403)
+    else:
+        # Same gate as the offers/products listings these exports mirror.
+        allowed, msg = _check_admin_seller_buyer(request.user, module='product_management', action='read')
+        if not allowed:
+            return JsonResponse({'success': False, 'message': msg}, status=403)
+
+    file_format = (payload.get('file_format') or ExportJob.FORMAT_CSV).strip().lower()
+    if file_format not in dict(ExportJob.FORMAT_CHOICES):
+        return JsonResponse({'success': False, 'message': 'Invalid file format.'}, status=400)
+
+    raw_filters = payload.get('filters') or {}
+    if not isinstance(raw_filters, dict):
+        return JsonResponse({'success': False, 'message': 'Filters must be an object.'}, status=400)
+    filters = {
+        key: str(raw_filters[key]).strip()
+        for key in EXPORT_JOB_FILTER_KEYS
+        if str(raw_filters.get(key) or '').strip()
+    }
+
+    job = ExportJob.objects.create(
+        requested_by=request.user,
+        export_type=export_type,
+        file_format=file_format,
+        filters=filters,
+    )
+    return JsonResponse({'success': True, 'message': 'Export queued.', 'job': _export_job_data(job)}, status=201)
+
+
+@login_required
+@require_GET
+def export_job_list_ajax(request):
+    jobs = ExportJob.objects.filter(requested_by=request.user)[:20]
+    return JsonResponse({'success': True, 'jobs': [_export_job_data(job) for job in jobs]})
+
+
+@login_required
+@require_GET
+def export_job_status_ajax(request, job_id):
+    job = ExportJob.objects.filter(id=job_id, requested_by=request.user).first()
+    if not job:
+        return JsonResponse({'success': False, 'message': 'Export not found.'}, status=404)
+    return JsonResponse({'success': True, 'job': _export_job_data(job)})
+
+
+@login_required
+@require_GET
+def export_job_download(request, job_id):
+    job = ExportJob.objects.filter(id=job_id, requested_by=request.user).first()
+    if not job or job.status != ExportJob.STATUS_COMPLETED or not job.file:
+        return JsonResponse({'success': False, 'message': 'Export not available.'}, status=404)
+    try:
+        handle = job.file.open('rb')
+    except FileNotFoundError:
+        return JsonResponse({'success': False, 'message': 'Export file is missing.'}, status=404)
+    return FileResponse(handle, as_attachment=True, filename=os.path.basename(job.file.name))
+
+
 @login_required
 @require_http_methods(["GET", "PATCH", "POST"])
 def contract_detail_ajax(request, contract_id):
@@ -3673,6 +3470,14 @@ def product_accept_buyer_ajax(request, product_id):
         if interest.seller != request.user and not _is_admin_user(request.user):
             return _error_response('You can only accept interests on your own products.', status=403)
 
+        # Hold the quantity so other accepted offers cannot oversell it before admin confirmation
+        if StockReservation.hold(interest) is None:
+            available = interest.product.available_quantity(exclude_interest_id=interest.pk)
+            return _error_response(
+                f'Only {max(available, 0)} {interest.product.quantity_unit} left unreserved. Cannot accept this interest.',
+                status=400,
+            )
+
         # Update interest status
         interest.status = ProductInterest.STATUS_SELLER_CONFIRMED
         interest.seller_remark = seller_remark
@@ -3739,9 +3544,10 @@ def product_reject_buyer_ajax(request, product_id):
             if interest.status != ProductInterest.STATUS_INTERESTED:
                 return _error_response('Only interested requests can be rejected.', status=400)
 
-            ProductInterest.objects.filter(id=interest.id).update(
+            ProductInterest.bulk_transition(
+                ProductInterest.objects.filter(id=interest.id),
+                ProductInterest.STATUS_REJECTED,
                 seller=product.seller,
-                status=ProductInterest.STATUS_REJECTED,
                 seller_remark=seller_remark,
                 is_active=False,
             )
@@ -3750,7 +3556,7 @@ def product_reject_buyer_ajax(request, product_id):
             interest.seller_remark = seller_remark
             interest.is_active = False
 
-        fresh_product = _base_product_queryset().filter(id=product.id).first()
+        fresh_product = _base_product_queryset(viewer=request.user).filter(id=product.id).first()
         if fresh_product:
             fresh_product._context_user = request.user
 
@@ -3770,6 +3576,7 @@ def product_reject_buyer_ajax(request, product_id):
 
 @login_required
 @require_POST
+@idempotent('product_confirm_deal')
 def product_confirm_deal_ajax(request, product_id):
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
@@ -3823,7 +3630,8 @@ def product_confirm_deal_ajax(request, product_id):
         if interest.status not in (ProductInterest.STATUS_SELLER_CONFIRMED, ProductInterest.STATUS_DEAL_CONFIRMED):
             return _error_response('Only seller-confirmed interest can be confirmed as deal.', status=400)
 
-        product = Product.objects.select_for_update().filter(id=interest.product_id).first()
+        # No product row lock: the stock decrement below is a single conditional UPDATE.
+        product = Product.objects.filter(id=interest.product_id).first()
         if not product:
             return _error_response('Product not found.', status=404)
 
@@ -3845,10 +3653,17 @@ def product_confirm_deal_ajax(request, product_id):
             _send_contract_confirmation_email_to_admins(existing_contract, product, interest)
             return _success_response('Deal already confirmed for this interest.', existing_contract, product, interest)
 
-        # Check if enough quantity available for a new confirmation
-        available_qty = product.remaining_quantity if product.remaining_quantity is not None else product.original_quantity
-        if available_qty is None or interest.buyer_required_quantity > available_qty:
-            return _error_response(f'Only {available_qty or 0} {product.quantity_unit} available. Cannot confirm deal.', status=400)
+        # The deal may use its own live hold, or stock that no other live hold covers.
+        secured, available_qty = StockReservation.secure_for_deal(interest)
+        if not secured:
+            return _error_response(
+                f'Only {available_qty} {product.quantity_unit} available outside other buyers\' reservations. Cannot confirm deal.',
+                status=400,
+            )
+
+        # Update product stock; fails without side effects if a concurrent deal took it first
+        if not product.update_stock_after_deal(interest.buyer_required_quantity):
+            return _error_response(f'Only {product.remaining_quantity or 0} {product.quantity_unit} available. Cannot confirm deal.', status=400)
 
         # Update interest to deal confirmed
         interest.status = ProductInterest.STATUS_DEAL_CONFIRMED
@@ -3856,9 +3671,6 @@ def product_confirm_deal_ajax(request, product_id):
         interest.deal_confirmed_at = timezone.now()
         interest.save(update_fields=['status', 'superadmin_remark', 'deal_confirmed_at', 'updated_at'])
 
-        # Update product stock
-        product.update_stock_after_deal(interest.buyer_required_quantity)
-
         # Create contract
         contract = Contract.objects.create(
             interest=interest,
@@ -3876,14 +3688,8 @@ def product_confirm_deal_ajax(request, product_id):
             admin_remark=admin_remark
         )
 
-        # Reject all other interests for this product
-        ProductInterest.objects.filter(
-            product=product,
-            is_active=True
-        ).exclude(id=interest.id).update(
-            status=ProductInterest.STATUS_REJECTED,
-            is_active=False
-        )
+        # Reject only the other interests the remaining stock can no longer cover
+        ProductInterest.reject_unfillable(product, keep_interest_id=interest.id)
 
         # Notify all active admin recipients
         _send_contract_confirmation_email_to_admins(contract, product, interest)
@@ -3893,6 +3699,7 @@ def product_confirm_deal_ajax(request, product_id):
 
 @login_required
 @require_POST
+@idempotent('product_update_stock')
 def product_update_stock_ajax(request, product_id):
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
@@ -3948,7 +3755,12 @@ def product_update_stock_ajax(request, product_id):
         return _error_response('Quantity cannot be negative.', status=400)
 
     with transaction.atomic():
-        product = Product.objects.select_for_update().filter(id=product_id).first()
+        products = Product.objects.filter(id=product_id)
+        if mode == 'replace':
+            # Replace is a read-modify-write checked against live holds; the lock (also taken by
+            # StockReservation.hold) is held until commit. Add mode is a single UPDATE and needs none.
+            products = products.select_for_update()
+        product = products.first()
         if not product:
             return _error_response('Product not found.', status=404)
 
@@ -3972,6 +3784,12 @@ def product_update_stock_ajax(request, product_id):
             )
 
         # Replace mode kept for compatibility if explicitly requested.
+        reserved_qty = product.reserved_quantity()
+        if qty_value < reserved_qty:
+            return _error_response(
+                f'{reserved_qty} {product.quantity_unit} is reserved for seller-confirmed buyers. Stock cannot be set below that.',
+                status=400,
+            )
         product.remaining_quantity = qty_value
         if product.original_quantity is None or qty_value > product.original_quantity:
             product.original_quantity = qty_value
@@ -3997,6 +3815,46 @@ def product_buyer_confirm_ajax(request, product_id):
     return JsonResponse({'success': False, 'message': 'Buyer final confirmation is disabled. Waiting for Super Admin approval.'}, status=400)
 
 
+def _offer_row_data(row, show_names):
+    """Format one OFFER_ROW_FIELDS values() row for offers_list_ajax."""
+    amount = row['product__amount']
+    offered_amount = row['buyer_offered_amount']
+    arrow = 'equal'
+    if offered_amount is not None:
+        if offered_amount > amount:
+            arrow = 'up'
+        elif offered_amount < amount:
+            arrow = 'down'
+    buyer_unique_id = _actor_unique_id_from_pk(row['buyer_id'])
+    seller_unique_id = _actor_unique_id_from_pk(row['seller_id'])
+    return {
+        'interest_id': row['id'],
+        'transaction_id': row['transaction_id'],
+        'product_id': row['product_id'],
+        'product_title': row['product__title'],
+        'product_status': row['product__status'],
+        'deal_status': row['product__deal_status'],
+        'amount': str(amount),
+        'amount_unit': row['product__amount_unit'],
+        'seller_snapshot_amount': str(row['snapshot_amount']) if row['snapshot_amount'] is not None else '',
+        'seller_snapshot_quantity': str(row['snapshot_quantity']) if row['snapshot_quantity'] is not None else '',
+        'buyer_offered_amount': str(offered_amount) if offered_amount is not None else '',
+        'buyer_required_quantity': str(row['buyer_required_quantity']) if row['buyer_required_quantity'] else '',
+        'buyer_remark': row['buyer_remark'] or '',
+        'offered_amount': str(offered_amount) if offered_amount is not None else '',
+        'offer_arrow': arrow,
+        'delivery_date': row['delivery_date'].strftime('%d-%m-%Y') if row['delivery_date'] else '',
+        'status': row['status'],
+        'note': row['buyer_remark'] or '',
+        'seller_remark': row['seller_remark'] or '',
+        'superadmin_remark': row['superadmin_remark'] or '',
+        'buyer_unique_id': buyer_unique_id,
+        'seller_unique_id': seller_unique_id,
+        'buyer_name': row['buyer__username'] if show_names else buyer_unique_id,
+        'seller_name': row['seller__username'] if show_names else seller_unique_id,
+    }
+
+
 @login_required
 @require_GET
 def offers_list_ajax(request):
@@ -4004,62 +3862,39 @@ def offers_list_ajax(request):
     if not allowed:
         return JsonResponse({'success': False, 'message': msg}, status=403)
     user = request.user
-    role = (getattr(user, 'role', '') or '').strip().lower()
     if not (_is_buyer_user(user) or _is_seller_user(user) or _is_admin_user(user)):
         return JsonResponse({'success': False, 'message': 'Permission denied.'}, status=403)
 
-    queryset = ProductInterest.objects.select_related(
-        'product', 'product__seller', 'buyer', 'seller'
-    ).order_by('-created_at')
-
-    if role == 'buyer':
-        queryset = queryset.filter(buyer=user)
-    elif _is_seller_user(user) and not _is_admin_user(user):
-        queryset = queryset.filter(seller=user)
+    queryset = _offers_for_user(user)
 
     status_filter = (request.GET.get('status') or '').strip().lower()
     if status_filter:
         queryset = queryset.filter(status=status_filter)
 
-    results = []
-    for interest in queryset:
-        product = interest.product
-        amount = product.amount
-        offered_amount = interest.buyer_offered_amount
-        arrow = 'equal'
-        if offered_amount is not None:
-            if offered_amount > amount:
-                arrow = 'up'
-            elif offered_amount < amount:
-                arrow = 'down'
-        results.append({
-            'interest_id': interest.id,
-            'transaction_id': interest.transaction_id,
-            'product_id': product.id,
-            'product_title': product.title,
-            'product_status': product.status,
-            'deal_status': product.deal_status,
-            'amount': str(amount),
-            'amount_unit': product.amount_unit,
-            'seller_snapshot_amount': str(interest.snapshot_amount) if interest.snapshot_amount is not None else '',
-            'seller_snapshot_quantity': str(interest.snapshot_quantity) if interest.snapshot_quantity is not None else '',
-            'buyer_offered_amount': str(interest.buyer_offered_amount) if interest.buyer_offered_amount is not None else '',
-            'buyer_required_quantity': str(interest.buyer_required_quantity) if interest.buyer_required_quantity else '',
-            'buyer_remark': interest.buyer_remark or '',
-            'offered_amount': str(offered_amount) if offered_amount is not None else '',
-            'offer_arrow': arrow,
-            'delivery_date': interest.delivery_date.strftime('%d-%m-%Y') if interest.delivery_date else '',
-            'status': interest.status,
-            'note': interest.buyer_remark or '',
-            'seller_remark': interest.seller_remark or '',
-            'superadmin_remark': interest.superadmin_remark or '',
-            'buyer_unique_id': _actor_unique_id(interest.buyer),
-            'seller_unique_id': _actor_unique_id(interest.seller),
-            'buyer_name': interest.buyer.username if _is_super_admin_user(user) else _actor_unique_id(interest.buyer),
-            'seller_name': interest.seller.username if _is_super_admin_user(user) else _actor_unique_id(interest.seller),
-        })
+    queryset = queryset.values(*OFFER_ROW_FIELDS)
+    show_names = _is_super_admin_user(user)
+
+    # `stream=ndjson` rather than `format=` because DRF reserves that parameter on the mobile alias.
+    if (request.GET.get('stream') or '').strip().lower() == 'ndjson':
+        rows = queryset.order_by('-created_at', '-id').iterator(chunk_size=OFFERS_STREAM_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            (json.dumps(_offer_row_data(row, show_names)) + '\n' for row in rows),
+            content_type='application/x-ndjson',
+        )
+        response['Content-Disposition'] = 'inline; filename="offers.ndjson"'
+        return response
+
+    try:
+        page_size = min(max(int(request.GET.get('page_size') or OFFERS_PAGE_SIZE), 1), OFFERS_MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = OFFERS_PAGE_SIZE
+    try:
+        rows, pagination = cursor_paginate(queryset, ('created_at', 'id'), request.GET.get('cursor'), page_size)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid cursor.'}, status=400)
 
-    return JsonResponse({'success': True, 'results': results})
+    results = [_offer_row_data(row, show_names) for row in rows]
+    return JsonResponse({'success': True, 'results': results, 'pagination': pagination})
 
 
 # ===================== PRODUCT IMAGE MANAGEMENT =====================
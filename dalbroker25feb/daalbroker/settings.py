@@ -82,6 +82,15 @@ EMAIL_HOST_USER = 'daalsetu@gmail.com'
 EMAIL_HOST_PASSWORD = 'ujqe ifhr gxti dmoh'
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+EMAIL_TIMEOUT = 20
+
+# Outbox dispatch (brokers_app.mailer): worker threads per process, bounded queue, retries
+EMAIL_DISPATCH_WORKERS = 2
+EMAIL_DISPATCH_QUEUE_SIZE = 500
+EMAIL_DISPATCH_BATCH_SIZE = 20
+EMAIL_DISPATCH_MAX_ATTEMPTS = 5
+# Minutes to collect interest/deal notifications into one digest per admin; 0 emails each event immediately
+ADMIN_NOTIFICATION_DIGEST_MINUTES = 0
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
@@ -184,3 +193,16 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# How long a seller-confirmed interest holds its quantity before admin confirmation (brokers_app.models.StockReservation)
+STOCK_RESERVATION_TTL_MINUTES = 24 * 60
+
+# How long a response stored under an Idempotency-Key header is replayed (brokers_app.utils.idempotent)
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+# After this many seconds an unfinished Idempotency-Key request is treated as abandoned and may run again
+IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS = 120
+
+# Location dropdowns read the local LocationArea table; refresh it with `manage.py load_locations`
+# (bundled file, --file <India Post directory CSV>, or --from-remote) rather than per request.
+# Requests never call the remote location APIs; fill states beyond the starter seed with
+# `load_locations --from-remote --unloaded-only` (LOCATION_REMOTE_FALLBACK, default False, is the escape hatch).